@@ -2,11 +2,17 @@ from openai import OpenAI
 from fastapi import FastAPI, Form, Request
 from typing import Annotated
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, PlainTextResponse
 from mangum import Mangum
 import os
+import sys
 from dotenv import load_dotenv
 
+# Shared StockBot modules (metrics) live in the parent directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import metrics  # noqa: E402
+import tracing  # noqa: E402
+
 load_dotenv()
 # Access the OpenAI API key
 openai_api_key = os.getenv('OPENAI_API_KEY')
@@ -34,11 +40,13 @@ async def chat(request: Request, user_input: Annotated[str, Form()]):
     chat_log.append({'role': 'user', 'content': user_input})
     chat_responses.append(user_input)
 
-    response = openai.chat.completions.create(
-        model=openai_model,
-        messages=chat_log,
-        temperature=0.6
-    )
+    with tracing.start_trace("chat message", page="form", model=openai_model), \
+            tracing.span("openai.chat"), metrics.external_call("openai", "chat"):
+        response = openai.chat.completions.create(
+            model=openai_model,
+            messages=chat_log,
+            temperature=0.6
+        )
     bot_response = response.choices[0].message.content
     #print("Response", bot_response)
     chat_log.append({'role': 'assistant', 'content': bot_response})
@@ -53,25 +61,18 @@ async def image_page(request: Request):
 @app.post("/image", response_class=HTMLResponse)
 async def create_image(request: Request, user_input: Annotated[str, Form()]):
 
-    response = openai.images.generate(
-        prompt=user_input,
-        n=1,
-        size="512x512"
-    )
+    with metrics.external_call("openai", "images"):
+        response = openai.images.generate(
+            prompt=user_input,
+            n=1,
+            size="512x512"
+        )
 
     image_url = response.data[0].url
     return templates.TemplateResponse("image.html", {"request": request, "image_url": image_url})
 
 
-
-
-
-
-
-
-
-
-
-
-
-
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Prometheus scrape endpoint: latency, error and cache metrics from every StockBot process on this host."""
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
@@ -2,9 +2,15 @@ import google.generativeai as genai
 from fastapi import FastAPI, Form, Request, WebSocket
 from typing import Annotated
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, PlainTextResponse
 import os
+import sys
 from dotenv import load_dotenv
+
+# Shared StockBot modules (metrics) live in the parent directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import metrics  # noqa: E402
+import tracing  # noqa: E402
 import asyncio
 
 load_dotenv()
@@ -34,21 +40,26 @@ async def chat(websocket: WebSocket):
         user_input = await websocket.receive_text()
         chat_log.append({'role': 'user', 'parts': [user_input]})
         chat_responses.append(user_input)
-        try:
-            response = model.generate_content(
-                chat_log,
-                stream=True,
-                generation_config=genai.types.GenerationConfig(temperature=0.6)
-            )
-            ai_response = ''
-            for chunk in response:
-                if chunk.text:
-                    ai_response += chunk.text
-                    await websocket.send_text(chunk.text)
-            chat_responses.append(ai_response)
-        except Exception as e:
-            await websocket.send_text(f'Error: {str(e)}')
-            break
+        # One trace per message, kept by the slow-trace sampler in the shared trace buffer
+        with tracing.start_trace("chat message", page="ws-gemini", model=model.model_name):
+            try:
+                # Timed until the last streamed chunk
+                with tracing.span("gemini.generate_content_stream"), metrics.external_call("gemini", "generate_content_stream"):
+                    response = model.generate_content(
+                        chat_log,
+                        stream=True,
+                        generation_config=genai.types.GenerationConfig(temperature=0.6)
+                    )
+                    ai_response = ''
+                    for chunk in response:
+                        if chunk.text:
+                            ai_response += chunk.text
+                            await websocket.send_text(chunk.text)
+                chat_responses.append(ai_response)
+            except Exception as e:
+                tracing.mark_error(e)
+                await websocket.send_text(f'Error: {str(e)}')
+                break
 
 @app.get("/image", response_class=HTMLResponse)
 async def image_page(request: Request):
@@ -57,10 +68,11 @@ async def image_page(request: Request):
 @app.post("/image", response_class=HTMLResponse)
 async def create_image(request: Request, user_input: Annotated[str, Form()]):
     try:
-        response = image_model.generate_content(
-            user_input,
-            generation_config=genai.types.GenerationConfig(temperature=0.9)
-        )
+        with metrics.external_call("gemini", "generate_image"):
+            response = image_model.generate_content(
+                user_input,
+                generation_config=genai.types.GenerationConfig(temperature=0.9)
+            )
 
         if response.parts:
             #gemini returns parts, not a direct url like openai.
@@ -73,4 +85,10 @@ async def create_image(request: Request, user_input: Annotated[str, Form()]):
             return templates.TemplateResponse("image.html", {"request": request, "error": "Image generation failed."})
 
     except Exception as e:
-        return templates.TemplateResponse("image.html", {"request": request, "error": f"Error: {e}"})
\ No newline at end of file
+        return templates.TemplateResponse("image.html", {"request": request, "error": f"Error: {e}"})
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Prometheus scrape endpoint: latency, error and cache metrics from every StockBot process on this host."""
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
@@ -2,10 +2,16 @@ from openai import OpenAI
 from fastapi import FastAPI, Form, Request, WebSocket
 from typing import Annotated
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, PlainTextResponse
 import os
+import sys
 from dotenv import load_dotenv
 
+# Shared StockBot modules (metrics) live in the parent directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import metrics  # noqa: E402
+import tracing  # noqa: E402
+
 load_dotenv()
 # Access the OpenAI API key
 openai_api_key = os.getenv('OPENAI_API_KEY')
@@ -32,24 +38,29 @@ async def chat(websocket: WebSocket):
         user_input = await websocket.receive_text()
         chat_log.append({'role': 'user', 'content': user_input})
         chat_responses.append(user_input)
-        try:
-            response = openai.chat.completions.create(
-                model=openai_model,
-                messages=chat_log,
-                temperature=0.6,
-                stream=True
-            )
-            ai_response = ''
-            for chunk in response:
-                if chunk.choices[0].delta.content is not None:
-                    ai_response += chunk.choices[0].delta.content
-                    #print("resp",chunk.choices[0].delta.content)
-                    #chat_responses.append(ai_response)
-                    await websocket.send_text(chunk.choices[0].delta.content)
-            chat_responses.append(ai_response)
-        except Exception as e:
-            await websocket.send_text(f'Error: {str(e)}')
-            break
+        # One trace per message, kept by the slow-trace sampler in the shared trace buffer
+        with tracing.start_trace("chat message", page="ws", model=openai_model):
+            try:
+                # Timed until the last streamed chunk
+                with tracing.span("openai.chat_stream"), metrics.external_call("openai", "chat_stream"):
+                    response = openai.chat.completions.create(
+                        model=openai_model,
+                        messages=chat_log,
+                        temperature=0.6,
+                        stream=True
+                    )
+                    ai_response = ''
+                    for chunk in response:
+                        if chunk.choices[0].delta.content is not None:
+                            ai_response += chunk.choices[0].delta.content
+                            #print("resp",chunk.choices[0].delta.content)
+                            #chat_responses.append(ai_response)
+                            await websocket.send_text(chunk.choices[0].delta.content)
+                chat_responses.append(ai_response)
+            except Exception as e:
+                tracing.mark_error(e)
+                await websocket.send_text(f'Error: {str(e)}')
+                break
 
 @app.get("/image", response_class=HTMLResponse)
 async def image_page(request: Request):
@@ -59,23 +70,18 @@ async def image_page(request: Request):
 @app.post("/image", response_class=HTMLResponse)
 async def create_image(request: Request, user_input: Annotated[str, Form()]):
 
-    response = openai.images.generate(
-        prompt=user_input,
-        n=1,
-        size="512x512"
-    )
+    with metrics.external_call("openai", "images"):
+        response = openai.images.generate(
+            prompt=user_input,
+            n=1,
+            size="512x512"
+        )
 
     image_url = response.data[0].url
     return templates.TemplateResponse("image.html", {"request": request, "image_url": image_url})
 
 
-
-
-
-
-
-
-
-
-
-
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Prometheus scrape endpoint: latency, error and cache metrics from every StockBot process on this host."""
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
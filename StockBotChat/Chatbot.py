@@ -1,34 +1,39 @@
 import matplotlib.pyplot as plt
-import yfinance as yf
 from datetime import datetime
 import pandas as pd
 import warnings
 from openai import OpenAI
 import json
+import streamlit as st
 import botsystem
+import Options
+import sentiment_index
+import news_index
+import providers
+import tracing
 
 warnings.filterwarnings("ignore")
 
 def get_stock_price(ticker):
     """Gets the latest stock price."""
-    price = yf.Ticker(ticker).history(period='1y').iloc[-1].Close
+    price = providers.yf_history(ticker, period='1y').iloc[-1].Close
     return f"The current stock price of {ticker} is {price:.2f}"
 
 def calculate_SMA(ticker, window):
     """Calculates the Simple Moving Average."""
-    data = yf.Ticker(ticker).history(period='1y').Close
+    data = providers.yf_history(ticker, period='1y').Close
     sma = data.rolling(window=int(window)).mean().iloc[-1]
     return f"The {window}-day SMA of {ticker} is {sma:.2f}"
 
 def calculate_EMA(ticker, window):
     """Calculates the Exponential Moving Average."""
-    data = yf.Ticker(ticker).history(period='1y').Close
+    data = providers.yf_history(ticker, period='1y').Close
     ema = data.ewm(span=int(window), adjust=False).mean().iloc[-1]
     return f"The {window}-day EMA of {ticker} is {ema:.2f}"
 
 def calculate_RSI(ticker):
     """Calculates the Relative Strength Index."""
-    data = yf.Ticker(ticker).history(period='1y').Close
+    data = providers.yf_history(ticker, period='1y').Close
     delta = data.diff()
     up = delta.clip(lower=0)
     down = -delta.clip(upper=0)
@@ -40,7 +45,7 @@ def calculate_RSI(ticker):
 
 def calculate_MACD(ticker):
     """Calculates the Moving Average Convergence Divergence."""
-    data = yf.Ticker(ticker).history(period='1y').Close
+    data = providers.yf_history(ticker, period='1y').Close
     short_ema = data.ewm(span=12, adjust=False).mean()
     long_ema = data.ewm(span=26, adjust=False).mean()
     macd = short_ema - long_ema
@@ -50,7 +55,7 @@ def calculate_MACD(ticker):
 
 def plot_stock_price(ticker):
     """Plots the stock price over the last year."""
-    data = yf.Ticker(ticker).history(period='1y').Close
+    data = providers.yf_history(ticker, period='1y').Close
     plt.figure(figsize=(10, 5))
     plt.plot(data.index, data)
     plt.title(f'{ticker} Stock Price Over Last Year')
@@ -68,6 +73,9 @@ available_functions = {
     'calculate_RSI': calculate_RSI,
     'calculate_MACD': calculate_MACD,
     'plot_stock_price': plot_stock_price,
+    'filter_options_chain': Options.filter_options_chain,
+    'analyze_options_strategy': Options.analyze_options_strategy,
+    'get_sentiment_trend': sentiment_index.get_sentiment_trend,
 }
 
 functions = [
@@ -163,6 +171,79 @@ functions = [
             'required': ['ticker'],
         },
     },
+    {
+        'name': 'filter_options_chain',
+        'description': 'Finds options contracts for a stock that expire within a number of days and have strikes within a percentage band around the current price',
+        'parameters': {
+            'type': 'object',
+            'properties': {
+                'ticker': {
+                    'type': 'string',
+                    'description': 'The underlying stock ticker symbol (e.g., SPY).'
+                },
+                'contract_type': {
+                    'type': 'string',
+                    'enum': ['call', 'put'],
+                    'description': 'Only include calls or puts; omit for both.'
+                },
+                'max_days': {
+                    'type': 'integer',
+                    'description': 'Maximum number of days until expiration (e.g., 30).'
+                },
+                'strike_pct': {
+                    'type': 'number',
+                    'description': 'Strike band around the current price as a fraction (e.g., 0.10 for ±10%).'
+                },
+            },
+            'required': ['ticker'],
+        },
+    },
+    {
+        'name': 'analyze_options_strategy',
+        'description': 'Computes breakevens, max profit, max loss and probability of profit for a multi-leg options position on a stock',
+        'parameters': {
+            'type': 'object',
+            'properties': {
+                'ticker': {
+                    'type': 'string',
+                    'description': 'The underlying stock ticker symbol (e.g., AAPL).'
+                },
+                'strategy': {
+                    'type': 'string',
+                    'enum': ['Covered Call', 'Vertical Call Spread', 'Vertical Put Spread', 'Iron Condor', 'Straddle'],
+                    'description': 'The options strategy to analyze.'
+                },
+                'strikes': {
+                    'type': 'array',
+                    'items': {'type': 'number'},
+                    'description': 'Strikes in order: covered call [call]; vertical call spread [long, short]; vertical put spread [long, short]; iron condor [long put, short put, short call, long call]; straddle [strike]. Omit to use strikes near the current price.'
+                },
+                'days': {
+                    'type': 'integer',
+                    'description': 'Days until expiration (e.g., 30).'
+                },
+            },
+            'required': ['ticker', 'strategy'],
+        },
+    },
+    {
+        'name': 'get_sentiment_trend',
+        'description': 'Summarizes the news sentiment trend of a stock over recent days from the locally collected news index',
+        'parameters': {
+            'type': 'object',
+            'properties': {
+                'ticker': {
+                    'type': 'string',
+                    'description': 'The stock ticker symbol of a company (e.g., NVDA).'
+                },
+                'days': {
+                    'type': 'integer',
+                    'description': 'Number of trailing days to summarize (e.g., 90).'
+                },
+            },
+            'required': ['ticker'],
+        },
+    },
 ]
 # --- Display Functions ---
 def display_title_bar(st):
@@ -183,8 +264,13 @@ def display_title_bar(st):
         unsafe_allow_html=True,
     )
     st.markdown('<div class="title-bar"><h1>✨ Stock Bot Chat 🤖</h1></div>', unsafe_allow_html=True)
+@st.fragment
 def show_chatbot_page(st, api_key, llm, model_name):
-    """Displays the chatbot conversation on the main page, with user input at the bottom."""
+    """
+    Displays the chatbot conversation on the main page, with user input at the bottom.
+
+    Runs as a fragment, so sending a message reruns only the conversation.
+    """
     display_title_bar(st)
     # Display existing conversation
     for msg in st.session_state.chat_log:
@@ -217,56 +303,86 @@ def show_chatbot_page(st, api_key, llm, model_name):
         # Process form actions
         if send_clicked and user_query.strip():
             st.session_state.chat_log.append({"role": "user", "content": user_query})
-            try:
-                openai = OpenAI(api_key=api_key)
-                response = openai.chat.completions.create(
-                    model=llm,
-                    messages=st.session_state.chat_log,
-                    functions=functions,  # Updated reference
-                    function_call='auto',
-                    temperature=0.6,
-                )
-                ai_response = response.choices[0].message
+            # One trace per message: news retrieval, the LLM call, the tool and its data fetches
+            with tracing.start_trace("chat message", page="streamlit", model=llm):
+                try:
+                    # Ground news questions in locally indexed articles (not kept in the chat log)
+                    messages = st.session_state.chat_log
+                    with tracing.span("news_index.retrieve_context"):
+                        news_context = news_index.retrieve_context(user_query)
+                    if news_context:
+                        messages = messages + [{"role": "system", "content": news_context}]
+
+                    openai = OpenAI(api_key=api_key)
+                    response = providers.openai_chat(
+                        openai,
+                        model=llm,
+                        messages=messages,
+                        functions=functions,  # Updated reference
+                        function_call='auto',
+                        temperature=0.6,
+                    )
+                    ai_response = response.choices[0].message
 
-                # Check for function call
-                if hasattr(ai_response, 'function_call') and ai_response.function_call:
-                    function_name = ai_response.function_call.name
-                    function_args = json.loads(ai_response.function_call.arguments)
+                    # Check for function call
+                    if hasattr(ai_response, 'function_call') and ai_response.function_call:
+                        function_name = ai_response.function_call.name
+                        function_args = json.loads(ai_response.function_call.arguments)
 
-                    args_dict = {}
-                    if function_name in [
-                        'get_stock_price',
-                        'plot_stock_price',
-                        'calculate_RSI',
-                        'calculate_MACD'
-                    ]:
-                        args_dict = {'ticker': function_args.get('ticker')}
-                    elif function_name in ['calculate_SMA', 'calculate_EMA']:
-                        args_dict = {
-                            'ticker': function_args.get('ticker'),
-                            'window': function_args.get('window')
-                        }
+                        args_dict = {}
+                        if function_name in [
+                            'get_stock_price',
+                            'plot_stock_price',
+                            'calculate_RSI',
+                            'calculate_MACD'
+                        ]:
+                            args_dict = {'ticker': function_args.get('ticker')}
+                        elif function_name in ['calculate_SMA', 'calculate_EMA']:
+                            args_dict = {
+                                'ticker': function_args.get('ticker'),
+                                'window': function_args.get('window')
+                            }
+                        elif function_name == 'filter_options_chain':
+                            args_dict = {
+                                key: function_args[key]
+                                for key in ['ticker', 'contract_type', 'max_days', 'strike_pct']
+                                if key in function_args
+                            }
+                        elif function_name == 'analyze_options_strategy':
+                            args_dict = {
+                                key: function_args[key]
+                                for key in ['ticker', 'strategy', 'strikes', 'days']
+                                if key in function_args
+                            }
+                        elif function_name == 'get_sentiment_trend':
+                            args_dict = {
+                                key: function_args[key]
+                                for key in ['ticker', 'days']
+                                if key in function_args
+                            }
 
-                    function_to_call = available_functions[function_name]
-                    function_response = function_to_call(**args_dict)
+                        function_to_call = available_functions[function_name]
+                        with tracing.span(f"tool {function_name}", **args_dict):
+                            function_response = function_to_call(**args_dict)
 
-                    # Display results
-                    if function_name == 'plot_stock_price':
-                        st.image('stock.png')
+                        # Display results
+                        if function_name == 'plot_stock_price':
+                            st.image('stock.png')
+                        else:
+                            combined_content = function_response
+                            if ai_response.content:
+                                combined_content = f"{ai_response.content}\n{function_response}"
+                            st.session_state.chat_log.append({'role': 'assistant', 'content': combined_content})
                     else:
-                        combined_content = function_response
-                        if ai_response.content:
-                            combined_content = f"{ai_response.content}\n{function_response}"
-                        st.session_state.chat_log.append({'role': 'assistant', 'content': combined_content})
-                else:
-                    # Plain text response
-                    st.session_state.chat_log.append(dict(ai_response))
+                        # Plain text response
+                        st.session_state.chat_log.append(dict(ai_response))
 
-            except Exception as e:
-                st.error(f"An error occurred: {e}")
+                except Exception as e:
+                    tracing.mark_error(e)
+                    st.error(f"An error occurred: {e}")
 
-            st.rerun()
+            st.rerun(scope="fragment")
 
         elif reset_clicked:
             st.session_state.chat_log = [{"role": "system", "content": botsystem.prompt}]
-            st.rerun()
\ No newline at end of file
+            st.rerun(scope="fragment")
\ No newline at end of file
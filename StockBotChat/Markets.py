@@ -1,25 +1,130 @@
-import requests
 import os
+import json
+import threading
+import time
+from datetime import datetime
 import pandas as pd
 import plotly.graph_objects as go
+import streamlit as st
 
-# Function to fetch Fear & Greed Index from RapidAPI
-def fetch_fear_and_greed_index(st):
+import config
+import providers
+
+FGI_URL = "https://fear-and-greed-index.p.rapidapi.com/v1/fgi"
+FGI_REFRESH_INTERVAL = 15 * 60  # Seconds between background refreshes
+FGI_RETRY_INTERVAL = 60  # Seconds to wait after a failed refresh before trying again
+FGI_CACHE_FILE = config.cache_path("markets", "fear_greed.json")
+
+
+def request_fear_and_greed_index():
+    """Fetch the Fear & Greed Index from RapidAPI, raising on failure."""
     RAPID_API_KEY = os.getenv('RAPID_API_KEY')  # Store your API key in environment variables
-    url = "https://fear-and-greed-index.p.rapidapi.com/v1/fgi"
     headers = {
         "X-RapidAPI-Key": RAPID_API_KEY,
         "X-RapidAPI-Host": "fear-and-greed-index.p.rapidapi.com"
     }
-
-    response = requests.get(url, headers=headers)
-
-    if response.status_code == 200:
-        data = response.json()
-        return data['fgi']
-    else:
+    response = providers.http_get("rapidapi", FGI_URL, headers=headers, timeout=10)
+    response.raise_for_status()
+    return response.json()['fgi']
+
+
+class FearGreedCache:
+    """
+    Process-wide Fear & Greed cache shared by every Streamlit session.
+
+    A background thread refreshes the index on a schedule. Readers always get the last
+    good value immediately (stale-while-revalidate); a read that finds the value stale
+    also kicks off a refresh. The last value is persisted to disk so a restarted server
+    renders immediately, and the Plotly figure specs are rebuilt only when the data changes.
+    """
+
+    def __init__(self, refresh_interval=FGI_REFRESH_INTERVAL):
+        self.refresh_interval = refresh_interval
+        self.lock = threading.Lock()
+        self.refreshing = threading.Lock()
+        self.data = None
+        self.figures = None
+        self.fetched_at = 0.0
+        self.last_attempt = 0.0
+        self.error = None
+
+    def load_from_disk(self):
+        """Seed the cache from the last persisted value, if any."""
+        try:
+            with open(FGI_CACHE_FILE) as f:
+                saved = json.load(f)
+            self._set(saved["fgi"], saved["fetched_at"])
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def _set(self, data, fetched_at):
+        figures = build_figures(data)
+        with self.lock:
+            self.data, self.figures, self.fetched_at, self.error = data, figures, fetched_at, None
+
+    def refresh(self):
+        """Fetch a new value; concurrent refreshes collapse into one request."""
+        if not self.refreshing.acquire(blocking=False):
+            return
+        self.last_attempt = time.time()
+        try:
+            data = request_fear_and_greed_index()
+            fetched_at = time.time()
+            self._set(data, fetched_at)
+            tmp_path = f"{FGI_CACHE_FILE}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"fetched_at": fetched_at, "fgi": data}, f)
+            os.replace(tmp_path, FGI_CACHE_FILE)
+        except Exception as e:
+            with self.lock:
+                self.error = str(e)
+        finally:
+            self.refreshing.release()
+
+    def is_stale(self):
+        """True when the value is old enough to refresh and no recent attempt has failed."""
+        now = time.time()
+        return now - self.fetched_at >= self.refresh_interval and now - self.last_attempt >= min(FGI_RETRY_INTERVAL, self.refresh_interval)
+
+    def get(self):
+        """
+        Return the cached value without waiting on the network.
+
+        Returns:
+            tuple: (index data or None, figure specs or None, fetched_at timestamp)
+        """
+        if self.is_stale():
+            threading.Thread(target=self.refresh, daemon=True).start()
+        with self.lock:
+            return self.data, self.figures, self.fetched_at
+
+    def start(self):
+        """Refresh in the background on a fixed schedule."""
+        def loop():
+            while True:
+                if self.is_stale():
+                    self.refresh()
+                time.sleep(min(60, self.refresh_interval))
+        threading.Thread(target=loop, name="fear-greed-refresh", daemon=True).start()
+
+
+@st.cache_resource
+def get_fear_greed_cache():
+    """Create the shared cache once per server process and start its refresher."""
+    cache = FearGreedCache()
+    cache.load_from_disk()
+    if cache.data is None:
+        cache.refresh()  # Nothing to show yet, so the very first load has to wait
+    cache.start()
+    return cache
+
+
+# Function to fetch Fear & Greed Index (served from the shared cache)
+def fetch_fear_and_greed_index(st):
+    data, _, _ = get_fear_greed_cache().get()
+    if data is None:
         st.error("⚠️ Failed to fetch Fear & Greed Index data.")
-        return None
+    return data
 
 
 # Function to determine the color based on sentiment
@@ -37,11 +142,72 @@ def get_sentiment_color(sentiment):
     return "blue"
 
 
+def build_figures(index_data):
+    """
+    Build the gauge and history figure specs for an index value.
+
+    Returns:
+        dict: Plotly figure dicts keyed by "gauge" and "history", reusable across sessions.
+    """
+    sentiment_color = get_sentiment_color(index_data['now']['valueText'])
+    gauge_fig = go.Figure(go.Indicator(
+        mode="gauge+number",
+        value=index_data['now']['value'],
+        title={'text': "Fear & Greed Gauge"},
+        gauge={
+            'axis': {'range': [0, 100]},
+            'bar': {'color': sentiment_color},
+            'steps': [
+                {'range': [0, 25], 'color': "red"},
+                {'range': [25, 50], 'color': "orange"},
+                {'range': [50, 75], 'color': "green"},
+                {'range': [75, 100], 'color': "darkgreen"}
+            ],
+            'threshold': {
+                'line': {'color': "black", 'width': 4},
+                'thickness': 0.75,
+                'value': index_data['now']['value']
+            }
+        }
+    ))
+
+    df = pd.DataFrame({
+        'Time': ['Now', 'Prev Close', '1 Week', '1 Month', '1 Year'],
+        'Value': [
+            index_data['now']['value'],
+            index_data['previousClose']['value'],
+            index_data['oneWeekAgo']['value'],
+            index_data['oneMonthAgo']['value'],
+            index_data['oneYearAgo']['value']
+        ]
+    })
+
+    fig = go.Figure(data=[
+        go.Bar(
+            x=df['Time'],
+            y=df['Value'],
+            marker=dict(color=['red', 'orange', 'gray', 'green', 'darkgreen']),
+            text=df['Value'],
+            textposition='auto'
+        )
+    ])
+    fig.update_layout(
+        title="📉 Fear & Greed Index Over Time",
+        xaxis_title="",
+        yaxis_title="Index Value",
+        yaxis=dict(range=[0, 100]),
+        template="plotly_white",
+        height=300,
+        margin=dict(l=30, r=30, t=40, b=30)
+    )
+    return {"gauge": gauge_fig.to_dict(), "history": fig.to_dict()}
+
+
 # Function to display the Fear & Greed Index in Streamlit (Compact Version)
 def show_sentiment(st):
     st.markdown("<h3 style='text-align: center;'>📊 Fear & Greed Index</h3>", unsafe_allow_html=True)
 
-    index_data = fetch_fear_and_greed_index(st)
+    index_data, figures, fetched_at = get_fear_greed_cache().get()
 
     if index_data:
         sentiment = index_data['now']['valueText']
@@ -61,62 +227,14 @@ def show_sentiment(st):
                 f"</div>",
                 unsafe_allow_html=True
             )
+            st.caption(f"Updated {datetime.fromtimestamp(fetched_at):%Y-%m-%d %H:%M}")
 
         # Display gauge chart
         with col2:
-            gauge_fig = go.Figure(go.Indicator(
-                mode="gauge+number",
-                value=index_data['now']['value'],
-                title={'text': "Fear & Greed Gauge"},
-                gauge={
-                    'axis': {'range': [0, 100]},
-                    'bar': {'color': sentiment_color},
-                    'steps': [
-                        {'range': [0, 25], 'color': "red"},
-                        {'range': [25, 50], 'color': "orange"},
-                        {'range': [50, 75], 'color': "green"},
-                        {'range': [75, 100], 'color': "darkgreen"}
-                    ],
-                    'threshold': {
-                        'line': {'color': "black", 'width': 4},
-                        'thickness': 0.75,
-                        'value': index_data['now']['value']
-                    }
-                }
-            ))
-            st.plotly_chart(gauge_fig, use_container_width=True)
+            st.plotly_chart(figures["gauge"], use_container_width=True)
 
         # Display bar chart
-        df = pd.DataFrame({
-            'Time': ['Now', 'Prev Close', '1 Week', '1 Month', '1 Year'],
-            'Value': [
-                index_data['now']['value'],
-                index_data['previousClose']['value'],
-                index_data['oneWeekAgo']['value'],
-                index_data['oneMonthAgo']['value'],
-                index_data['oneYearAgo']['value']
-            ]
-        })
-
-        fig = go.Figure(data=[
-            go.Bar(
-                x=df['Time'],
-                y=df['Value'],
-                marker=dict(color=['red', 'orange', 'gray', 'green', 'darkgreen']),
-                text=df['Value'],
-                textposition='auto'
-            )
-        ])
-        fig.update_layout(
-            title="📉 Fear & Greed Index Over Time",
-            xaxis_title="",
-            yaxis_title="Index Value",
-            yaxis=dict(range=[0, 100]),
-            template="plotly_white",
-            height=300,
-            margin=dict(l=30, r=30, t=40, b=30)
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(figures["history"], use_container_width=True)
 
     else:
-        st.warning("⚠️ Could not retrieve Fear and Greed Index data at this time.")
\ No newline at end of file
+        st.warning("⚠️ Could not retrieve Fear and Greed Index data at this time.")
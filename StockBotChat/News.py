@@ -1,57 +1,278 @@
 import requests
 import streamlit as st
 import os
+import json
+import threading
+import time
+from collections import deque
+
+import config
+import sentiment_index
+import news_index
+import providers
 
 # 🔹 Replace this with your own Alpha Vantage API Key
 ALPHA_VANTAGE_API_KEY = os.getenv("ALPHA_VANTAGE_API_KEY", "YOUR_API_KEY_HERE")
+ALPHA_VANTAGE_URL = "https://www.alphavantage.co/query"
+NEWS_CACHE_TTL = 15 * 60  # Seconds a cached feed is served without refetching
+MARKET_FEED_KEY = "_market"  # Cache key for the broad, unfiltered feed
+# Fewer broad-feed articles than this for a ticker are only a fallback, not its feed
+MARKET_SPLIT_MIN_ARTICLES = 5
+
+
+class RateLimiter:
+    """Sliding-window limiter shared by every caller in the process."""
+
+    def __init__(self, max_calls, period):
+        self.max_calls = max_calls
+        self.period = period
+        self.calls = deque()
+        self.lock = threading.Lock()
+
+    def try_acquire(self):
+        """Record a call and return True if it fits in the window, False otherwise."""
+        with self.lock:
+            now = time.monotonic()
+            while self.calls and now - self.calls[0] >= self.period:
+                self.calls.popleft()
+            if len(self.calls) >= self.max_calls:
+                return False
+            self.calls.append(now)
+            return True
+
+    def remaining(self):
+        """Calls still allowed in the current window."""
+        with self.lock:
+            now = time.monotonic()
+            return self.max_calls - sum(now - call < self.period for call in self.calls)
+
+    def wait_time(self):
+        """Seconds until the next call would be allowed."""
+        with self.lock:
+            if len(self.calls) < self.max_calls:
+                return 0
+            return max(0, self.period - (time.monotonic() - self.calls[0]))
+
+
+# Alpha Vantage's free tier allows only a handful of calls per minute per key
+news_rate_limiter = RateLimiter(int(os.getenv("ALPHA_VANTAGE_CALLS_PER_MINUTE", "5")), 60)
+
+
+class NewsQuotaError(Exception):
+    """Raised when a news request is refused by the local limiter or by Alpha Vantage."""
 
-def get_stock_news(ticker):
-    """Fetches latest summarized news for a stock using Alpha Vantage API."""
-    url = f"https://www.alphavantage.co/query?function=NEWS_SENTIMENT&tickers={ticker}&apikey={ALPHA_VANTAGE_API_KEY}"
 
+def _cache_file(key):
+    return config.cache_path("news", f"{key}.json")
+
+
+def read_cached_feed(key, max_age=NEWS_CACHE_TTL):
+    """
+    Read a cached feed from disk.
+
+    Returns:
+        tuple: (articles or None, True if younger than `max_age`)
+    """
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
+        with open(_cache_file(key)) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None, False
+    return data["feed"], time.time() - data["fetched_at"] < max_age
 
-        if "feed" not in data:
-            return f"❌ No news available for {ticker} or API limit reached."
 
-        news_list = []
-        for article in data["feed"][:5]:  # Get top 5 articles
-            title = article.get("title", "No title available")
-            link = article.get("url", "#")
-            source = article.get("source", "Unknown Source")
-            summary = article.get("summary", "No summary available")
+def write_cached_feed(key, feed):
+    """Persist a feed atomically so concurrent sessions never read a partial file."""
+    path = _cache_file(key)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"fetched_at": time.time(), "feed": feed}, f)
+    os.replace(tmp_path, path)
+
+
+def fetch_news_feed(ticker=None, limit=50):
+    """
+    Make one rate-limited NEWS_SENTIMENT request, cache the feed and add it to the local indexes.
+
+    Args:
+        ticker (str): Restrict to articles about this ticker, or None for the broad market feed.
+        limit (int): Maximum number of articles to return (Alpha Vantage allows up to 1000).
+
+    Returns:
+        list: Raw Alpha Vantage articles, including per-ticker sentiment.
+    """
+    if not news_rate_limiter.try_acquire():
+        raise NewsQuotaError(f"News rate limit reached; try again in {news_rate_limiter.wait_time():.0f}s.")
+
+    params = {"function": "NEWS_SENTIMENT", "sort": "LATEST", "limit": limit, "apikey": ALPHA_VANTAGE_API_KEY}
+    if ticker:
+        params["tickers"] = ticker
+    response = providers.http_get("alphavantage", ALPHA_VANTAGE_URL, params=params, timeout=10)
+    response.raise_for_status()
+    data = response.json()
+    if "feed" not in data:
+        # Alpha Vantage reports quota exhaustion as an "Information"/"Note" message
+        raise NewsQuotaError(data.get("Information") or data.get("Note") or "API limit reached.")
+    write_cached_feed(ticker or MARKET_FEED_KEY, data["feed"])
+    index_articles(data["feed"])
+    return data["feed"]
+
+
+def index_articles(feed):
+    """Add fetched articles to the sentiment and retrieval indexes; failures never fail the fetch."""
+    for name, add in (("sentiment", sentiment_index.ingest), ("news", news_index.add_articles)):
+        try:
+            add(feed)
+        except Exception as e:
+            print(f"⚠️ Could not add articles to the {name} index: {e}")
+
 
-            news_list.append({"title": title, "link": link, "source": source, "summary": summary})
+def _split_market_feed(feed, tickers):
+    """Articles of a broad feed per ticker, by each article's ticker_sentiment."""
+    split = {ticker: [] for ticker in tickers}
+    for article in feed or []:
+        for ticker in {ts.get("ticker") for ts in article.get("ticker_sentiment", [])} & split.keys():
+            split[ticker].append(article)
+    return split
 
+
+def _market_call_pays_off(previous_feed, missing):
+    """
+    Whether one broad request likely saves calls: it replaces a per-ticker request for every
+    ticker it covers fully, so it must cover at least two. Coverage is judged by the previous
+    broad feed; without one, only three or more missing tickers justify the gamble.
+    """
+    if previous_feed is None:
+        return len(missing) > 2
+    covered = sum(len(articles) >= MARKET_SPLIT_MIN_ARTICLES
+                  for articles in _split_market_feed(previous_feed, missing).values())
+    return covered >= 2
+
+
+def get_news_for_tickers(tickers):
+    """
+    Get news for several tickers, spending as little Alpha Vantage quota as possible.
+
+    Fresh per-ticker feeds come from the disk cache. When more than one ticker is missing,
+    a fresh cached broad market feed is split by each article's ticker_sentiment; a new
+    broad request is only made when it likely covers two or more of them. Tickers the split
+    covers with fewer than MARKET_SPLIT_MIN_ARTICLES articles still get their own request
+    unless the remaining quota cannot cover every ticker, and only a full split is cached
+    as the ticker's feed. If quota runs out, stale cached feeds (or else the partial split)
+    are served.
+
+    Args:
+        tickers (list): Stock symbols (e.g., ["AAPL", "MSFT"]).
+
+    Returns:
+        dict: Ticker -> list of raw articles, or an error string for that ticker.
+    """
+    tickers = list(dict.fromkeys(t.strip().upper() for t in tickers if t.strip()))
+    results, stale, partial, missing = {}, {}, {}, []
+    for ticker in tickers:
+        feed, fresh = read_cached_feed(ticker)
+        if fresh:
+            results[ticker] = feed
+        else:
+            missing.append(ticker)
+            if feed is not None:
+                stale[ticker] = feed
+
+    if len(missing) > 1:
+        market_feed, fresh = read_cached_feed(MARKET_FEED_KEY)
+        if not fresh and _market_call_pays_off(market_feed, missing):
+            try:
+                market_feed, fresh = fetch_news_feed(limit=1000), True
+            except (NewsQuotaError, requests.exceptions.RequestException):
+                pass  # Fall back to the stale broad feed, if any, for partial splits
+        for ticker, articles in _split_market_feed(market_feed, missing).items():
+            if fresh and len(articles) >= MARKET_SPLIT_MIN_ARTICLES:
+                results[ticker] = articles
+                write_cached_feed(ticker, articles)
+            elif articles:
+                partial[ticker] = articles
+
+    needed = [ticker for ticker in missing if ticker not in results]
+    if len(needed) > news_rate_limiter.remaining():
+        # Not enough quota for every ticker: serve thin splits and keep calls for uncovered tickers
+        for ticker in needed:
+            if ticker in partial:
+                results[ticker] = partial[ticker]
+
+    for ticker in needed:
+        if ticker in results:
+            continue
+        try:
+            results[ticker] = fetch_news_feed(ticker)
+        except (NewsQuotaError, requests.exceptions.RequestException) as e:
+            results[ticker] = stale.get(ticker) or partial.get(ticker) or f"❌ Error fetching news for {ticker}: {e}"
+
+    return {ticker: results[ticker] for ticker in tickers}
+
+
+def merge_articles(news_by_ticker):
+    """Combine per-ticker feeds, dropping articles that appear under more than one ticker."""
+    seen, merged = set(), []
+    for feed in news_by_ticker.values():
+        if isinstance(feed, str):
+            continue
+        for article in feed:
+            url = article.get("url")
+            if url in seen:
+                continue
+            seen.add(url)
+            merged.append(article)
+    return sorted(merged, key=lambda article: article.get("time_published", ""), reverse=True)
+
+
+def format_article(article):
+    """Reduce a raw article to the fields shown in the News tab."""
+    return {
+        "title": article.get("title", "No title available"),
+        "link": article.get("url", "#"),
+        "source": article.get("source", "Unknown Source"),
+        "summary": article.get("summary", "No summary available"),
+    }
+
+
+def get_stock_news(ticker):
+    """Fetches latest summarized news for a stock using Alpha Vantage API."""
+    try:
+        feed = get_news_for_tickers([ticker]).get(ticker.strip().upper(), [])
+        if isinstance(feed, str):
+            return feed
+        if not feed:
+            return f"❌ No news available for {ticker} or API limit reached."
+
+        news_list = [format_article(article) for article in feed[:5]]  # Get top 5 articles
         return news_list if news_list else None
 
     except Exception as e:
         return f"❌ Error fetching news: {e}"
 
+
 def show_news(st):
     """Displays stock news in a Streamlit app."""
     st.title("Stock News")
     st.write("Get summarized stock news from Alpha Vantage.")
 
-    ticker = st.text_input("Enter Stock Ticker (e.g., AAPL, TSLA, MSFT):", key="stock_news_ticker")
+    ticker = st.text_input("Enter Stock Tickers (e.g., AAPL, TSLA, MSFT):", key="stock_news_ticker")
 
     if st.button("Get News"):
-        if not ticker.strip():
+        tickers = [t for t in ticker.split(",") if t.strip()]
+        if not tickers:
             st.warning("⚠️ Please enter a valid stock ticker.")
             return
 
-        news = get_stock_news(ticker)
+        news_by_ticker = get_news_for_tickers(tickers)
+        for symbol, feed in news_by_ticker.items():
+            if isinstance(feed, str):  # Error case
+                st.error(feed)
+            elif not feed:
+                st.warning(f"⚠️ No news found for {symbol}. Try another ticker.")
 
-        if isinstance(news, str):  # Error case
-            st.error(news)
-        elif not news:
-            st.warning(f"⚠️ No news found for {ticker}. Try another ticker.")
-        else:
-            for article in news:
-                st.markdown(f"### [{article['title']}]({article['link']})")
-                st.write(f"📰 {article['source']}")
-                st.write(f"📌 **Summary:** {article['summary']}")
-                st.write("---")  # Separator for articles
\ No newline at end of file
+        for article in map(format_article, merge_articles(news_by_ticker)[:5 * len(news_by_ticker)]):
+            st.markdown(f"### [{article['title']}]({article['link']})")
+            st.write(f"📰 {article['source']}")
+            st.write(f"📌 **Summary:** {article['summary']}")
+            st.write("---")  # Separator for articles
@@ -1,9 +1,18 @@
 import streamlit as st
 import alpaca_trade_api as tradeapi
 import os
+import numpy as np
 import pandas as pd
 from dotenv import load_dotenv
 import requests
+import yfinance as yf
+from concurrent.futures import ThreadPoolExecutor
+import options_store
+import greeks
+import payoff
+import providers
+import tracing
+import plotly.graph_objects as go
 
 load_dotenv()
 
@@ -24,21 +33,296 @@ def remove_from_watchlist(stock, st):
     if stock in st.session_state.watchlist:
         st.session_state.watchlist.remove(stock)
 
+# --- Options Chain Fetching ---
+POLYGON_CONTRACTS_URL = "https://api.polygon.io/v3/reference/options/contracts"
+POLYGON_SNAPSHOT_URL = "https://api.polygon.io/v3/snapshot/options"
+OPTIONS_CACHE_TTL = 300  # Seconds a fetched chain is reused across reruns
+MAX_CHAIN_WORKERS = 8
+
+
+@st.cache_data(ttl=OPTIONS_CACHE_TTL, show_spinner=False)
+def fetch_options_chain(ticker):
+    """
+    Fetch every options contract for an underlying from Polygon, following pagination.
+
+    Args:
+        ticker (str): Underlying stock symbol (e.g., "AAPL").
+
+    Returns:
+        pd.DataFrame: One row per contract (empty if Polygon has none).
+    """
+    api_key = os.getenv("POLYGON_API_KEY")
+    url = POLYGON_CONTRACTS_URL
+    params = {"underlying_ticker": ticker, "limit": 1000, "apiKey": api_key}
+    results = []
+    while url:
+        response = providers.http_get("polygon", url, params=params, timeout=10)
+        response.raise_for_status()
+        data = response.json()
+        results.extend(data.get("results", []))
+        # next_url carries the cursor but not the API key
+        url = data.get("next_url")
+        params = {"apiKey": api_key}
+    return pd.DataFrame(results)
+
+
+def fetch_watchlist_chains(tickers):
+    """
+    Fetch options chains for all watchlist symbols concurrently.
+
+    Chains already in the cache return immediately, so reruns only hit Polygon for
+    symbols that are new or whose cached chain has expired.
+
+    Args:
+        tickers (list): Underlying stock symbols.
+
+    Returns:
+        dict: Ticker -> (pd.DataFrame, error message or None).
+    """
+    def fetch(ticker):
+        try:
+            return fetch_options_chain(ticker), None
+        except requests.exceptions.RequestException as e:
+            return pd.DataFrame(), f"Error fetching options data: {e}"
+
+    if not tickers:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(MAX_CHAIN_WORKERS, len(tickers))) as executor:
+        return dict(zip(tickers, executor.map(tracing.propagate(fetch), tickers)))
+
+
 def get_options_chain_polygon(ticker, st):
-    api_key = os.getenv("POLYGON_API_KEY") #Replace with your api key.
-    url = f"https://api.polygon.io/v3/reference/options/contracts?underlying_ticker={ticker}&apiKey={api_key}"
-    try:
-        response = requests.get(url)
+    """Fetch one underlying's options chain, reporting errors in the Streamlit UI."""
+    options_df, error = fetch_watchlist_chains([ticker])[ticker]
+    if error:
+        st.error(error)
+    return options_df
+
+# --- Indexed Chain Queries ---
+@st.cache_resource(ttl=OPTIONS_CACHE_TTL, show_spinner=False)
+def get_chain_store(ticker):
+    """Build (or reuse) the indexed chain store for an underlying."""
+    return options_store.ChainStore(ticker, fetch_options_chain(ticker))
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def get_underlying_closes(ticker):
+    """Gets the last year of daily closes for an underlying (empty for unknown or delisted symbols)."""
+    history = providers.yf_history(ticker, period="1y")
+    return history["Close"].dropna() if "Close" in history else pd.Series(dtype="float64")
+
+
+def get_spot_price(ticker):
+    """
+    Gets the latest close for an underlying.
+
+    Raises:
+        ValueError: If there is no price history for the symbol.
+    """
+    closes = get_underlying_closes(ticker)
+    if closes.empty:
+        raise ValueError(f"No price history for {ticker}; check the symbol.")
+    return float(closes.iloc[-1])
+
+
+def get_historical_volatility(ticker):
+    """Annualized volatility of daily log returns over the last year."""
+    closes = get_underlying_closes(ticker)
+    return float(np.log(closes).diff().std() * np.sqrt(252))
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def fetch_options_quotes(ticker, contract_type=None, min_strike=None, max_strike=None,
+                         min_expiration=None, max_expiration=None):
+    """
+    Fetch current option prices for an underlying from Polygon's chain snapshot.
+
+    Uses the quote midpoint where available, then the last trade, then the day's close. The
+    filter window is applied by Polygon, so only the pages covering it are requested.
+
+    Args:
+        ticker (str): Underlying stock symbol.
+        contract_type (str): "call", "put" or None for both.
+        min_strike (float): Lowest strike to include.
+        max_strike (float): Highest strike to include.
+        min_expiration (str): Earliest expiration date (YYYY-MM-DD).
+        max_expiration (str): Latest expiration date (YYYY-MM-DD).
+
+    Returns:
+        pd.Series: Option price indexed by contract ticker (empty if snapshots are unavailable).
+    """
+    api_key = os.getenv("POLYGON_API_KEY")
+    url = f"{POLYGON_SNAPSHOT_URL}/{ticker}"
+    window = {
+        "contract_type": contract_type,
+        "strike_price.gte": min_strike,
+        "strike_price.lte": max_strike,
+        "expiration_date.gte": min_expiration,
+        "expiration_date.lte": max_expiration,
+    }
+    params = {"limit": 250, **{key: value for key, value in window.items() if value is not None}, "apiKey": api_key}
+    prices = {}
+    while url:
+        response = providers.http_get("polygon", url, params=params, timeout=10)
         response.raise_for_status()
         data = response.json()
-        results = data.get("results", [])
-        if results:
-            return pd.DataFrame(results)
-        else:
-            return pd.DataFrame()
-    except requests.exceptions.RequestException as e:
-        st.error(f"Error fetching options data: {e}")
-        return pd.DataFrame()
+        for result in data.get("results", []):
+            price = (result.get("last_quote", {}).get("midpoint")
+                     or result.get("last_trade", {}).get("price")
+                     or result.get("day", {}).get("close"))
+            if price:
+                prices[result["details"]["ticker"]] = price
+        # next_url carries the cursor and filters but not the API key
+        url = data.get("next_url")
+        params = {"apiKey": api_key}
+    return pd.Series(prices, dtype="float64")
+
+
+def quote_window(filtered_df):
+    """Snapshot filters covering exactly the strikes, expirations and types of filtered contracts."""
+    expirations = pd.to_datetime(filtered_df["expiration_date"])
+    types = filtered_df["contract_type"].dropna().unique()
+    return {
+        "contract_type": types[0] if len(types) == 1 else None,
+        "min_strike": float(filtered_df["strike_price"].min()),
+        "max_strike": float(filtered_df["strike_price"].max()),
+        "min_expiration": f"{expirations.min():%Y-%m-%d}",
+        "max_expiration": f"{expirations.max():%Y-%m-%d}",
+    }
+
+
+def add_greeks(filtered_df, ticker, spot):
+    """
+    Add implied volatility, theoretical price and greeks to filtered contracts.
+
+    Contracts without a market price are priced at the underlying's historical volatility.
+    """
+    quotes = pd.Series(dtype="float64")
+    if not filtered_df.empty:
+        try:
+            quotes = fetch_options_quotes(ticker, **quote_window(filtered_df))
+        except requests.exceptions.RequestException:
+            pass
+    market_price = filtered_df["ticker"].map(quotes).to_numpy(dtype=np.float64)
+    priced_df = greeks.price_chain(filtered_df, spot, market_price, get_historical_volatility(ticker))
+    priced_df.insert(priced_df.columns.get_loc("iv"), "market_price", market_price)
+    return priced_df
+
+
+def filter_options_chain(ticker, contract_type=None, max_days=30, strike_pct=0.10):
+    """
+    Chatbot tool: summarize contracts near the money expiring within a window.
+
+    Args:
+        ticker (str): Underlying stock symbol.
+        contract_type (str): "call", "put" or None for both.
+        max_days (int): Maximum days to expiration.
+        strike_pct (float): Strike band around spot (e.g., 0.10 for ±10%).
+
+    Returns:
+        str: Summary of matching contracts.
+    """
+    ticker = ticker.upper()
+    max_days = int(max_days)
+    strike_pct = float(strike_pct)
+    contract_type = contract_type.lower().rstrip("s") if contract_type else None
+    if contract_type not in (None, "call", "put"):
+        contract_type = None
+
+    spot = get_spot_price(ticker)
+    matches = get_chain_store(ticker).query(contract_type, 0, max_days, spot=spot, strike_pct=strike_pct)
+    kind = f"{contract_type}s" if contract_type else "contracts"
+    if matches.empty:
+        return f"No {kind} for {ticker} expire within {max_days} days with strikes within ±{strike_pct:.0%} of ${spot:.2f}."
+
+    by_expiry = matches.groupby("expiration_date").agg(
+        contracts=("ticker", "size"), min_strike=("strike_price", "min"), max_strike=("strike_price", "max")
+    )
+    lines = [
+        f"{pd.Timestamp(expiry):%Y-%m-%d}: {row.contracts} contracts, strikes ${row.min_strike:.2f}-${row.max_strike:.2f}"
+        for expiry, row in by_expiry.head(10).iterrows()
+    ]
+    return (f"{len(matches)} {ticker} {kind} expire within {max_days} days with strikes within ±{strike_pct:.0%} "
+            f"of spot ${spot:.2f}:\n" + "\n".join(lines))
+
+
+def analyze_options_strategy(ticker, strategy, strikes=None, days=30):
+    """
+    Chatbot tool: breakevens, max profit/loss and probability of profit for a multi-leg position.
+
+    Args:
+        ticker (str): Underlying stock symbol.
+        strategy (str): One of payoff.STRATEGY_TEMPLATES (e.g., "Iron Condor").
+        strikes (list): Strikes in the template's order; defaults to offsets from spot.
+        days (int): Days to expiration.
+
+    Returns:
+        str: Summary of the position's payoff profile.
+    """
+    ticker = ticker.upper()
+    names = {name.lower(): name for name in payoff.STRATEGY_TEMPLATES}
+    name = names.get(strategy.lower().replace("_", " "))
+    if name is None:
+        return f"Unsupported strategy {strategy}. Choose one of: {', '.join(payoff.STRATEGY_TEMPLATES)}."
+
+    spot = get_spot_price(ticker)
+    sigma = get_historical_volatility(ticker)
+    strikes = [float(k) for k in strikes] if strikes else None
+    if strikes and len(strikes) != len(payoff.STRATEGY_TEMPLATES[name]):
+        return f"{name} needs {len(payoff.STRATEGY_TEMPLATES[name])} strikes."
+    legs = payoff.build_strategy(name, spot, strikes, int(days), sigma)
+    analysis = payoff.analyze_position(legs, spot, sigma)
+    return payoff.describe_analysis(name, ticker, spot, legs, analysis) + f" (volatility {sigma:.1%}, premiums modeled)"
+
+
+@st.fragment
+def show_payoff_explorer(st):
+    """Displays the multi-leg payoff explorer for a watchlist symbol (reruns on its own)."""
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        ticker = st.selectbox("Underlying", st.session_state.watchlist, key="payoff_ticker")
+    with col2:
+        name = st.selectbox("Strategy", list(payoff.STRATEGY_TEMPLATES), key="payoff_strategy")
+    with col3:
+        days = st.number_input("Days to Expiration", min_value=1, value=30, key="payoff_days")
+
+    try:
+        spot = get_spot_price(ticker)
+    except ValueError as e:
+        st.warning(f"⚠️ {e}")
+        return
+    sigma = get_historical_volatility(ticker)
+    strike_cols = st.columns(len(payoff.STRATEGY_TEMPLATES[name]))
+    strikes = [
+        col.number_input(f"Strike {i + 1}", value=round(spot * pct, 2), key=f"payoff_strike_{name}_{i}")
+        for i, (col, pct) in enumerate(zip(strike_cols, payoff.STRATEGY_TEMPLATES[name]))
+    ]
+
+    legs = payoff.build_strategy(name, spot, strikes, days, sigma)
+    analysis = payoff.analyze_position(legs, spot, sigma)
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Max Profit", "Unlimited" if analysis["max_profit"] is None else f"${analysis['max_profit']:,.2f}")
+    col2.metric("Max Loss", "Unlimited" if analysis["max_loss"] is None else f"${analysis['max_loss']:,.2f}")
+    col3.metric("Breakevens", ", ".join(f"${b:.2f}" for b in analysis["breakevens"]) or "None")
+    col4.metric("Probability of Profit", f"{analysis['probability_of_profit']:.1%}")
+
+    fig = go.Figure()
+    for day, pnl in zip(analysis["days_elapsed"], analysis["pnl"]):
+        label = "Expiration" if day == analysis["days_elapsed"][-1] else f"Day {day:.0f}"
+        fig.add_trace(go.Scatter(x=analysis["prices"], y=pnl, mode="lines", name=label))
+    fig.add_hline(y=0, line_color="gray")
+    fig.add_vline(x=spot, line_dash="dash", line_color="black")
+    fig.update_layout(
+        title=f"{name} P&L on {ticker} (modeled at {sigma:.1%} volatility)",
+        xaxis_title="Underlying Price ($)",
+        yaxis_title="P&L ($)",
+        template="plotly_white",
+        height=400
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+
 # --- Show Options UI ---
 def show_options(st):
     """Displays the options watchlist and options chain data."""
@@ -54,8 +338,7 @@ def show_options(st):
         if st.button("➕ Add to Watchlist", key="add_stock"):
             add_to_watchlist(stock_input, st)
     with col2:
-        if st.button("🔄 Refresh Watchlist", key="refresh"):
-            st.rerun()
+        st.button("🔄 Refresh Watchlist", key="refresh")  # A click reruns the page
 
     # --- Display Watchlist ---
     st.subheader("📋 Your Watchlist")
@@ -65,18 +348,62 @@ def show_options(st):
             with col1:
                 st.write(f"🔹 {stock}")
             with col2:
-                if st.button(f"❌ Remove {stock}", key=f"remove_{stock}"):
-                    remove_from_watchlist(stock, st)
-                    st.rerun()
+                st.button(f"❌ Remove {stock}", key=f"remove_{stock}", on_click=remove_from_watchlist, args=(stock, st))
     else:
         st.info("Your watchlist is empty. Add stocks to track options.")
 
+    # --- Multi-leg Payoff ---
+    if st.session_state.watchlist:
+        with st.expander("🧮 Strategy Payoff", expanded=False):
+            show_payoff_explorer(st)
+
     # --- Fetch & Display Options Chain ---
+    show_options_chain(st)
+
+
+@st.fragment
+def show_options_chain(st):
+    """Displays the filtered chain for every watchlist symbol; filter changes rerun only this panel."""
     st.subheader("📊 Options Chain")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        contract_filter = st.selectbox("Contract Type", ["All", "Calls", "Puts"], key="options_contract_type")
+    with col2:
+        max_days = st.slider("Max Days to Expiration", 1, 730, 30, key="options_max_days")
+    with col3:
+        strike_pct = st.slider("Strike Range (± % of spot)", 1, 100, 10, key="options_strike_pct")
+    contract_type = {"Calls": "call", "Puts": "put"}.get(contract_filter)
+
+    chains = fetch_watchlist_chains(st.session_state.watchlist)
     for stock in st.session_state.watchlist:
         st.write(f"Options Chain for **{stock}**")
-        options_df = get_options_chain_polygon(stock, st)
-        if not options_df.empty:
-            st.dataframe(options_df)
+        options_df, error = chains[stock]
+        if error:
+            st.error(error)
+        elif not options_df.empty:
+            try:
+                spot = get_spot_price(stock)
+            except Exception:
+                spot = None
+            filtered_df = get_chain_store(stock).query(
+                contract_type, 0, max_days, spot=spot, strike_pct=strike_pct / 100 if spot else None
+            )
+            if spot:
+                filtered_df = add_greeks(filtered_df, stock, spot)
+            spot_text = f"spot ${spot:.2f}" if spot else "spot unavailable, strike filter and greeks off"
+            st.caption(f"{len(filtered_df)} of {len(options_df)} contracts ({spot_text})")
+            st.dataframe(
+                filtered_df,
+                hide_index=True,
+                column_config={
+                    "market_price": st.column_config.NumberColumn("Market", format="$%.2f"),
+                    "iv": st.column_config.NumberColumn("IV", format="%.3f"),
+                    "theo_price": st.column_config.NumberColumn("Theo", format="$%.2f"),
+                    "delta": st.column_config.NumberColumn("Delta", format="%.3f"),
+                    "gamma": st.column_config.NumberColumn("Gamma", format="%.4f"),
+                    "theta": st.column_config.NumberColumn("Theta/day", format="%.3f"),
+                    "vega": st.column_config.NumberColumn("Vega", format="%.3f"),
+                }
+            )
         else:
             st.warning(f"No options data available for {stock}.")
@@ -1,12 +1,58 @@
 import streamlit as st
 import pandas as pd
-import yfinance as yf
+import numpy as np
+import hashlib
+import json
+import os
+import pickle
+import threading
 from datetime import datetime, timedelta
 import pytz
+import config
+import sentiment_index
+import market_calendar
+import metrics
+import providers
+import resample
+import shared_cache
+import screen_dsl
+import screen_jobs
 
 # Set timezone to America/New_York
 ny_timezone = pytz.timezone("America/New_York")
 
+UNIVERSE_CACHE_TTL = 24 * 60 * 60  # Index constituents change rarely
+STOCK_DATA_CACHE_TTL = 6 * 60 * 60  # Base bars are keyed by their last session, so this only bounds revisions
+
+# Map timeframe to the yfinance interval of the base bars it is derived from. Daily, weekly
+# and monthly bars all come from one daily download, so switching between them is local.
+INTERVAL_MAP = {
+    "1 Hour": "1h",
+    "1 Day": "1d",
+    "1 Week": "1d",
+    "1 Month": "1d"
+}
+# Base downloads cover the smallest of these windows that fits the lookback, so nearby
+# lookbacks share one download (yfinance serves hourly bars for the last 730 days only)
+BASE_WINDOW_DAYS = (90, 365, 729)
+
+REVERSAL_SMA_SHORT = 8
+REVERSAL_SMA_LONG = 21
+REVERSAL_RSI_PERIOD = 14
+
+# Named screens written in the screen_dsl condition language
+SCREEN_PRESETS = {
+    "Volume Breakout": "close crosses_above sma(8) and rsi(14) > 30 and volume > 2 * avg_volume(20)",
+    "Golden Cross": "sma(50) crosses_above sma(200)",
+    "Oversold Bounce": "rsi(14) crosses_above 30",
+    "New 20-Bar High": "close > prev(highest(20, close))",
+}
+CUSTOM_CONDITION = "Custom Expression"
+JOB_POLL_INTERVAL = 1  # Seconds between progress refreshes of a running screen
+
+_screener_lock = threading.Lock()
+_screener_states = {}
+
 def apply_custom_css():
     """Apply custom CSS to ensure full-width layout and clean UI."""
     st.markdown("""
@@ -61,7 +107,7 @@ def apply_custom_css():
         </style>
     """, unsafe_allow_html=True)
 
-@st.cache_data
+@shared_cache.cached(ttl=UNIVERSE_CACHE_TTL)
 def fetch_stock_universe(category):
     """Fetch stock universe based on market cap category from Wikipedia or a proxy."""
     try:
@@ -95,135 +141,448 @@ def fetch_stock_universe(category):
         st.error(f"Error fetching stock universe for {category}: {str(e)}")
         return []
 
-@st.cache_data
-def fetch_stock_data(symbol, lookback_days, timeframe="1d"):
-    """Fetch historical stock data using yfinance for the specified lookback and timeframe."""
+def base_window_days(lookback_days):
+    """Calendar days of base bars to download for a lookback."""
+    return next((days for days in BASE_WINDOW_DAYS if days >= lookback_days), lookback_days)
+
+
+def is_derived(timeframe):
+    """True if a timeframe's bars are aggregated from a finer base interval."""
+    return resample.canonical_timeframe(INTERVAL_MAP.get(timeframe, "1d")) != resample.canonical_timeframe(timeframe)
+
+
+def download_bars(symbol, start, end, timeframe):
+    """Download base bars for a timeframe and aggregate them to it (empty if none)."""
+    df = providers.yf_history(symbol, start=start, end=end, interval=INTERVAL_MAP.get(timeframe, "1d"))
+    return resample.resample_ohlcv(df, timeframe) if is_derived(timeframe) else df
+
+
+@shared_cache.cached(ttl=STOCK_DATA_CACHE_TTL)
+def fetch_base_bars(symbol, window_days, interval, as_of):
+    """
+    Fetch base bars (yfinance interval) for `window_days` calendar days through the session
+    `as_of` (YYYY-MM-DD), shared across workers. Keying on the last session means cached
+    bars stay valid over nights, weekends and holidays.
+    """
     try:
-        end_date = datetime.now().date()
-        start_date = end_date - timedelta(days=lookback_days)
-        stock = yf.Ticker(symbol)
+        end_date = datetime.strptime(as_of, "%Y-%m-%d").date() + timedelta(days=1)
+        start_date = end_date - timedelta(days=window_days)
         start_ts = ny_timezone.localize(datetime.combine(start_date, datetime.min.time()))
         end_ts = ny_timezone.localize(datetime.combine(end_date, datetime.min.time()))
-        # Map timeframe to yfinance intervals
-        interval_map = {
-            "1 Hour": "1h",
-            "1 Day": "1d",
-            "1 Week": "1wk",
-            "1 Month": "1mo"
-        }
-        interval = interval_map.get(timeframe, "1d")  # Default to "1d" if timeframe not found
-        df = stock.history(start=start_ts, end=end_ts, interval=interval)
-        if df.empty:
-            #print(f"No data fetched for {symbol} with lookback {lookback_days} days and timeframe {timeframe}")
-            return None
-        #print(f"Fetched {len(df)} bars for {symbol} with lookback {lookback_days} days and timeframe {timeframe}")
-        return df
+        df = providers.yf_history(symbol, start=start_ts, end=end_ts, interval=interval)
+        return None if df.empty else df
     except Exception as e:
         print(f"Error fetching data for {symbol}: {str(e)}")
         return None
 
+
+def fetch_stock_data(symbol, lookback_days, timeframe="1 Day"):
+    """
+    Historical bars for the lookback and timeframe, derived locally from cached base bars.
+
+    Returns:
+        pd.DataFrame: OHLCV bars, or None if no data is available.
+    """
+    end_date = datetime.now(ny_timezone).date()
+    start_date = end_date - timedelta(days=lookback_days)
+    if not market_calendar.has_sessions(start_date, end_date):
+        return None  # Only weekends or holidays in the window
+    interval = INTERVAL_MAP.get(timeframe, "1d")  # Default to "1d" if timeframe not found
+    as_of = market_calendar.previous_session(end_date).strftime("%Y-%m-%d")
+    df = fetch_base_bars(symbol, base_window_days(lookback_days), interval, as_of)
+    if df is None:
+        return None
+    if is_derived(timeframe):
+        df = resample.resample_ohlcv(df, timeframe)
+    df = df[df.index >= ny_timezone.localize(datetime.combine(start_date, datetime.min.time()))]
+    return None if df.empty else df
+
+
+def reversal_crossovers(close):
+    """
+    Per-bar crossover flags for the reversal breakout.
+
+    Args:
+        close (pd.Series): Closing prices.
+
+    Returns:
+        pd.DataFrame: `buy_cross` (price crosses above the 8 SMA while the 8 SMA crosses above
+            the 21 SMA) and `sell_cross` (both cross below) for every bar.
+    """
+    sma_short = close.rolling(window=REVERSAL_SMA_SHORT).mean()
+    sma_long = close.rolling(window=REVERSAL_SMA_LONG).mean()
+    prev_close, prev_short, prev_long = close.shift(1), sma_short.shift(1), sma_long.shift(1)
+    return pd.DataFrame({
+        "buy_cross": (close > sma_short) & (prev_close <= prev_short) & (sma_short > sma_long) & (prev_short <= prev_long),
+        "sell_cross": (close < sma_short) & (prev_close >= prev_short) & (sma_short < sma_long) & (prev_short >= prev_long),
+    }, index=close.index)
+
+
+def latest_rsi(close):
+    """The last two values of the simple-average RSI (NaN when there are too few bars)."""
+    delta = close.iloc[-(REVERSAL_RSI_PERIOD + 2):].diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=REVERSAL_RSI_PERIOD).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=REVERSAL_RSI_PERIOD).mean()
+    rs = gain / loss.replace(0, 1e-10)  # Avoid division by zero
+    rsi = 100 - (100 / (1 + rs))
+    if len(rsi) < 2:
+        return float("nan"), float("nan")
+    return rsi.iloc[-1], rsi.iloc[-2]
+
+
+def first_reversal_signal(symbol, close, crossovers):
+    """
+    Find the first reversal breakout in a window from precomputed crossover flags.
+
+    The RSI filter uses the latest RSI and its direction, and the first `REVERSAL_SMA_LONG`
+    bars of the window are skipped because their long SMA crossover is not yet defined.
+    """
+    if len(close) < REVERSAL_SMA_LONG:
+        return None
+    current_rsi, previous_rsi = latest_rsi(close)
+    buy = crossovers["buy_cross"].to_numpy() & (current_rsi > 30) & (current_rsi > previous_rsi)
+    sell = crossovers["sell_cross"].to_numpy() & (current_rsi < 70) & (current_rsi < previous_rsi)
+    hits = np.flatnonzero((buy | sell)[REVERSAL_SMA_LONG:])
+    if hits.size == 0:
+        return None
+
+    idx = REVERSAL_SMA_LONG + hits[0]
+    return {
+        "symbol": symbol,
+        "signal_type": "Buy" if buy[idx] else "Sell",
+        "trend_found_date": close.index[idx].date(),
+        "price_at_trend_found": close.iloc[idx],
+        "current_price": close.iloc[-1]
+    }
+
+
 def calculate_reversal_breakout(symbol, df, timeframe="1d"):
     """Calculate reversal breakout metrics based on MA and RSI."""
-    # Adjust minimum required bars based on timeframe
-    sma_long_period = 21  # For 21-day SMA
-    if timeframe == "1 Hour":
-        # Estimate trading hours per day (e.g., 6.5 hours for US markets)
-        bars_per_day = 6.5
-        min_days = sma_long_period / bars_per_day
-        min_bars = sma_long_period
-    elif timeframe == "1 Day":
-        # Account for trading days (approx 252 trading days per year, so ~21 trading days for 30 calendar days)
-        min_bars = sma_long_period
-    elif timeframe == "1 Week":
-        min_bars = sma_long_period
-    elif timeframe == "1 Month":
-        min_bars = sma_long_period
+    if df is None or len(df) < REVERSAL_SMA_LONG:
+        return None
+    return first_reversal_signal(symbol, df["Close"], reversal_crossovers(df["Close"]))
+
+
+# --- Incremental Screening ---
+def _screener_state_file(lookback_days, timeframe):
+    params = [lookback_days, timeframe, REVERSAL_SMA_SHORT, REVERSAL_SMA_LONG, REVERSAL_RSI_PERIOD]
+    key = hashlib.sha1(json.dumps(params).encode()).hexdigest()[:16]
+    return config.cache_path("screener", f"reversal_{key}.pkl")
+
+
+def load_screener_state(lookback_days, timeframe):
+    """
+    Per-symbol screening state for one parameter set: the window's closes, their crossover
+    flags and the end date they were fetched through. A new parameter set starts empty,
+    which forces a full recompute.
+    """
+    path = _screener_state_file(lookback_days, timeframe)
+    with _screener_lock:
+        if path not in _screener_states:
+            try:
+                with open(path, "rb") as f:
+                    _screener_states[path] = pickle.load(f)
+            except (OSError, pickle.UnpicklingError, EOFError):
+                _screener_states[path] = {}
+        return _screener_states[path]
+
+
+def save_screener_state(lookback_days, timeframe):
+    """Persist a parameter set's screening state atomically."""
+    path = _screener_state_file(lookback_days, timeframe)
+    with _screener_lock:
+        state = dict(_screener_states.get(path, {}))
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+def clear_screener_state(lookback_days, timeframe):
+    """Drop a parameter set's screening state so the next run recomputes from scratch."""
+    path = _screener_state_file(lookback_days, timeframe)
+    with _screener_lock:
+        _screener_states.pop(path, None)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def update_symbol_state(symbol, entry, lookback_days, timeframe):
+    """
+    Bring one symbol's state up to date, fetching and processing only bars after the last run.
+
+    If the refetched overlap bar no longer matches the stored close (a split or dividend
+    adjusted the history), the whole window is recomputed.
+
+    Args:
+        symbol (str): Stock symbol.
+        entry (dict): Previous state ({"end", "bars"}) or None for a full fetch.
+        lookback_days (int): Lookback window in calendar days.
+        timeframe (str): Screener timeframe (e.g., "1 Day").
+
+    Returns:
+        dict: New state, or None if no data is available (the entry should be dropped).
+    """
+    end_date = datetime.now(ny_timezone).date()
+    start_date = end_date - timedelta(days=lookback_days)
+    end_ts = ny_timezone.localize(datetime.combine(end_date, datetime.min.time()))
+    if entry is not None and not market_calendar.has_sessions(entry["end"], end_ts):
+        return entry  # No session has closed since the last run
+
+    window_start = ny_timezone.localize(datetime.combine(start_date, datetime.min.time()))
+    if entry is None or entry["bars"].empty:
+        df = fetch_stock_data(symbol, lookback_days, timeframe)
+        if df is None:
+            return None
+        close = df["Close"]
+        bars = reversal_crossovers(close).assign(Close=close)
     else:
-        min_bars = sma_long_period  # Default
+        old = entry["bars"]
+        # Refetch from the last completed bar before the last processed one (which may have
+        # been revised since); that overlap bar must match what was stored
+        overlap = old.index[-2] if len(old) > 1 else old.index[-1]
+        new = download_bars(symbol, overlap, end_ts, timeframe)
+        if new.empty:
+            return None  # e.g., delisted
+        if new.index[0] != overlap or not np.isclose(new["Close"].iloc[0], old["Close"].loc[overlap], rtol=1e-6):
+            # A split or dividend re-adjusted history: recompute the whole window
+            close = download_bars(symbol, window_start, end_ts, timeframe)["Close"]
+            bars = reversal_crossovers(close).assign(Close=close)
+        else:
+            old = old[old.index < new.index[0]]
+            # Crossovers of new bars only need the previous long-SMA window of closes
+            close = pd.concat([old["Close"].iloc[-REVERSAL_SMA_LONG:], new["Close"]])
+            fresh = reversal_crossovers(close).assign(Close=close).iloc[len(close) - len(new):]
+            bars = pd.concat([old, fresh])
 
-    if df is None or len(df) < min_bars:
-        #print(f"Insufficient data for {symbol}: {len(df) if df is not None else 0} bars, need at least {min_bars}")
-        return None
+    bars = bars[bars.index >= window_start]
+    return {"end": end_ts, "bars": bars} if not bars.empty else None
 
-    # Calculate MAs
-    df["sma_8"] = df["Close"].rolling(window=8).mean()
-    df["sma_21"] = df["Close"].rolling(window=21).mean()
 
-    # Calculate RSI
-    delta = df["Close"].diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-    rs = gain / loss.replace(0, 1e-10)  # Avoid division by zero
-    rsi = 100 - (100 / (1 + rs))
+def screen_reversal_breakout(universe_symbols, lookback_days, timeframe):
+    """
+    Reversal breakout screen that reuses per-symbol state from previous runs.
+
+    Returns:
+        list: Signal dicts, as `calculate_reversal_breakout` returns them.
+    """
+    state = load_screener_state(lookback_days, timeframe)
+    strategy_data = []
+    for symbol in universe_symbols:
+        try:
+            entry = update_symbol_state(symbol, state.get(symbol), lookback_days, timeframe)
+        except Exception as e:
+            print(f"Error updating screener state for {symbol}: {str(e)}")
+            entry = None
+        with _screener_lock:
+            if entry is None:
+                state.pop(symbol, None)
+                continue
+            state[symbol] = entry
+        data = first_reversal_signal(symbol, entry["bars"]["Close"], entry["bars"])
+        if data:
+            strategy_data.append(data)
+    save_screener_state(lookback_days, timeframe)
+    return strategy_data
 
-    # Initialize variables
-    trend_found_date = None
-    price_at_trend_found = None
-    signal_type = None
-
-    # Iterate through the DataFrame to find the first signal
-    for idx in range(len(df)):
-        window_df = df.iloc[:idx + 1]
-        if len(window_df) < min_bars:
-            continue
-
-        current_price = window_df["Close"].iloc[-1]
-        sma_8 = window_df["sma_8"].iloc[-1]
-        sma_21 = window_df["sma_21"].iloc[-1]
-        current_rsi = rsi.iloc[-1] if idx > 0 else 0  # Ensure RSI is calculated
-
-        # Manual crossover implementation
-        price_cross_above_sma = (window_df["Close"].iloc[-1] > window_df["sma_8"].iloc[-1] and
-                                window_df["Close"].shift(1).iloc[-1] <= window_df["sma_8"].shift(1).iloc[-1]) if idx > 0 else False
-        sma_cross_above = (window_df["sma_8"].iloc[-1] > window_df["sma_21"].iloc[-1] and
-                          window_df["sma_8"].shift(1).iloc[-1] <= window_df["sma_21"].shift(1).iloc[-1]) if idx > 0 else False
-        rsi_above_30 = current_rsi > 30
-        rsi_increasing = (current_rsi > rsi.shift(1).iloc[-1]) if idx > 0 else False
-
-        buy_signal = price_cross_above_sma and sma_cross_above and rsi_above_30 and rsi_increasing
-
-        # Manual crossunder implementation
-        price_cross_below_sma = (window_df["Close"].iloc[-1] < window_df["sma_8"].iloc[-1] and
-                                window_df["Close"].shift(1).iloc[-1] >= window_df["sma_8"].shift(1).iloc[-1]) if idx > 0 else False
-        sma_cross_below = (window_df["sma_8"].iloc[-1] < window_df["sma_21"].iloc[-1] and
-                          window_df["sma_8"].shift(1).iloc[-1] >= window_df["sma_21"].shift(1).iloc[-1]) if idx > 0 else False
-        rsi_below_70 = current_rsi < 70
-        rsi_decreasing = (current_rsi < rsi.shift(1).iloc[-1]) if idx > 0 else False
-
-        sell_signal = price_cross_below_sma and sma_cross_below and rsi_below_70 and rsi_decreasing
-
-        # Check for first signal
-        if buy_signal or sell_signal:
-            trend_found_date = window_df.index[-1].date()
-            price_at_trend_found = current_price
-            signal_type = "Buy" if buy_signal else "Sell"
-            break
-
-    if trend_found_date is None:
-        #print(f"No signal found for {symbol} within the lookback period")
+def calculate_news_sentiment(symbol, df, lookback_days):
+    """Flag symbols whose relevance-weighted news sentiment over the lookback is bullish or bearish."""
+    if df is None or df.empty:
         return None
+    score = sentiment_index.window_sentiment(symbol, lookback_days)
+    if score is None or sentiment_index.BEARISH_THRESHOLD < score < sentiment_index.BULLISH_THRESHOLD:
+        return None
+
+    # Date the sentiment first leaned the same way within the lookback
+    trend = sentiment_index.sentiment_trend(symbol, lookback_days)
+    if score > 0:
+        leaning = trend[trend["weighted_score"] >= sentiment_index.BULLISH_THRESHOLD]
+    else:
+        leaning = trend[trend["weighted_score"] <= sentiment_index.BEARISH_THRESHOLD]
+    trend_found_date = leaning.index[0].date() if not leaning.empty else df.index[0].date()
 
+    closes_before = df["Close"][df.index.date <= trend_found_date]
     return {
         "symbol": symbol,
-        "signal_type": signal_type,
+        "signal_type": "Buy" if score > 0 else "Sell",
         "trend_found_date": trend_found_date,
-        "price_at_trend_found": price_at_trend_found,
+        "price_at_trend_found": closes_before.iloc[-1] if not closes_before.empty else df["Close"].iloc[0],
         "current_price": df["Close"].iloc[-1]
     }
 
-def screen_stocks(st, universe_symbols, lookback_days, timeframe):
-    """Screen stocks based on the reversal breakout strategy."""
-    st.write(f"**Reversal Breakout Strategy Overview:** This strategy identifies stocks experiencing a reversal breakout. A **Buy** signal occurs when the price crosses above the 8-day SMA, the 8-day SMA crosses above the 21-day SMA, and the RSI rises above 30 with an increasing trend. A **Sell** signal occurs when the price crosses below the 8-day SMA, the 8-day SMA crosses below the 21-day SMA, and the RSI drops below 70 with a decreasing trend. The analysis is performed over a {lookback_days}-day lookback period using a {timeframe} timeframe.")
+def screen_expression(universe_symbols, lookback_days, timeframe, expression):
+    """
+    Screen a universe with a condition-language expression in one vectorized pass.
+
+    Args:
+        universe_symbols (list): Stock symbols.
+        lookback_days (int): Lookback window in calendar days.
+        timeframe (str): Screener timeframe (e.g., "1 Day").
+        expression (str): Condition such as "rsi(14) crosses_above 30".
+
+    Returns:
+        list: Signal dicts for the first bar in the lookback where each symbol matched.
+
+    Raises:
+        screen_dsl.ScreenSyntaxError: If the expression is malformed.
+    """
+    tree = screen_dsl.parse(expression)
+    frames = {}
+    for symbol in universe_symbols:
+        df = fetch_stock_data(symbol, lookback_days, timeframe)
+        if df is not None:
+            frames[symbol] = df
+    if not frames:
+        return []
+
+    panel = screen_dsl.build_panel(frames)
+    condition = screen_dsl.evaluate(tree, panel)
+    matches = screen_dsl.first_matches(condition, panel["Close"], skip_bars=screen_dsl.lookback_bars(tree))
+    return [dict(match, signal_type="Buy") for match in matches]
+
 
+def screen_news_sentiment(universe_symbols, lookback_days, timeframe):
+    """Flag symbols whose news sentiment over the lookback is bullish or bearish."""
     strategy_data = []
+    for symbol in universe_symbols:
+        if sentiment_index.window_sentiment(symbol, lookback_days) is None:
+            continue  # Skip the price download for symbols without news coverage
+        data = calculate_news_sentiment(symbol, fetch_stock_data(symbol, lookback_days, timeframe), lookback_days)
+        if data:
+            strategy_data.append(data)
+    return strategy_data
+
+
+@metrics.instrumented
+def run_screen(universe_symbols, lookback_days, timeframe, condition="Reversal Breakout", expression=None):
+    """Screen symbols with the selected condition, without any UI (safe to call from worker threads)."""
+    if condition == "News Sentiment":
+        return screen_news_sentiment(universe_symbols, lookback_days, timeframe)
+    if condition in SCREEN_PRESETS or condition == CUSTOM_CONDITION:
+        return screen_expression(universe_symbols, lookback_days, timeframe, SCREEN_PRESETS.get(condition, expression))
+    return screen_reversal_breakout(universe_symbols, lookback_days, timeframe)
+
+
+def describe_condition(condition, lookback_days, timeframe, expression=None):
+    """Markdown overview of how a condition produces signals."""
+    if condition == "News Sentiment":
+        return f"**News Sentiment Overview:** This condition uses the locally collected Alpha Vantage news sentiment index. A **Buy** signal occurs when the relevance-weighted sentiment over the {lookback_days}-day lookback is bullish (≥ {sentiment_index.BULLISH_THRESHOLD}), and a **Sell** signal when it is bearish (≤ {sentiment_index.BEARISH_THRESHOLD}). Only tickers whose news has been fetched are covered."
+    if condition in SCREEN_PRESETS or condition == CUSTOM_CONDITION:
+        expression = SCREEN_PRESETS.get(condition, expression)
+        return f"**{condition} Overview:** A **Buy** signal is reported at the first bar in the {lookback_days}-day lookback where `{expression}` holds, using a {timeframe} timeframe."
+    return f"**Reversal Breakout Strategy Overview:** This strategy identifies stocks experiencing a reversal breakout. A **Buy** signal occurs when the price crosses above the 8-day SMA, the 8-day SMA crosses above the 21-day SMA, and the RSI rises above 30 with an increasing trend. A **Sell** signal occurs when the price crosses below the 8-day SMA, the 8-day SMA crosses below the 21-day SMA, and the RSI drops below 70 with a decreasing trend. The analysis is performed over a {lookback_days}-day lookback period using a {timeframe} timeframe."
+
+
+def screen_stocks(st, universe_symbols, lookback_days, timeframe, condition="Reversal Breakout", expression=None):
+    """Screen stocks based on the selected condition."""
+    st.write(describe_condition(condition, lookback_days, timeframe, expression))
     with st.spinner(f"🔄 Analyzing {len(universe_symbols)} stocks..."):
-        for symbol in universe_symbols:
-            df = fetch_stock_data(symbol, lookback_days, timeframe)
-            data = calculate_reversal_breakout(symbol, df, timeframe)
-            if data:
-                strategy_data.append(data)
+        try:
+            return run_screen(universe_symbols, lookback_days, timeframe, condition, expression)
+        except screen_dsl.ScreenSyntaxError as e:
+            st.error(f"❌ Invalid screening expression: {e}")
+            return []
+
+
+def submit_screen_job(stock_category, lookback_days, timeframe, condition, expression=None):
+    """Start a background screening job for a stock category."""
+    return screen_jobs.submit(
+        f"{condition} · {stock_category} · {timeframe} · {lookback_days}d",
+        {"category": stock_category, "lookback_days": lookback_days, "timeframe": timeframe,
+         "condition": condition, "expression": expression},
+        prepare=lambda: fetch_stock_universe(stock_category),
+        process_chunk=lambda symbols: run_screen(symbols, lookback_days, timeframe, condition, expression)
+    )
+
+
+@st.fragment(run_every=JOB_POLL_INTERVAL)
+def show_screen_job_progress(job_id):
+    """Live progress, partial results and a cancel button for a running job (reruns on its own)."""
+    job = screen_jobs.get_job(job_id)
+    if job is None:
+        return
+    if not job.active:
+        st.rerun()  # Render the finished results with the full page
+    snapshot = job.snapshot()
+    total = snapshot["total"] or 1
+    st.progress(
+        snapshot["completed"] / total,
+        text=f"🔄 {snapshot['label']}: {snapshot['completed']}/{snapshot['total']} symbols, "
+             f"{len(snapshot['results'])} matches ({snapshot['elapsed']:.0f}s)"
+    )
+    if st.button("✖ Cancel Screen", key=f"cancel_{job_id}"):
+        job.cancel()
+        st.info("Cancelling after the current batch...")
+    if snapshot["results"]:
+        partial_df = pd.DataFrame(snapshot["results"])
+        st.dataframe(partial_df[["symbol", "signal_type", "price_at_trend_found", "current_price", "trend_found_date"]],
+                     use_container_width=True, hide_index=True)
+
+
+def show_screen_results(st, strategy_data, condition):
+    """Displays the summary metrics and table for a finished screen."""
+    if not strategy_data:
+        st.error(f"No stocks meet the {condition.lower()} criteria.")
+        return
+
+    strategy_df = pd.DataFrame(strategy_data)
+    # Calculate profit percentage (adjusted for Sell signals)
+    strategy_df["profit_percent"] = strategy_df.apply(
+        lambda row: ((row["current_price"] - row["price_at_trend_found"]) / row["price_at_trend_found"] * 100
+                    if row["signal_type"] == "Buy"
+                    else (row["price_at_trend_found"] - row["current_price"]) / row["price_at_trend_found"] * 100),
+        axis=1
+    ).round(2)
+
+    # Calculate Summary Metrics
+    winners = len(strategy_df[strategy_df["profit_percent"] > 0])
+    losers = len(strategy_df[strategy_df["profit_percent"] < 0])
+    total_trades = len(strategy_df)
+    winning_percentage = (winners / total_trades * 100) if total_trades > 0 else 0
+    biggest_winner = strategy_df.loc[strategy_df["profit_percent"].idxmax()] if not strategy_df.empty else None
+    biggest_loser = strategy_df.loc[strategy_df["profit_percent"].idxmin()] if not strategy_df.empty else None
+
+    # Display Summary
+    st.subheader("📊 Screening Summary")
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Trades", f"{total_trades}")
+    with col2:
+        st.metric("% Winning", f"{winning_percentage:.2f}% ({winners}/{total_trades})")
+    with col3:
+        st.metric("Biggest Winner", f"{biggest_winner['symbol'] if biggest_winner is not None else 'N/A'} ({biggest_winner['profit_percent']:.2f}%)")
+    with col4:
+        st.metric("Biggest Loser", f"{biggest_loser['symbol'] if biggest_loser is not None else 'N/A'} ({biggest_loser['profit_percent']:.2f}%)")
+
+    # Stylish table with custom headers
+    st.subheader("📈 Screened Stocks")
+    styled_df = strategy_df[["symbol", "signal_type", "price_at_trend_found", "current_price", "profit_percent", "trend_found_date"]]
+    styled_df.columns = ["Stock", "Signal", "Entry", "Current", "Profit", "Date"]
+    styled_df = styled_df.style\
+        .set_properties(**{'text-align': 'center'})\
+        .set_table_styles([
+            {'selector': 'th',
+             'props': [('background-color', '#4CAF50'),
+                       ('color', 'white'),
+                       ('font-weight', 'bold'),
+                       ('text-align', 'center'),
+                       ('padding', '10px'),
+                       ('border-bottom', '2px solid #45a049')]},
+            {'selector': 'td',
+             'props': [('padding', '8px'),
+                       ('border-bottom', '1px solid #ddd')]},
+            {'selector': 'tr:hover',
+             'props': [('background-color', '#f5f5f5')]},
+        ])\
+        .apply(lambda row: ['color: #2e7d32; font-weight: bold;' if row["Profit"] > 0 else 'color: #d32f2f; font-weight: bold;' if row["Profit"] < 0 else ''], axis=1, subset=["Profit"])\
+        .format({
+            "Entry": lambda x: f"${x:.2f}",
+            "Current": lambda x: f"${x:.2f}",
+            "Profit": lambda x: f"{x:.2f}%" if pd.notna(x) else "N/A",
+            "Date": lambda x: x.strftime("%Y-%m-%d")
+        })
+    st.dataframe(styled_df, use_container_width=True, hide_index=True)
 
-    return strategy_data
 
 def show_screen(st):
     """Displays the stock screener UI in Streamlit."""
@@ -237,82 +596,61 @@ def show_screen(st):
     with col2:
         timeframe = st.selectbox("Time Frame", ["1 Hour", "1 Day", "1 Week", "1 Month"], index=1)  # Default to "1 Day"
     with col3:
-        condition = st.selectbox("Condition", ["Reversal Breakout"], index=0)  # Single condition for now
+        condition = st.selectbox(
+            "Condition", ["Reversal Breakout", "News Sentiment"] + list(SCREEN_PRESETS) + [CUSTOM_CONDITION], index=0
+        )
     with col4:
         lookback_days = st.selectbox("Lookback (days)", [1, 5, 30, 60, 90, 150, 300, 600], index=4)  # Default to 90
 
-    # Fetch stock universe dynamically (only on button click)
-    universe_symbols = []
-
-    # Screen button to trigger analysis
+    expression = None
+    if condition == CUSTOM_CONDITION:
+        expression = st.text_input(
+            "Expression", SCREEN_PRESETS["Volume Breakout"],
+            help="Fields: open, high, low, close, volume. Functions: sma, ema, rsi, avg_volume, highest, lowest, "
+                 "roc, prev. Operators: + - * /, > < >= <= == !=, crosses_above, crosses_below, and, or, not."
+        )
+    elif condition in SCREEN_PRESETS:
+        st.caption(f"`{SCREEN_PRESETS[condition]}`")
+
+    # Screening runs as a background job so this script (and the session) is never blocked
     if st.button("Screen"):
-        universe_symbols = fetch_stock_universe(stock_category)
-        if not universe_symbols:
-            st.error("Failed to fetch stock universe. Please try again.")
-            return
-
-        # Apply screening strategy
-        result = screen_stocks(st, universe_symbols, lookback_days, timeframe)
-        strategy_data = result if isinstance(result, list) else []
-
-        if not strategy_data:
-            st.error("No stocks meet the reversal breakout criteria.")
-            return
-
-        strategy_df = pd.DataFrame(strategy_data)
-        # Calculate profit percentage (adjusted for Sell signals)
-        strategy_df["profit_percent"] = strategy_df.apply(
-            lambda row: ((row["current_price"] - row["price_at_trend_found"]) / row["price_at_trend_found"] * 100
-                        if row["signal_type"] == "Buy"
-                        else (row["price_at_trend_found"] - row["current_price"]) / row["price_at_trend_found"] * 100),
-            axis=1
-        ).round(2)
-
-        # Calculate Summary Metrics
-        winners = len(strategy_df[strategy_df["profit_percent"] > 0])
-        losers = len(strategy_df[strategy_df["profit_percent"] < 0])
-        total_trades = len(strategy_df)
-        winning_percentage = (winners / total_trades * 100) if total_trades > 0 else 0
-        biggest_winner = strategy_df.loc[strategy_df["profit_percent"].idxmax()] if not strategy_df.empty else None
-        biggest_loser = strategy_df.loc[strategy_df["profit_percent"].idxmin()] if not strategy_df.empty else None
-
-        # Display Summary
-        st.subheader("📊 Screening Summary")
-        col1, col2, col3, col4 = st.columns(4)
-        with col1:
-            st.metric("Trades", f"{total_trades}")
-        with col2:
-            st.metric("% Winning", f"{winning_percentage:.2f}% ({winners}/{total_trades})")
-        with col3:
-            st.metric("Biggest Winner", f"{biggest_winner['symbol'] if biggest_winner is not None else 'N/A'} ({biggest_winner['profit_percent']:.2f}%)")
-        with col4:
-            st.metric("Biggest Loser", f"{biggest_loser['symbol'] if biggest_loser is not None else 'N/A'} ({biggest_loser['profit_percent']:.2f}%)")
-
-        # Stylish table with custom headers
-        st.subheader("📈 Screened Stocks")
-        styled_df = strategy_df[["symbol", "signal_type", "price_at_trend_found", "current_price", "profit_percent", "trend_found_date"]]
-        styled_df.columns = ["Stock", "Signal", "Entry", "Current", "Profit", "Date"]
-        styled_df = styled_df.style\
-            .set_properties(**{'text-align': 'center'})\
-            .set_table_styles([
-                {'selector': 'th',
-                 'props': [('background-color', '#4CAF50'),
-                           ('color', 'white'),
-                           ('font-weight', 'bold'),
-                           ('text-align', 'center'),
-                           ('padding', '10px'),
-                           ('border-bottom', '2px solid #45a049')]},
-                {'selector': 'td',
-                 'props': [('padding', '8px'),
-                           ('border-bottom', '1px solid #ddd')]},
-                {'selector': 'tr:hover',
-                 'props': [('background-color', '#f5f5f5')]},
-            ])\
-            .apply(lambda row: ['color: #2e7d32; font-weight: bold;' if row["Profit"] > 0 else 'color: #d32f2f; font-weight: bold;' if row["Profit"] < 0 else ''], axis=1, subset=["Profit"])\
-            .format({
-                "Entry": lambda x: f"${x:.2f}",
-                "Current": lambda x: f"${x:.2f}",
-                "Profit": lambda x: f"{x:.2f}%" if pd.notna(x) else "N/A",
-                "Date": lambda x: x.strftime("%Y-%m-%d")
-            })
-        st.dataframe(styled_df, use_container_width=True, hide_index=True)
\ No newline at end of file
+        if condition == CUSTOM_CONDITION:
+            try:
+                screen_dsl.parse(expression)
+            except screen_dsl.ScreenSyntaxError as e:
+                st.error(f"❌ Invalid screening expression: {e}")
+                return
+        job = submit_screen_job(stock_category, lookback_days, timeframe, condition, expression)
+        st.session_state.screen_job_id = job.id
+
+    recent_jobs = [job for job in screen_jobs.list_jobs() if not job.active]
+    if recent_jobs:
+        with st.expander("🕘 Recent Screens", expanded=False):
+            for recent in recent_jobs:
+                col1, col2 = st.columns([4, 1])
+                with col1:
+                    st.write(f"{recent.label} — {recent.status}, {len(recent.results)} matches "
+                             f"({datetime.fromtimestamp(recent.created_at).strftime('%H:%M:%S')})")
+                with col2:
+                    if st.button("Show", key=f"show_job_{recent.id}"):
+                        st.session_state.screen_job_id = recent.id
+
+    job = screen_jobs.get_job(st.session_state.get("screen_job_id"))
+    if job is None:
+        return
+    st.write(describe_condition(job.params["condition"], job.params["lookback_days"], job.params["timeframe"],
+                                job.params["expression"]))
+    if job.active:
+        show_screen_job_progress(job.id)
+        return
+
+    snapshot = job.snapshot()
+    if snapshot["status"] == screen_jobs.FAILED:
+        st.error(f"❌ Screening failed: {snapshot['error']}")
+        return
+    if snapshot["total"] == 0:
+        st.error("Failed to fetch stock universe. Please try again.")
+        return
+    if snapshot["status"] == screen_jobs.CANCELLED:
+        st.warning(f"⚠️ Screen cancelled after {snapshot['completed']}/{snapshot['total']} symbols; showing partial results.")
+    show_screen_results(st, snapshot["results"], job.params["condition"])
@@ -5,6 +5,7 @@ import paper
 import yfinance as yf
 from datetime import datetime, timedelta
 import helpers
+import sip
 import plotly.express as px  # For visualization
 import pandas as pd
 
@@ -34,36 +35,10 @@ def calculate_sip_roi(ticker, start, end, monthly):
     Calculates the SIP (Systematic Investment Plan) returns and formats the output correctly.
     """
     try:
-        # Convert start and end dates to datetime
-        start_date = datetime.strptime(start, "%Y-%m-%d")
-        end_date = datetime.strptime(end, "%Y-%m-%d")
-
-        # Calculate number of months invested
-        num_months = (end_date.year - start_date.year) * 12 + (end_date.month - start_date.month)
-
-        # Fetch historical stock data
-        data = yf.download(ticker, start, end)
-        if data.empty:
+        summary, _ = sip.compare_sip([ticker], [monthly], [start], end)
+        if summary.empty:
             return None, f"⚠️ No data found for {ticker} in the given period."
-
-        # Resample to monthly frequency
-        monthly_data = data.resample('MS').first()
-        monthly_closes = monthly_data['Close'].squeeze()
-        monthly_closes = pd.to_numeric(monthly_closes, errors='coerce')
-
-        total_investment = 0
-        shares_held = 0
-
-        # Simulate SIP investment over time
-        for _, close_price in zip(monthly_closes.index, monthly_closes):
-            total_investment += monthly
-            shares_bought = monthly / close_price
-            shares_held += shares_bought
-
-        # Get latest stock price
-        close_today = yf.Ticker(ticker).info.get("regularMarketPreviousClose", monthly_closes.iloc[-1])
-        final_value_today = shares_held * close_today
-        roi_percentage = ((final_value_today - total_investment) / total_investment) * 100
+        row = summary.iloc[0]
 
         # Create a properly structured DataFrame
         results_df = pd.DataFrame({
@@ -77,11 +52,11 @@ def calculate_sip_roi(ticker, start, end, monthly):
             ],
             "Value": [
                 ticker,
-                num_months,
-                f"${total_investment:,.2f}",
-                f"${final_value_today:,.2f}",
-                f"{roi_percentage:.2f}%",
-                f"${close_today:,.2f}"
+                int(row['months']),
+                f"${row['invested']:,.2f}",
+                f"${row['final_value']:,.2f}",
+                f"{row['roi']:.2f}%",
+                f"${row['last_investment_price']:,.2f}"
             ]
         })
 
@@ -109,9 +84,12 @@ def execute_paper_trade_callback():
     st.session_state.execute_paper_trade = True
 
 
+@st.fragment
 def rsi_strategy(st, stock_symbol, start_date, end_date, timeframe, num_stocks, stop_loss, profit_target):
     """
     Runs the RSI backtest strategy with user-configurable SL & Profit Target.
+
+    Runs as a fragment, so its widgets rerun only this panel.
     """
     st.write("This strategy Buys when RSI crosses over 40 and Sells when RSI hits 70")
 
@@ -133,11 +111,24 @@ def rsi_strategy(st, stock_symbol, start_date, end_date, timeframe, num_stocks,
 
     # ✅ **Execute logic based on which button was clicked**
     if st.session_state.get("run_backtest", False):
-        with st.spinner(f"🔄 Running Backtest for {stock_symbol}..."):
-            trades_summary_df, total_profit = backtest.run_backtest_rsi(
-                st,
-                stock_symbol, start_date.strftime("%Y-%m-%d"),
-                end_date.strftime("%Y-%m-%d"), params)
+        # Keep the last successful result while its inputs are unchanged, so unrelated reruns do
+        # not repeat the backtest; a failed run is not kept, so clicking again retries it
+        backtest_key = (stock_symbol, start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d"),
+                        tuple(sorted(params.items())))
+        if st.session_state.get("backtest_key") != backtest_key:
+            with st.spinner(f"🔄 Running Backtest for {stock_symbol}..."):
+                result = backtest.run_backtest_rsi(
+                    st,
+                    stock_symbol, start_date.strftime("%Y-%m-%d"),
+                    end_date.strftime("%Y-%m-%d"), params)
+            if result[0] is None:
+                st.session_state.pop("backtest_key", None)
+                st.session_state.pop("backtest_result", None)
+                st.error(f"❌ No data available to backtest {stock_symbol}.")
+                return
+            st.session_state.backtest_result = result
+            st.session_state.backtest_key = backtest_key
+        trades_summary_df, total_profit = st.session_state.backtest_result
         st.success("✅ Backtest Completed")
         # Total Profit
         st.markdown(f"### 💰 Total Profit: ${total_profit:.2f}")
@@ -196,6 +187,7 @@ def rsi_strategy(st, stock_symbol, start_date, end_date, timeframe, num_stocks,
         st.code(pine_script, language="pinescript")
 
     if st.session_state.get("execute_paper_trade", False):
+        st.session_state.execute_paper_trade = False  # Place the trade once per click, not on every rerun
         success, message = paper.execute_paper_trade(
             stock_symbol, timeframe, "RSI", params,
             backtest.run_backtest_rsi
@@ -205,22 +197,98 @@ def rsi_strategy(st, stock_symbol, start_date, end_date, timeframe, num_stocks,
         else:
             st.error(message)
 
+@st.fragment
 def show_sip_returns(st, stock_symbol, start_date, end_date):
-    """Displays the SIP Returns calculation with a table output."""
+    """Displays the SIP Returns calculation with a table output (reruns on its own)."""
     st.subheader("📊 SIP Returns Calculator")
     monthly_investment = st.number_input("Monthly Investment ($)", min_value=1, value=1000)
+    compare_symbols = st.text_input("Compare With (comma-separated, optional)", "", key="sip_compare")
 
     if st.button("📈 Calculate SIP Returns", key="calculate_sip"):
-        with st.spinner(f"🔄 Calculating SIP returns for {stock_symbol}..."):
-            results_df, error_message = calculate_sip_roi(
-                stock_symbol, start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d'), monthly_investment
-            )
+        tickers = [stock_symbol] + [t.strip().upper() for t in compare_symbols.split(",") if t.strip()]
+        if len(tickers) == 1:
+            with st.spinner(f"🔄 Calculating SIP returns for {stock_symbol}..."):
+                results_df, error_message = calculate_sip_roi(
+                    stock_symbol, start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d'), monthly_investment
+                )
+
+            if error_message:
+                st.error(error_message)
+            else:
+                st.subheader("📊 SIP Investment Summary")
+                st.table(results_df)  # ✅ Use st.table() for clean formatting
+            return
+
+        with st.spinner(f"🔄 Comparing SIP returns for {len(tickers)} symbols..."):
+            try:
+                summary, panel = sip.compare_sip(
+                    tickers, monthly_investment, start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d')
+                )
+            except Exception as e:
+                st.error(f"❌ Error calculating SIP returns: {e}")
+                return
+
+        st.subheader("📊 SIP Comparison")
+        st.dataframe(
+            summary[["ticker", "months", "invested", "final_value", "roi", "last_close"]].rename(columns={
+                "ticker": "Stock", "months": "Months", "invested": "Total Investment ($)",
+                "final_value": "Final Value ($)", "roi": "SIP Growth (%)", "last_close": "Last Close ($)"
+            }).style.format({
+                "Total Investment ($)": "${:,.2f}", "Final Value ($)": "${:,.2f}",
+                "SIP Growth (%)": "{:.2f}%", "Last Close ($)": "${:,.2f}"
+            }),
+            use_container_width=True,
+            hide_index=True
+        )
+        fig = px.line(panel, x="date", y="value", color="ticker", title="Portfolio Value Over Time")
+        st.plotly_chart(fig, use_container_width=True)
 
-        if error_message:
-            st.error(error_message)
-        else:
-            st.subheader("📊 SIP Investment Summary")
-            st.table(results_df)  # ✅ Use st.table() for clean formatting
+
+@st.fragment
+def show_dca_explorer(st, stock_symbol, start_date, end_date):
+    """Displays the CAGR distribution of SIP vs lump sum over every start month and buy day (reruns on its own)."""
+    st.subheader("🎲 DCA Scenario Explorer")
+    col1, col2 = st.columns(2)
+    with col1:
+        horizon_years = st.number_input("Holding Period (Years)", min_value=1, max_value=20, value=5, key="dca_years")
+    with col2:
+        days_of_month = st.multiselect("Buy Days of Month", list(range(1, 29)), default=[1, 8, 15, 22], key="dca_days")
+
+    if st.button("🎲 Explore Scenarios", key="explore_dca"):
+        if not days_of_month:
+            st.warning("⚠️ Please select at least one buy day.")
+            return
+        with st.spinner(f"🔄 Exploring DCA scenarios for {stock_symbol}..."):
+            try:
+                closes = sip.download_closes((stock_symbol.upper(),), start_date.strftime('%Y-%m-%d'))
+                results = sip.explore_dca(
+                    closes, horizon_years * 12, end=end_date.strftime('%Y-%m-%d'), days_of_month=days_of_month
+                )
+            except Exception as e:
+                st.error(f"❌ Error exploring DCA scenarios: {e}")
+                return
+
+        if results.empty:
+            st.warning(f"⚠️ The date range is shorter than {horizon_years} years for {stock_symbol}.")
+            return
+
+        summary = sip.summarize_dca(results, by=["strategy"])
+        st.dataframe(
+            summary.rename(columns={
+                "strategy": "Strategy", "scenarios": "Scenarios", "median_cagr": "Median CAGR (%)",
+                "worst_cagr": "Worst CAGR (%)", "best_cagr": "Best CAGR (%)", "win_rate": "Positive (%)"
+            }).style.format({
+                "Median CAGR (%)": "{:.2f}%", "Worst CAGR (%)": "{:.2f}%",
+                "Best CAGR (%)": "{:.2f}%", "Positive (%)": "{:.1f}%"
+            }),
+            use_container_width=True,
+            hide_index=True
+        )
+        by_start = results.groupby(["start", "strategy"], as_index=False)["cagr"].median()
+        fig = px.line(by_start, x="start", y="cagr", color="strategy",
+                      title=f"Median CAGR by Start Month ({horizon_years}-Year Holding)",
+                      labels={"start": "Start Month", "cagr": "CAGR (%)"})
+        st.plotly_chart(fig, use_container_width=True)
 
 
 def show_strategies(st):
@@ -253,3 +321,6 @@ def show_strategies(st):
 
     with st.expander("💰 SIP Returns Calculator", expanded=False):
         show_sip_returns(st, stock_symbol, start_date, end_date)
+
+    with st.expander("🎲 DCA Scenario Explorer", expanded=False):
+        show_dca_explorer(st, stock_symbol, start_date, end_date)
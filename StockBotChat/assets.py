@@ -0,0 +1,127 @@
+import alpaca_trade_api as tradeapi
+import json
+import os
+import random
+import threading
+import time
+from dotenv import load_dotenv
+
+import config
+import providers
+
+# Load API Keys
+load_dotenv()
+ALPACA_API_KEY = os.getenv("ALPACA_API_KEY")
+ALPACA_SECRET_KEY = os.getenv("ALPACA_SECRET_KEY")
+api = tradeapi.REST(ALPACA_API_KEY, ALPACA_SECRET_KEY, "https://paper-api.alpaca.markets", api_version="v2")
+
+ASSET_INDEX_FILE = config.cache_path("assets.json")
+ASSET_INDEX_MAX_AGE = 24 * 60 * 60  # Refresh the bulk listing once a day
+RETRY_BACKOFF = (5 * 60, 15 * 60)  # Seconds (min, max) before retrying a failed refresh
+
+_lock = threading.Lock()
+_index = {}
+_loaded_at = 0.0
+_retry_at = 0.0  # No refresh is attempted before this time after a failure
+
+
+def fetch_asset_listing():
+    """
+    Download the full US equity asset listing from Alpaca in one request.
+
+    Returns:
+        dict: Symbol -> {"tradable": bool, "active": bool}.
+    """
+    return {
+        asset["symbol"]: {"tradable": asset["tradable"], "active": asset["status"] == "active"}
+        for asset in providers.alpaca_assets(api, asset_class="us_equity")
+    }
+
+
+def _read_index_file():
+    """Return (fetched_at, index) from disk, or (0, {}) if there is no usable copy."""
+    try:
+        with open(ASSET_INDEX_FILE) as f:
+            data = json.load(f)
+        return data["fetched_at"], data["assets"]
+    except (OSError, ValueError, KeyError):
+        return 0.0, {}
+
+
+def _write_index_file(fetched_at, index):
+    """Persist the index atomically so concurrent processes never read a partial file."""
+    tmp_path = f"{ASSET_INDEX_FILE}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"fetched_at": fetched_at, "assets": index}, f)
+    os.replace(tmp_path, ASSET_INDEX_FILE)
+
+
+def _is_stale(loaded_at):
+    return time.time() - loaded_at >= ASSET_INDEX_MAX_AGE
+
+
+def get_asset_index(force_refresh=False):
+    """
+    Return the in-memory asset index, loading it from disk or Alpaca when needed.
+
+    The index is shared by every caller in the process. The on-disk copy is shared by
+    every process and reused until it is a day old; if the refresh fails, the stale copy
+    keeps serving lookups and the next attempt waits 5-15 minutes.
+
+    Args:
+        force_refresh (bool): Re-download the listing even if the cached copy is fresh.
+
+    Returns:
+        dict: Symbol -> {"tradable": bool, "active": bool}.
+    """
+    global _index, _loaded_at, _retry_at
+    if not force_refresh and _index and (not _is_stale(_loaded_at) or time.time() < _retry_at):
+        return _index
+
+    with _lock:
+        if not force_refresh and _index and (not _is_stale(_loaded_at) or time.time() < _retry_at):
+            return _index
+
+        fetched_at, index = _read_index_file()
+        if force_refresh or not index or _is_stale(fetched_at):
+            try:
+                index = fetch_asset_listing()
+                fetched_at = time.time()
+                _write_index_file(fetched_at, index)
+            except Exception as e:
+                if not index:
+                    raise
+                _retry_at = time.time() + random.uniform(*RETRY_BACKOFF)
+                print(f"⚠️ Asset listing refresh failed, serving the copy from {time.ctime(fetched_at)}: {e}")
+
+        _index, _loaded_at = index, fetched_at
+        return _index
+
+
+def lookup_asset(symbol):
+    """
+    Look up a symbol in the asset index.
+
+    Yahoo-style class shares (e.g., "BRK-B") are matched to Alpaca's "BRK.B". While the
+    index is stale (its refresh failed), a symbol missing from it is checked with a single
+    asset request before it is reported unknown, so new listings are not rejected.
+
+    Args:
+        symbol (str): Stock symbol (e.g., "NVDA").
+
+    Returns:
+        dict: {"tradable": bool, "active": bool}, or None if the symbol is unknown.
+    """
+    index = get_asset_index()
+    symbol = symbol.upper()
+    asset = index.get(symbol) or index.get(symbol.replace("-", "."))
+    if asset is not None or not _is_stale(_loaded_at):
+        return asset
+
+    listing = providers.alpaca_asset(api, symbol.replace("-", "."))
+    if listing is None:
+        return None
+    asset = {"tradable": listing["tradable"], "active": listing["status"] == "active"}
+    with _lock:
+        index[listing["symbol"]] = asset  # Kept until the index is replaced by a refresh
+    return asset
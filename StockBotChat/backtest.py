@@ -3,7 +3,13 @@ import pandas as pd
 import alpaca_trade_api as tradeapi
 import os
 from dotenv import load_dotenv
-from datetime import datetime, timedelta
+from datetime import datetime
+
+import market_calendar
+import metrics
+import providers
+import resample
+import shared_cache
 
 
 # Load API Keys
@@ -12,6 +18,17 @@ ALPACA_API_KEY = os.getenv("ALPACA_API_KEY")
 ALPACA_SECRET_KEY = os.getenv("ALPACA_SECRET_KEY")
 api = tradeapi.REST(ALPACA_API_KEY, ALPACA_SECRET_KEY, "https://paper-api.alpaca.markets", api_version="v2")
 
+BARS_CACHE_TTL = 15 * 60  # Seconds downloaded base bars are shared across workers
+
+# Alpaca timeframe of the base bars each backtest timeframe is derived from. Intraday
+# timeframes share one 5-minute download, so switching between them is a local computation.
+BASE_TIMEFRAME = {
+    "1D": "1D",
+    "1H": "5Min",
+    "15Min": "5Min",
+    "5Min": "5Min"
+}
+
 
 def normalize_timeframe(timeframe):
     """
@@ -26,9 +43,35 @@ def normalize_timeframe(timeframe):
     return timeframe_map.get(timeframe, "1D")  # Default to "1D" if invalid
 
 
+@shared_cache.cached(ttl=BARS_CACHE_TTL)
+def fetch_base_bars(symbol, start, end, timeframe):
+    """
+    Download OHLCV bars from Alpaca for a date range.
+
+    Args:
+        symbol (str): Stock symbol.
+        start (str): First date (YYYY-MM-DD).
+        end (str): Last date (YYYY-MM-DD).
+        timeframe (str): Alpaca timeframe (e.g., "1D", "5Min").
+
+    Returns:
+        pd.DataFrame: open/high/low/close/volume bars, or None if there are none.
+    """
+    bars = providers.alpaca_bars(api, symbol, timeframe, start=start, end=end, limit=None)
+    if bars.empty:
+        return None
+
+    df = bars[["open", "high", "low", "close", "volume"]].copy()
+    df.index = pd.to_datetime(df.index)
+    df.index.name = "datetime"
+    return df
+
+
 def fetch_historical_data(st, symbol, start, end, timeframe):
     """
     Fetches historical stock data from Alpaca API.
+
+    Intraday timeframes are aggregated locally from 5-minute bars of the regular session.
     """
     try:
         normalized_timeframe = normalize_timeframe(timeframe)
@@ -36,23 +79,16 @@ def fetch_historical_data(st, symbol, start, end, timeframe):
         start_date = datetime.strptime(start, "%Y-%m-%d")
         end_date = datetime.strptime(end, "%Y-%m-%d")
         if end_date > datetime.now():
-            end_date = datetime.now() - timedelta(days=1)
+            end_date = market_calendar.previous_session(datetime.now()).to_pydatetime()
+        if not market_calendar.has_sessions(start_date, end_date):
+            return None  # No trading sessions in the range
 
-        bars = api.get_bars(symbol, normalized_timeframe, start=start_date.strftime("%Y-%m-%d"), end=end_date.strftime("%Y-%m-%d"), limit=None)
-
-        if not bars:
+        df = fetch_base_bars(symbol, start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d"),
+                             BASE_TIMEFRAME[normalized_timeframe])
+        if df is None:
             return None
-
-        df = pd.DataFrame({
-            "datetime": [b.t for b in bars],
-            "open": [b.o for b in bars],
-            "high": [b.h for b in bars],
-            "low": [b.l for b in bars],
-            "close": [b.c for b in bars],
-            "volume": [b.v for b in bars]
-        })
-        df["datetime"] = pd.to_datetime(df["datetime"])
-        df.set_index("datetime", inplace=True)
+        if resample.is_intraday(normalized_timeframe):
+            df = resample.resample_ohlcv(df, normalized_timeframe)
 
         return df
 
@@ -120,6 +156,7 @@ class RSIStrategy(bt.Strategy):
         self.prev_rsi = self.rsi[0]
 
 
+@metrics.instrumented
 def run_backtest_rsi(st, symbol, start_date, end_date, params):
     """
     Runs the RSI backtest and returns trade results.
@@ -0,0 +1,144 @@
+import functools
+import zlib
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+import providers
+
+ny_timezone = "America/New_York"
+
+# Bars per regular session for intraday intervals (09:30-16:00 New York time)
+SESSION_MINUTES = {"5Min": 5, "15Min": 15, "1H": 60, "1h": 60, "1Hour": 60}
+
+
+def trading_index(start, end, interval="1d"):
+    """
+    Bar open times between two dates, New York time, weekdays only.
+
+    Args:
+        start (datetime or str): First day.
+        end (datetime or str): Day after the last bar (exclusive, like yfinance).
+        interval (str): "1d"/"1D"/"1Day" or an intraday interval from SESSION_MINUTES.
+
+    Returns:
+        pd.DatetimeIndex: Timezone-aware bar timestamps.
+    """
+    start = pd.Timestamp(start).tz_localize(None).normalize()
+    end = pd.Timestamp(end).tz_localize(None).normalize()
+    days = pd.bdate_range(start, end - timedelta(days=1))
+    if interval not in SESSION_MINUTES:
+        return days.tz_localize(ny_timezone)
+    step = SESSION_MINUTES[interval]
+    offsets = pd.to_timedelta(np.arange(9 * 60 + 30, 16 * 60, step), unit="min")
+    return pd.DatetimeIndex((days.values[:, None] + offsets.values[None, :]).ravel()).tz_localize(ny_timezone)
+
+
+# Daily closes are drawn once per symbol over a fixed calendar, so overlapping requests
+# (a full window and a later incremental fetch) always see the same prices.
+CALENDAR = pd.bdate_range("2000-01-03", "2030-12-31")
+
+
+@functools.lru_cache(maxsize=4096)
+def _daily_closes(symbol):
+    rng = np.random.default_rng(zlib.crc32(symbol.encode()))
+    return 20 + rng.uniform(0, 480) * np.exp(np.cumsum(rng.normal(0.0003, 0.015, len(CALENDAR))))
+
+
+def _hash_uniform(seed, keys):
+    """Uniform [0, 1) values derived from integer keys (splitmix64), independent of request shape."""
+    x = keys.astype(np.uint64) + np.uint64((seed * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF)
+    x ^= x >> np.uint64(30)
+    x *= np.uint64(0xBF58476D1CE4E5B9)
+    x ^= x >> np.uint64(27)
+    x *= np.uint64(0x94D049BB133111EB)
+    x ^= x >> np.uint64(31)
+    return (x >> np.uint64(11)).astype(np.float64) / 2 ** 53
+
+
+def synthetic_ohlcv(symbol, index):
+    """
+    Deterministic random-walk OHLCV bars for a symbol: the same symbol and timestamp always
+    get the same bar, whatever range is requested.
+
+    Returns:
+        pd.DataFrame: Open, High, Low, Close and Volume columns on `index`.
+    """
+    daily = _daily_closes(symbol)
+    local = index.tz_convert(ny_timezone) if index.tz is not None else index
+    days = local.tz_localize(None).normalize() if local.tz is not None else local.normalize()
+    day_pos = np.clip(CALENDAR.searchsorted(days), 1, len(CALENDAR) - 1)
+    # Intraday bars move from the previous close toward the day's close through the session
+    minutes = (local.hour * 60 + local.minute).to_numpy()
+    fraction = np.where(minutes == 0, 1.0, np.clip((minutes - 9 * 60 - 30) / 390, 0, 1))
+    close = daily[day_pos - 1] * (daily[day_pos] / daily[day_pos - 1]) ** fraction
+
+    seed = zlib.crc32(symbol.encode())
+    keys = index.asi8 if index.tz is None else index.tz_convert("UTC").asi8
+    noise = _hash_uniform(seed, keys) - 0.5
+    close = close * (1 + 0.004 * noise * (fraction < 1))
+    open_ = close * (1 + 0.004 * (_hash_uniform(seed + 1, keys) - 0.5))
+    spread = 0.006 * _hash_uniform(seed + 2, keys) * close
+    return pd.DataFrame({
+        "Open": open_,
+        "High": np.maximum(open_, close) + spread,
+        "Low": np.minimum(open_, close) - spread,
+        "Close": close,
+        "Volume": (100_000 + 4_900_000 * _hash_uniform(seed + 3, keys)).astype(np.int64),
+    }, index=index)
+
+
+def _yf_history(request):
+    end = request.get("end") or datetime.now()
+    start = request.get("start") or (pd.Timestamp(end) - timedelta(days=365))
+    bars = synthetic_ohlcv(request["ticker"], trading_index(start, end, request.get("interval", "1d")))
+    bars["Dividends"] = 0.0
+    bars["Stock Splits"] = 0.0
+    bars.index.name = "Date"
+    return bars
+
+
+def _yf_download(request):
+    tickers = request["tickers"]
+    tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+    index = trading_index(request["start"], request.get("end") or datetime.now()).tz_localize(None)
+    frames = {ticker: synthetic_ohlcv(ticker, index) for ticker in tickers}
+    data = pd.concat(frames, axis=1).swaplevel(axis=1).sort_index(axis=1)
+    data.columns.names = ["Price", "Ticker"]
+    data.index.name = "Date"
+    return data
+
+
+def _alpaca_bars(request):
+    symbols = request["symbol"]
+    symbols = [symbols] if isinstance(symbols, str) else list(symbols)
+    end = pd.Timestamp(request["end"]).tz_localize(None) + timedelta(days=1)
+    index = trading_index(request["start"], end, request["timeframe"]).tz_convert("UTC")
+    frames = []
+    for symbol in symbols:
+        bars = synthetic_ohlcv(symbol, index).rename(columns=str.lower)
+        bars["trade_count"] = bars["volume"] // 100
+        bars["vwap"] = (bars["high"] + bars["low"] + bars["close"]) / 3
+        if len(symbols) > 1:
+            bars["symbol"] = symbol
+        frames.append(bars)
+    data = pd.concat(frames)
+    data.index.name = "timestamp"
+    return data
+
+
+def synthetic_provider(service, operation, request):
+    """Replay fallback that answers market-data requests with synthetic bars."""
+    if (service, operation) == ("yfinance", "history"):
+        return _yf_history(request)
+    if (service, operation) == ("yfinance", "download"):
+        return _yf_download(request)
+    if (service, operation) == ("alpaca", "bars"):
+        return _alpaca_bars(request)
+    raise providers.ReplayMissError(f"No synthetic fixture for {service}.{operation}")
+
+
+def install(latency=0):
+    """Serve every provider request from synthetic fixtures (and any recorded archive)."""
+    providers.configure(mode="replay", latency=latency, fallback=synthetic_provider)
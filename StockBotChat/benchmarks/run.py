@@ -0,0 +1,199 @@
+"""
+Offline benchmarks for the compute hot paths.
+
+Every data request is answered by synthetic OHLCV fixtures through the provider layer's
+replay mode, so runs are reproducible and need no network or API keys.
+
+    python benchmarks/run.py                        # run and write benchmarks/results/latest.json
+    python benchmarks/run.py --save-baseline        # also store the result as the baseline
+                                                    # (benchmarks/baseline.json is committed)
+    python benchmarks/run.py --only screen --symbols 100
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+
+# Clients are constructed at import time but never used offline
+os.environ.setdefault("ALPACA_API_KEY", "benchmark")
+os.environ.setdefault("ALPACA_SECRET_KEY", "benchmark")
+os.environ.setdefault("STOCKBOT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "stockbot-benchmarks"))
+
+import streamlit as st  # noqa: E402
+
+import fixtures  # noqa: E402
+import backtest  # noqa: E402
+import Chatbot  # noqa: E402
+import sip  # noqa: E402
+import StockScreener  # noqa: E402
+import Strategies  # noqa: E402
+
+RESULTS_FILE = os.path.join(BENCHMARK_DIR, "results", "latest.json")
+BASELINE_FILE = os.path.join(BENCHMARK_DIR, "baseline.json")
+DEFAULT_TOLERANCE = 0.25  # Allowed fractional slowdown (or memory growth) before a run fails
+
+RSI_PARAMS = {"rsi_period": 14, "qty": 100, "stop_loss": 0.10, "profit_target": 0.30}
+
+
+def bench_reversal_breakout():
+    bars = fixtures.synthetic_ohlcv("BENCH", fixtures.trading_index("2024-01-01", "2025-01-01"))
+    return lambda: StockScreener.calculate_reversal_breakout("BENCH", bars.copy(), "1 Day")
+
+
+def bench_screen_stocks(symbols, incremental=False):
+    universe = [f"SYM{i:03d}" for i in range(symbols)]
+    if incremental:
+        StockScreener.screen_stocks(st, universe, 365, "1 Day")  # Warm the per-symbol state
+
+    def run():
+        if not incremental:
+            StockScreener.fetch_base_bars.clear()
+            StockScreener.clear_screener_state(365, "1 Day")
+        StockScreener.screen_stocks(st, universe, 365, "1 Day")
+    return run
+
+
+def bench_backtest(timeframe, start, end):
+    params = dict(RSI_PARAMS, timeframe=timeframe)
+
+    def run():
+        backtest.fetch_base_bars.clear()
+        backtest.run_backtest_rsi(st, "BENCH", start, end, params)
+    return run
+
+
+def bench_sip_roi():
+    def run():
+        sip.download_closes.clear()
+        Strategies.calculate_sip_roi("BENCH", "2015-01-01", "2025-01-01", 1000)
+    return run
+
+
+def bench_chatbot_indicators():
+    def run():
+        Chatbot.get_stock_price("BENCH")
+        Chatbot.calculate_SMA("BENCH", 50)
+        Chatbot.calculate_EMA("BENCH", 20)
+        Chatbot.calculate_RSI("BENCH")
+        Chatbot.calculate_MACD("BENCH")
+    return run
+
+
+def build_benchmarks(symbols):
+    """Name -> (factory, repeats); factories build fixtures outside the timed region."""
+    return {
+        "reversal_breakout": (bench_reversal_breakout, 5),
+        f"screen_stocks_{symbols}": (lambda: bench_screen_stocks(symbols), 1),
+        f"rescreen_stocks_{symbols}": (lambda: bench_screen_stocks(symbols, incremental=True), 3),
+        "backtest_rsi_1day": (lambda: bench_backtest("1Day", "2020-01-01", "2025-01-01"), 3),
+        "backtest_rsi_5min": (lambda: bench_backtest("5Min", "2024-07-01", "2025-01-01"), 1),
+        "sip_roi": (bench_sip_roi, 5),
+        "chatbot_indicators": (bench_chatbot_indicators, 5),
+    }
+
+
+def measure(func, repeats):
+    """Time `func` `repeats` times, then run it once more under tracemalloc for the memory peak."""
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "repeats": repeats,
+        "min_s": min(timings),
+        "median_s": statistics.median(timings),
+        "mean_s": statistics.fmean(timings),
+        "peak_mib": peak / 2 ** 20,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compare a run against a baseline.
+
+    Returns:
+        list: (benchmark, metric, baseline value, current value, ratio) for every regression.
+    """
+    regressions = []
+    for name, current in results["benchmarks"].items():
+        previous = baseline.get("benchmarks", {}).get(name)
+        if not previous:
+            continue
+        for metric in ("median_s", "peak_mib"):
+            ratio = current[metric] / previous[metric] if previous[metric] else 1.0
+            if ratio > 1 + tolerance:
+                regressions.append((name, metric, previous[metric], current[metric], ratio))
+    return regressions
+
+
+def write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run offline benchmarks against synthetic market data.")
+    parser.add_argument("--only", nargs="*", help="Run benchmarks whose name contains any of these strings")
+    parser.add_argument("--symbols", type=int, default=500, help="Universe size for the screener benchmark")
+    parser.add_argument("--output", default=RESULTS_FILE, help="Where to write the JSON results")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="Baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed fractional regression before failing (0.25 = 25%%)")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the new baseline")
+    parser.add_argument("--allow-missing-baseline", action="store_true",
+                        help="Exit successfully when there is no baseline to compare against")
+    args = parser.parse_args()
+
+    fixtures.install()
+    results = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.platform(),
+        "benchmarks": {},
+    }
+    for name, (factory, repeats) in build_benchmarks(args.symbols).items():
+        if args.only and not any(part in name for part in args.only):
+            continue
+        results["benchmarks"][name] = stats = measure(factory(), repeats)
+        print(f"{name:<24} median {stats['median_s'] * 1000:10.1f} ms   min {stats['min_s'] * 1000:10.1f} ms"
+              f"   peak {stats['peak_mib']:8.1f} MiB")
+
+    write_json(args.output, results)
+    print(f"Results written to {args.output}")
+    if args.save_baseline:
+        write_json(args.baseline, results)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"❌ No baseline at {args.baseline}; run with --save-baseline to create one "
+              f"(or pass --allow-missing-baseline).")
+        return 0 if args.allow_missing_baseline else 2
+    with open(args.baseline) as f:
+        regressions = compare(results, json.load(f), args.tolerance)
+    for name, metric, previous, current, ratio in regressions:
+        print(f"❌ REGRESSION {name} {metric}: {previous:.4g} -> {current:.4g} ({ratio:.2f}x)")
+    if regressions:
+        return 1
+    print("✅ No regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,25 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Local on-disk state (scheduler runs, indexes, caches) lives here unless overridden
+CACHE_DIR = os.getenv(
+    "STOCKBOT_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+)
+
+
+def cache_path(*parts):
+    """
+    Build a path under CACHE_DIR and make sure its parent directory exists.
+
+    Args:
+        *parts (str): Path components relative to the cache directory (e.g., "scheduler", "runs.jsonl").
+
+    Returns:
+        str: Absolute path inside the cache directory.
+    """
+    path = os.path.join(CACHE_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
@@ -0,0 +1,112 @@
+"""
+Hidden diagnostics tab (open the app with `?tab=diagnostics`): where time goes across
+external services, hot functions and caches, for every process on this host.
+"""
+from datetime import datetime
+
+import pandas as pd
+import plotly.graph_objects as go
+
+import http_client
+import metrics
+import screen_jobs
+import shared_cache
+import tracing
+
+
+def _table(st, rows, empty_message):
+    if rows:
+        st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+    else:
+        st.caption(empty_message)
+
+
+def trace_waterfall(trace):
+    """
+    Waterfall chart of a trace: one bar per span, placed at its start and as long as it ran.
+
+    Returns:
+        go.Figure: Spans top to bottom in start order, indented by nesting depth.
+    """
+    depths = tracing.span_depths(trace)
+    spans = trace["spans"]
+    labels = [f"{'· ' * depths[span['id']]}{span['name']} #{span['id']}" for span in spans]
+    fig = go.Figure(go.Bar(
+        y=labels,
+        x=[span["duration"] * 1000 for span in spans],
+        base=[span["start"] * 1000 for span in spans],
+        orientation="h",
+        marker_color=["#E74C3C" if span["error"] else "#4A90E2" for span in spans],
+        customdata=[[span["thread"], span["error"] or "", str(span["attributes"])] for span in spans],
+        hovertemplate="%{y}<br>start %{base:.1f} ms, %{x:.1f} ms<br>thread %{customdata[0]}"
+                      "<br>%{customdata[2]}<br>%{customdata[1]}<extra></extra>",
+    ))
+    fig.update_layout(
+        height=max(200, 28 * len(spans) + 80), margin=dict(l=10, r=10, t=30, b=30),
+        xaxis_title="ms since the message arrived", yaxis=dict(autorange="reversed"),
+    )
+    return fig
+
+
+def show_traces(st):
+    """Recent sampled traces with a waterfall of the selected one."""
+    st.subheader("🧵 Chat Traces")
+    st.caption(f"Every trace of {tracing.SLOW_TRACE_SECONDS:g}s or more and every failed one is kept, "
+               f"plus {tracing.SAMPLE_RATE:.0%} of the rest (last {tracing.BUFFER_SIZE} per process).")
+    traces = tracing.recent_traces()
+    if not traces:
+        st.caption("No traces recorded yet.")
+        return
+    slow_only = st.checkbox(f"Only slow traces (≥ {tracing.SLOW_TRACE_SECONDS:g}s)")
+    if slow_only:
+        traces = [trace for trace in traces if trace["duration"] >= tracing.SLOW_TRACE_SECONDS]
+    if not traces:
+        st.caption("No slow traces recorded.")
+        return
+    options = {
+        f"{datetime.fromtimestamp(trace['started_at']):%Y-%m-%d %H:%M:%S} · {trace['name']} · "
+        f"{trace['duration']:.2f}s{' · ❌' if trace['error'] else ''} · {trace['id']}": trace
+        for trace in traces
+    }
+    trace = options[st.selectbox("Trace", list(options))]
+    if trace["error"]:
+        st.error(trace["error"])
+    if trace["dropped"]:
+        st.warning(f"⚠️ {trace['dropped']} spans beyond the {tracing.MAX_SPANS}-span limit were not recorded.")
+    st.plotly_chart(trace_waterfall(trace), use_container_width=True)
+
+
+def show_diagnostics(st):
+    """Render latency, error and cache tables from the merged metrics of all processes."""
+    st.title("🩺 Diagnostics")
+    st.button("🔄 Refresh")
+    series = metrics.collect()
+
+    st.subheader("🌐 External Calls")
+    _table(st, metrics.latency_table("stockbot_external_call_seconds", "stockbot_external_call_errors_total", series),
+           "No external calls recorded yet.")
+
+    st.subheader("⏱️ Hot Functions")
+    _table(st, metrics.latency_table("stockbot_function_seconds", "stockbot_function_errors_total", series),
+           "No instrumented function has run yet.")
+
+    st.subheader("🗄️ Caches")
+    _table(st, metrics.cache_table(series), "No cache lookups recorded yet.")
+    backend = shared_cache.get_backend()
+    if backend is not None:
+        st.caption(f"Shared cache: {backend.stats()}")
+    st.caption("Streamlit `st.cache_data` hits are not observable and are not counted here.")
+
+    st.subheader("🔌 HTTP Connection Pools (this process)")
+    _table(st, [{"host": host, **values} for host, values in http_client.get_metrics().items()],
+           "No HTTP requests from this process yet.")
+
+    st.subheader("🕘 Screen Jobs (this process)")
+    jobs = [{key: value for key, value in job.snapshot().items() if key != "results"}
+            for job in screen_jobs.list_jobs()]
+    _table(st, jobs, "No screen jobs in this process.")
+
+    show_traces(st)
+
+    with st.expander("Prometheus exposition"):
+        st.code(metrics.render_prometheus(series), language="text")
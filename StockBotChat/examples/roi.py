@@ -1,5 +1,4 @@
 import yfinance as yf
-from datetime import datetime
 import pandas as pd
 import warnings
 
@@ -23,37 +22,25 @@ def calculate_sip_roi(symbol='TQQQ', start="2015-01-01", end="2025-02-28", inves
     data = yf.download(ticker_symbol, start, end)
     monthly_data = data.resample('MS').first()
     monthly_closes = monthly_data['Close'].squeeze()
-    monthly_closes = pd.to_numeric(monthly_closes, errors='coerce')
-
-    total_investment = 0
-    shares_held = 0
-
-    investment_df = pd.DataFrame(columns=['Date', 'Investment', 'Current Value', 'Shares Bought', 'Close Price', 'Current ROI'])
-
-    for date, close_price in zip(monthly_closes.index, monthly_closes):
-        trading_time = datetime(date.year, date.month, date.day, 9, 30)
-        actual_investment = investment_per_month
-        total_investment += actual_investment #Correct placement.
-        shares_bought = actual_investment / close_price
-        shares_held += shares_bought
-        curr_val = shares_held * close_price
-        if total_investment !=0 : #add check to prevent zero division error.
-            curr_roi = ((curr_val - total_investment) / total_investment) * 100
-        else:
-            curr_roi = 0
-
-        new_row = {
-            'Date': date.strftime('%Y-%m-%d'),
-            'Investment': actual_investment,
-            'Current Value': curr_val,
-            'Shares Bought': shares_bought,
-            'Close Price': close_price,
-            'Current ROI': curr_roi
-        }
-        investment_df = pd.concat([investment_df, pd.DataFrame([new_row])], ignore_index=True)
-
-    ticker = yf.Ticker(ticker_symbol).info
-    close_today = ticker['regularMarketPreviousClose']
+    monthly_closes = pd.to_numeric(monthly_closes, errors='coerce').dropna()
+
+    # Build the whole schedule with cumulative sums instead of appending row by row
+    shares_bought = investment_per_month / monthly_closes
+    shares_cumulative = shares_bought.cumsum()
+    invested_cumulative = pd.Series(investment_per_month, index=monthly_closes.index).cumsum()
+    current_value = shares_cumulative * monthly_closes
+    investment_df = pd.DataFrame({
+        'Date': monthly_closes.index.strftime('%Y-%m-%d'),
+        'Investment': investment_per_month,
+        'Current Value': current_value.values,
+        'Shares Bought': shares_bought.values,
+        'Close Price': monthly_closes.values,
+        'Current ROI': ((current_value - invested_cumulative) / invested_cumulative * 100).values
+    })
+
+    total_investment = invested_cumulative.iloc[-1]
+    shares_held = shares_cumulative.iloc[-1]
+    close_today = pd.to_numeric(yf.download(ticker_symbol, period="5d", progress=False)['Close'].squeeze(), errors='coerce').dropna().iloc[-1]
     final_value_till_thatday = shares_held * monthly_closes.iloc[-1]
     final_value_today = shares_held * close_today
 
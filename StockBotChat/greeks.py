@@ -0,0 +1,165 @@
+import os
+import numpy as np
+
+RISK_FREE_RATE = float(os.getenv("RISK_FREE_RATE", "0.045"))
+IV_MIN, IV_MAX = 1e-4, 5.0
+
+
+def norm_pdf(x):
+    """Standard normal density, element-wise."""
+    return np.exp(-0.5 * x * x) / np.sqrt(2 * np.pi)
+
+
+def norm_cdf(x):
+    """
+    Standard normal CDF, element-wise.
+
+    Uses the Abramowitz & Stegun 7.1.26 erf approximation (absolute error < 1.5e-7),
+    which keeps the module to NumPy only.
+    """
+    z = np.abs(x) / np.sqrt(2)
+    t = 1 / (1 + 0.3275911 * z)
+    poly = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429))))
+    erf = 1 - poly * np.exp(-z * z)
+    return 0.5 * (1 + np.sign(x) * erf)
+
+
+def black_scholes(spot, strike, years, sigma, is_call, rate=RISK_FREE_RATE, dividend_yield=0.0):
+    """
+    Price European options and their greeks for whole arrays of contracts at once.
+
+    All arguments broadcast against each other, so a chain of N contracts is priced with a
+    handful of NumPy operations over length-N arrays.
+
+    Args:
+        spot (float or np.ndarray): Underlying price.
+        strike (np.ndarray): Strike prices.
+        years (np.ndarray): Time to expiration in years.
+        sigma (np.ndarray): Volatility (annualized, e.g., 0.25).
+        is_call (np.ndarray): True for calls, False for puts.
+        rate (float): Continuously compounded risk-free rate.
+        dividend_yield (float): Continuous dividend yield.
+
+    Returns:
+        dict: Arrays for price, delta, gamma, theta (per calendar day) and vega (per 1 vol point).
+    """
+    spot, strike, years, sigma = (np.asarray(a, dtype=np.float64) for a in (spot, strike, years, sigma))
+    is_call = np.asarray(is_call, dtype=bool)
+
+    sqrt_t = np.sqrt(years)
+    vol_sqrt_t = sigma * sqrt_t
+    d1 = (np.log(spot / strike) + (rate - dividend_yield + 0.5 * sigma ** 2) * years) / vol_sqrt_t
+    d2 = d1 - vol_sqrt_t
+
+    disc_q = np.exp(-dividend_yield * years)
+    disc_r = np.exp(-rate * years)
+    pdf_d1 = norm_pdf(d1)
+    sign = np.where(is_call, 1.0, -1.0)
+    cdf_d1 = norm_cdf(sign * d1)
+    cdf_d2 = norm_cdf(sign * d2)
+
+    price = sign * (spot * disc_q * cdf_d1 - strike * disc_r * cdf_d2)
+    delta = sign * disc_q * cdf_d1
+    gamma = disc_q * pdf_d1 / (spot * vol_sqrt_t)
+    vega = spot * disc_q * pdf_d1 * sqrt_t
+    theta = (-spot * disc_q * pdf_d1 * sigma / (2 * sqrt_t)
+             + sign * (dividend_yield * spot * disc_q * cdf_d1 - rate * strike * disc_r * cdf_d2))
+
+    return {
+        "price": price,
+        "delta": delta,
+        "gamma": gamma,
+        "theta": theta / 365,
+        "vega": vega / 100,
+    }
+
+
+def implied_volatility(market_price, spot, strike, years, is_call, rate=RISK_FREE_RATE, dividend_yield=0.0, tol=1e-6, max_iter=60):
+    """
+    Solve for implied volatility across a whole chain with a vectorized Newton/bisection solver.
+
+    Every contract keeps a [low, high] bracket. Each iteration takes a Newton step where it
+    lands inside the bracket and falls back to bisection elsewhere, so deep in/out of the
+    money contracts with tiny vega still converge.
+
+    Args:
+        market_price (np.ndarray): Observed option prices.
+        spot, strike, years, is_call, rate, dividend_yield: As in `black_scholes`.
+        tol (float): Price tolerance for convergence.
+        max_iter (int): Maximum solver iterations.
+
+    Returns:
+        np.ndarray: Implied volatilities (NaN where the price violates no-arbitrage bounds or is missing).
+    """
+    market_price = np.asarray(market_price, dtype=np.float64)
+    spot, strike, years = np.broadcast_arrays(*(np.asarray(a, dtype=np.float64) for a in (spot, strike, years)))
+    is_call = np.broadcast_to(np.asarray(is_call, dtype=bool), strike.shape)
+
+    # Prices at the bracket ends bound what any volatility can produce
+    low_price = black_scholes(spot, strike, years, IV_MIN, is_call, rate, dividend_yield)["price"]
+    high_price = black_scholes(spot, strike, years, IV_MAX, is_call, rate, dividend_yield)["price"]
+    solvable = np.isfinite(market_price) & (market_price > low_price) & (market_price < high_price)
+
+    low = np.full(strike.shape, IV_MIN)
+    high = np.full(strike.shape, IV_MAX)
+    sigma = np.full(strike.shape, 0.3)
+    active = solvable.copy()
+
+    for _ in range(max_iter):
+        if not active.any():
+            break
+        idx = np.nonzero(active)[0]
+        result = black_scholes(spot[idx], strike[idx], years[idx], sigma[idx], is_call[idx], rate, dividend_yield)
+        diff = result["price"] - market_price[idx]
+
+        converged = np.abs(diff) < tol
+        active[idx[converged]] = False
+
+        # Price rises with volatility, so the sign of diff tells which bracket end to move
+        too_high = diff > 0
+        high[idx] = np.where(too_high, sigma[idx], high[idx])
+        low[idx] = np.where(too_high, low[idx], sigma[idx])
+
+        vega = result["vega"] * 100
+        with np.errstate(divide="ignore", invalid="ignore"):
+            newton = sigma[idx] - diff / vega
+        use_newton = np.isfinite(newton) & (newton > low[idx]) & (newton < high[idx])
+        step = np.where(use_newton, newton, 0.5 * (low[idx] + high[idx]))
+        sigma[idx] = np.where(converged, sigma[idx], step)
+
+    return np.where(solvable, sigma, np.nan)
+
+
+def price_chain(chain, spot, market_price=None, fallback_sigma=None, rate=RISK_FREE_RATE):
+    """
+    Add implied volatility, theoretical price and greeks columns to an options chain.
+
+    Args:
+        chain (pd.DataFrame): Contracts with contract_type, strike_price and days_to_expiration.
+        spot (float): Underlying price.
+        market_price (np.ndarray): Observed prices aligned with `chain`, or None.
+        fallback_sigma (float): Volatility used where no implied volatility is available
+            (e.g., the underlying's historical volatility).
+        rate (float): Risk-free rate.
+
+    Returns:
+        pd.DataFrame: Copy of `chain` with iv, theo_price, delta, gamma, theta and vega columns.
+    """
+    chain = chain.copy()
+    strike = chain["strike_price"].to_numpy(dtype=np.float64)
+    # Same-day expirations still carry a few hours of time value
+    years = np.maximum(chain["days_to_expiration"].to_numpy(dtype=np.float64), 0.5) / 365
+    is_call = (chain["contract_type"] == "call").to_numpy()
+
+    if market_price is not None:
+        iv = implied_volatility(market_price, spot, strike, years, is_call, rate)
+    else:
+        iv = np.full(len(chain), np.nan)
+    sigma = np.where(np.isnan(iv), np.nan if fallback_sigma is None else fallback_sigma, iv)
+
+    result = black_scholes(spot, strike, years, sigma, is_call, rate)
+    chain["iv"] = iv
+    chain["theo_price"] = result["price"]
+    for greek in ["delta", "gamma", "theta", "vega"]:
+        chain[greek] = result[greek]
+    return chain
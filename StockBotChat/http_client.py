@@ -0,0 +1,165 @@
+import os
+import random
+import threading
+import time
+from collections import deque
+from urllib.parse import urlsplit
+
+import numpy as np
+import requests
+
+try:
+    import httpx
+    import h2  # noqa: F401  (httpx only negotiates HTTP/2 when h2 is installed)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+DEFAULT_TIMEOUT = float(os.getenv("STOCKBOT_HTTP_TIMEOUT", "10"))  # Seconds
+MAX_CONNECTIONS_PER_HOST = int(os.getenv("STOCKBOT_HTTP_POOL_SIZE", "8"))
+MAX_RETRIES = int(os.getenv("STOCKBOT_HTTP_RETRIES", "3"))
+BACKOFF_BASE = 0.5  # Seconds; attempt n waits a random time up to BACKOFF_BASE * 2**n
+BACKOFF_MAX = 8.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+LATENCY_SAMPLES = 500  # Recent latencies kept per host for percentiles
+
+_lock = threading.Lock()
+_clients = {}
+_metrics = {}
+
+
+class HostMetrics:
+    """Request counters and recent latencies for one host."""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.bytes = 0
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+        self.lock = threading.Lock()
+
+    def observe(self, seconds, size, error=False):
+        with self.lock:
+            self.requests += 1
+            self.errors += int(error)
+            self.bytes += size
+            self.latencies.append(seconds)
+
+    def snapshot(self):
+        with self.lock:
+            latencies = np.array(self.latencies) * 1000
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "retries": self.retries,
+                "bytes": self.bytes,
+                "avg_ms": float(latencies.mean()) if latencies.size else None,
+                "p50_ms": float(np.percentile(latencies, 50)) if latencies.size else None,
+                "p95_ms": float(np.percentile(latencies, 95)) if latencies.size else None,
+            }
+
+
+def _host(url):
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def _get_client(host):
+    """One keep-alive connection pool per host, created on first use."""
+    client = _clients.get(host)
+    if client is not None:
+        return client
+    with _lock:
+        if host not in _clients:
+            _metrics[host] = HostMetrics()
+            if HTTP2_AVAILABLE:
+                _clients[host] = httpx.Client(
+                    http2=True,
+                    limits=httpx.Limits(max_connections=MAX_CONNECTIONS_PER_HOST,
+                                        max_keepalive_connections=MAX_CONNECTIONS_PER_HOST)
+                )
+            else:
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=MAX_CONNECTIONS_PER_HOST)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _clients[host] = session
+        return _clients[host]
+
+
+def _send(client, url, params, headers, timeout):
+    """Send one GET and return a requests.Response, whichever backend the pool uses."""
+    if not HTTP2_AVAILABLE:
+        return client.get(url, params=params, headers=headers, timeout=timeout)
+    try:
+        reply = client.get(url, params=params, headers=headers, timeout=timeout)
+    except httpx.TimeoutException as e:
+        raise requests.exceptions.Timeout(str(e)) from e
+    except httpx.TransportError as e:
+        raise requests.exceptions.ConnectionError(str(e)) from e
+    # Callers expect requests semantics (raise_for_status, RequestException handling)
+    response = requests.Response()
+    response.status_code = reply.status_code
+    response.headers.update(reply.headers)
+    response._content = reply.content
+    response.encoding = reply.encoding
+    response.url = str(reply.url)
+    return response
+
+
+def _backoff(attempt, response=None):
+    """Full-jitter exponential backoff, honouring a numeric Retry-After header."""
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after and retry_after.isdigit():
+        return min(float(retry_after), BACKOFF_MAX)
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+def get(url, params=None, headers=None, timeout=DEFAULT_TIMEOUT, retries=MAX_RETRIES):
+    """
+    GET through the shared per-host connection pool.
+
+    Connection errors, timeouts and 429/5xx responses are retried with jittered backoff.
+    Every attempt is recorded in the host's metrics.
+
+    Args:
+        url (str): Request URL.
+        params (dict): Query parameters.
+        headers (dict): Request headers.
+        timeout (float): Seconds before the request is abandoned.
+        retries (int): Retries after the first attempt.
+
+    Returns:
+        requests.Response: The final response (callers still call raise_for_status).
+    """
+    host = _host(url)
+    client = _get_client(host)
+    metrics = _metrics[host]
+    for attempt in range(retries + 1):
+        response = None
+        started = time.perf_counter()
+        try:
+            response = _send(client, url, params, headers, timeout)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            metrics.observe(time.perf_counter() - started, 0, error=True)
+            if attempt == retries:
+                raise
+        else:
+            failed = response.status_code in RETRY_STATUSES
+            metrics.observe(time.perf_counter() - started, len(response.content), error=failed)
+            if not failed or attempt == retries:
+                return response
+        with metrics.lock:
+            metrics.retries += 1
+        time.sleep(_backoff(attempt, response))
+
+
+def get_metrics():
+    """
+    Per-host HTTP metrics.
+
+    Returns:
+        dict: Host -> requests, errors, retries, bytes, avg_ms, p50_ms and p95_ms.
+    """
+    return {host: metrics.snapshot() for host, metrics in list(_metrics.items())}
@@ -10,6 +10,7 @@ import StockScreener as screener_func
 import News as news_func
 import Options as options_func
 import Markets as market_func
+import diagnostics as diag_func
 
 load_dotenv()
 
@@ -35,13 +36,19 @@ def configure_models(model_choice):
 def initialize_session_state():
     """Initializes session state variables if not already set."""
     if "selected_tab" not in st.session_state:
-        st.session_state.selected_tab = "Markets"
+        # `?tab=diagnostics` opens the hidden diagnostics tab, which the sidebar does not list
+        st.session_state.selected_tab = "Diagnostics" if st.query_params.get("tab") == "diagnostics" else "Markets"
     if "chat_log" not in st.session_state:
         st.session_state.chat_log = [{"role": "system", "content": botsystem.prompt}]
     if "model_choice" not in st.session_state:
         st.session_state.model_choice = "OpenAI"
 
 # --- Sidebar Navigation with Hover Effect ---
+def select_tab(tab):
+    """Sidebar button callback: switch to a tab."""
+    st.session_state.selected_tab = tab
+
+
 def sidebar_nav():
     """
     Creates a sleek, collapsible sidebar that expands on hover.
@@ -124,10 +131,9 @@ def sidebar_nav():
     for tab, icon in tabs.items():
         is_selected = st.session_state.selected_tab == tab
 
-        # Use only buttons for switching, without HTML duplication
-        if st.sidebar.button(f"{icon} {tab}", key=f"btn_{tab}"):
-            st.session_state.selected_tab = tab  # Store selected tab
-            st.rerun()  # Refresh UI
+        # Use only buttons for switching, without HTML duplication. The callback stores the
+        # tab before the click's rerun, so no second st.rerun() pass is needed.
+        st.sidebar.button(f"{icon} {tab}", key=f"btn_{tab}", on_click=select_tab, args=(tab,))
 
 # --- Main Application ---
 def main():
@@ -153,6 +159,8 @@ def main():
         news_func.show_news(st)
     elif tab == "Options":
         options_func.show_options(st)
+    elif tab == "Diagnostics":
+        diag_func.show_diagnostics(st)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
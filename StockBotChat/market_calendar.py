@@ -0,0 +1,253 @@
+"""
+NYSE trading calendar: sessions, holidays, early closes and bar counts.
+
+The session index is computed once per process from the exchange's holiday rules, so
+fetch planners can answer "is there anything to download?", "how far back do N bars
+go?" and "which session is the latest data from?" without a network call.
+"""
+import functools
+from datetime import date, datetime, time, timedelta
+
+import numpy as np
+import pandas as pd
+import pytz
+
+ny_timezone = pytz.timezone("America/New_York")
+
+FIRST_YEAR = 1990
+YEARS_AHEAD = 2  # Sessions are precomputed through the end of this many years after today
+SESSION_OPEN = time(9, 30)
+SESSION_CLOSE = time(16, 0)
+EARLY_CLOSE = time(13, 0)
+
+# Unscheduled full-day closures (national days of mourning, weather, 9/11)
+SPECIAL_CLOSURES = {
+    date(1994, 4, 27),  # Richard Nixon
+    date(2001, 9, 11), date(2001, 9, 12), date(2001, 9, 13), date(2001, 9, 14),
+    date(2004, 6, 11),  # Ronald Reagan
+    date(2007, 1, 2),  # Gerald Ford
+    date(2012, 10, 29), date(2012, 10, 30),  # Hurricane Sandy
+    date(2018, 12, 5),  # George H. W. Bush
+    date(2025, 1, 9),  # Jimmy Carter
+}
+
+# Bar length in minutes per timeframe spelling (0 for daily bars)
+BAR_MINUTES = {
+    "5Min": 5, "15Min": 15, "1H": 60, "1Hour": 60, "1h": 60, "1 Hour": 60,
+    "1D": 0, "1Day": 0, "1d": 0, "1 Day": 0,
+}
+
+
+def _easter(year):
+    """Easter Sunday (anonymous Gregorian algorithm)."""
+    a, b, c = year % 19, year // 100, year % 100
+    d = (19 * a + b - b // 4 - (b - (b + 8) // 25 + 1) // 3 + 15) % 30
+    e = (32 + 2 * (b % 4) + 2 * (c // 4) - d - c % 4) % 7
+    f = d + e - 7 * ((a + 11 * d + 22 * e) // 451) + 114
+    return date(year, f // 31, f % 31 + 1)
+
+
+def _nth_weekday(year, month, weekday, n):
+    """The n-th given weekday (Monday=0) of a month; n=-1 for the last one."""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year, month + 1, 1) - timedelta(days=1) if month < 12 else date(year, 12, 31)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _observed(day):
+    """Weekend holidays are observed on the Friday before or the Monday after."""
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+def holidays(year):
+    """
+    NYSE full-day holidays for a year.
+
+    Returns:
+        set: Dates the exchange is closed (weekdays only).
+    """
+    days = {
+        _nth_weekday(year, 2, 0, 3),  # Washington's Birthday
+        _easter(year) - timedelta(days=2),  # Good Friday
+        _nth_weekday(year, 5, 0, -1),  # Memorial Day
+        _observed(date(year, 7, 4)),
+        _nth_weekday(year, 9, 0, 1),  # Labor Day
+        _nth_weekday(year, 11, 3, 4),  # Thanksgiving
+        _observed(date(year, 12, 25)),
+    }
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:  # Not observed on the prior Friday when it falls on a Saturday
+        days.add(_observed(new_year))
+    if year >= 1998:
+        days.add(_nth_weekday(year, 1, 0, 3))  # Martin Luther King Jr. Day
+    if year >= 2022:
+        days.add(_observed(date(year, 6, 19)))  # Juneteenth
+    days |= {day for day in SPECIAL_CLOSURES if day.year == year}
+    return {day for day in days if day.weekday() < 5}
+
+
+def early_closes(year):
+    """Sessions that close at 13:00: July 3, the day after Thanksgiving and Christmas Eve."""
+    days = {_nth_weekday(year, 11, 3, 4) + timedelta(days=1)}
+    for day in (date(year, 7, 3), date(year, 12, 24)):
+        if day.weekday() < 4:  # Monday-Thursday; on a Friday it is the observed holiday
+            days.add(day)
+    return days
+
+
+@functools.lru_cache(maxsize=1)
+def sessions():
+    """
+    The precomputed session index.
+
+    Returns:
+        pd.DataFrame: One row per session date (naive, midnight) with tz-aware New York
+            `open` and `close` times and the session length in `minutes`.
+    """
+    last_year = datetime.now(ny_timezone).year + YEARS_AHEAD
+    closed = set().union(*(holidays(year) for year in range(FIRST_YEAR, last_year + 1)))
+    early = set().union(*(early_closes(year) for year in range(FIRST_YEAR, last_year + 1)))
+    days = pd.bdate_range(date(FIRST_YEAR, 1, 1), date(last_year, 12, 31))
+    days = days[~days.isin(pd.DatetimeIndex(sorted(closed)))]
+    is_early = days.isin(pd.DatetimeIndex(sorted(early)))
+    close_minutes = np.where(is_early, EARLY_CLOSE.hour * 60, SESSION_CLOSE.hour * 60)
+    open_minutes = SESSION_OPEN.hour * 60 + SESSION_OPEN.minute
+    local = days.tz_localize(ny_timezone)
+    return pd.DataFrame({
+        "open": local + pd.Timedelta(minutes=open_minutes),
+        "close": local + pd.to_timedelta(close_minutes, unit="min"),
+        "minutes": close_minutes - open_minutes,
+    }, index=days)
+
+
+def _day(value):
+    """Normalize a date, datetime or string to a naive midnight Timestamp (New York date)."""
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert(ny_timezone).tz_localize(None)
+    return ts.normalize()
+
+
+def is_session(day):
+    """True if the exchange trades on this date."""
+    return _day(day) in sessions().index
+
+
+def sessions_between(start, end):
+    """
+    Session dates in the half-open range [start, end).
+
+    Returns:
+        pd.DatetimeIndex: Naive session dates.
+    """
+    index = sessions().index
+    return index[index.searchsorted(_day(start)):index.searchsorted(_day(end))]
+
+
+def has_sessions(start, end):
+    """True if any session falls in [start, end); False means a request can only return empty."""
+    return len(sessions_between(start, end)) > 0
+
+
+def previous_session(day):
+    """The last session strictly before a date."""
+    index = sessions().index
+    return index[index.searchsorted(_day(day)) - 1]
+
+
+def session_close(day):
+    """Close time (tz-aware New York) of a session date."""
+    return sessions().loc[_day(day), "close"].to_pydatetime()
+
+
+def last_completed_session(now=None):
+    """The most recent session whose close is at or before `now` (New York time by default)."""
+    now = pd.Timestamp(now or datetime.now(ny_timezone))
+    now = now.tz_convert(ny_timezone) if now.tzinfo else now.tz_localize(ny_timezone)
+    table = sessions()
+    position = table["close"].searchsorted(now, side="right") - 1
+    return table.index[position]
+
+
+def _bars_per_session(timeframe):
+    """Bars each session holds for a timeframe, aligned with `sessions()` (1 for daily bars)."""
+    minutes = BAR_MINUTES[timeframe]
+    table = sessions()
+    if minutes == 0:
+        return np.ones(len(table), dtype=np.int64)
+    return np.ceil(table["minutes"].to_numpy() / minutes).astype(np.int64)
+
+
+def count_bars(start, end, timeframe):
+    """Regular-session bars a timeframe has in [start, end) (dates)."""
+    index = sessions().index
+    first, last = index.searchsorted(_day(start)), index.searchsorted(_day(end))
+    return int(_bars_per_session(timeframe)[first:last].sum())
+
+
+def window_start(end, bars, timeframe):
+    """
+    First session date of the shortest window ending with the session of `end` (inclusive)
+    that holds at least `bars` bars.
+
+    Args:
+        end (date or datetime): Last day of the window. For a tz-aware datetime during a
+            session, only that session's bars closed by then are counted.
+        bars (int): Bars the window must hold.
+        timeframe (str): Bar timeframe (a key of BAR_MINUTES).
+
+    Returns:
+        pd.Timestamp: Naive session date.
+    """
+    index = sessions().index
+    position = index.searchsorted(_day(end), side="right") - 1
+    per_session = _bars_per_session(timeframe)[:position + 1].copy()
+    if getattr(end, "tzinfo", None) is not None and is_session(end):
+        per_session[-1] = sum(close <= end for close in bar_closes(end, timeframe))
+    counts = np.cumsum(per_session[::-1])
+    return index[max(position - int(counts.searchsorted(bars)), 0)]
+
+
+def bar_closes(day, timeframe):
+    """
+    Close times of the bars in one session, anchored at the session open like
+    `resample` buckets (10:30, 11:30, ... for hourly bars, 09:35, 09:40, ... for 5-minute
+    bars) plus the session close.
+
+    Returns:
+        list: tz-aware New York datetimes.
+    """
+    row = sessions().loc[_day(day)]
+    minutes = BAR_MINUTES[timeframe]
+    if minutes == 0:
+        return [row["close"].to_pydatetime()]
+    closes = [row["open"] + pd.Timedelta(minutes=m) for m in range(minutes, int(row["minutes"]), minutes)]
+    return [ts.to_pydatetime() for ts in closes + [row["close"]]]
+
+
+def last_bar_close(now, timeframe):
+    """The close of the most recent completed bar at `now` (tz-aware)."""
+    now = now.astimezone(ny_timezone)
+    day = _day(now)
+    if is_session(day):
+        completed = [close for close in bar_closes(day, timeframe) if close <= now]
+        if completed:
+            return completed[-1]
+    return bar_closes(previous_session(day), timeframe)[-1]
+
+
+def next_bar_close(now, timeframe):
+    """The close of the bar currently forming, or of the first bar of the next session."""
+    now = now.astimezone(ny_timezone)
+    index = sessions().index
+    for day in index[index.searchsorted(_day(now)):]:
+        upcoming = [close for close in bar_closes(day, timeframe) if close > now]
+        if upcoming:
+            return upcoming[0]
+    raise ValueError(f"No sessions after {now} in the precomputed calendar")
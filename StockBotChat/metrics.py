@@ -0,0 +1,290 @@
+"""
+Latency histograms, error counts and cache hit ratios for external calls and hot functions.
+
+Every process keeps its own registry and periodically writes it to the cache directory,
+so the Prometheus endpoint (BotSockets) and the diagnostics tab can report totals across
+all Streamlit workers, the scheduler and the API server.
+"""
+import atexit
+import functools
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+import config
+
+METRICS_DIR = os.path.join(config.CACHE_DIR, "metrics")
+FLUSH_INTERVAL = 10  # Seconds between writes of this process's registry
+RETENTION = 24 * 60 * 60  # Seconds a stopped process's metrics are still reported
+
+# Histogram upper bounds in seconds (Prometheus `le` labels)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Metric name -> (type, help text)
+METRICS = {
+    "stockbot_external_call_seconds": ("histogram", "Latency of calls to external services."),
+    "stockbot_external_call_errors_total": ("counter", "External calls that raised an error."),
+    "stockbot_function_seconds": ("histogram", "Run time of instrumented hot functions."),
+    "stockbot_function_errors_total": ("counter", "Instrumented function calls that raised an error."),
+    "stockbot_cache_requests_total": ("counter", "Cache lookups by result (hit or miss)."),
+}
+
+os.makedirs(METRICS_DIR, exist_ok=True)
+
+_lock = threading.Lock()
+_flush_lock = threading.Lock()  # One writer of this process's file at a time
+_series = {}  # (name, labels tuple) -> float for counters, dict for histograms
+_last_flush = 0.0
+_process_file = os.path.join(METRICS_DIR, f"{socket.gethostname()}-{os.getpid()}.json")
+
+
+def _key(name, labels):
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def increment(name, amount=1, **labels):
+    """Add to a counter."""
+    key = _key(name, labels)
+    with _lock:
+        _series[key] = _series.get(key, 0) + amount
+    _maybe_flush()
+
+
+def observe(name, seconds, **labels):
+    """Record one value in a latency histogram."""
+    key = _key(name, labels)
+    with _lock:
+        series = _series.get(key)
+        if series is None:
+            series = _series[key] = {"buckets": [0] * (len(LATENCY_BUCKETS) + 1), "sum": 0.0, "count": 0}
+        index = next((i for i, bound in enumerate(LATENCY_BUCKETS) if seconds <= bound), len(LATENCY_BUCKETS))
+        series["buckets"][index] += 1
+        series["sum"] += seconds
+        series["count"] += 1
+    _maybe_flush()
+
+
+@contextmanager
+def timed(histogram, errors, **labels):
+    """Time a block into `histogram`, counting it in `errors` if it raises."""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        increment(errors, **labels)
+        raise
+    finally:
+        observe(histogram, time.perf_counter() - started, **labels)
+
+
+def external_call(service, operation):
+    """Context manager timing one call to an external service."""
+    return timed("stockbot_external_call_seconds", "stockbot_external_call_errors_total",
+                 service=service, operation=operation)
+
+
+def instrumented(func):
+    """Decorator timing a hot function, labelled `module.name`."""
+    label = f"{func.__module__}.{func.__qualname__}"
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with timed("stockbot_function_seconds", "stockbot_function_errors_total", function=label):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def cache_lookup(cache, hit):
+    """Count a cache hit or miss."""
+    increment("stockbot_cache_requests_total", cache=cache, result="hit" if hit else "miss")
+
+
+# --- Persistence across processes ---
+def _dump():
+    with _lock:
+        return [{"name": name, "labels": dict(labels),
+                 "value": dict(value, buckets=list(value["buckets"])) if isinstance(value, dict) else value}
+                for (name, labels), value in _series.items()]
+
+
+def write_atomic_json(path, data):
+    """Write JSON through a uniquely named temporary file in the same directory, then rename."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, default=str)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _write():
+    global _last_flush
+    _last_flush = time.monotonic()
+    write_atomic_json(_process_file, _dump())
+
+
+def flush():
+    """Write this process's registry to the metrics directory."""
+    with _flush_lock:
+        _write()
+
+
+def _maybe_flush():
+    if time.monotonic() - _last_flush <= FLUSH_INTERVAL:
+        return
+    if not _flush_lock.acquire(blocking=False):
+        return  # Another thread is writing; a later recording will catch up
+    try:
+        if time.monotonic() - _last_flush > FLUSH_INTERVAL:
+            _write()
+    except OSError as e:
+        print(f"⚠️ Could not write metrics: {e}")
+    finally:
+        _flush_lock.release()
+
+
+atexit.register(flush)
+
+
+def collect():
+    """
+    Merge the registries of every live (or recently stopped) process.
+
+    Returns:
+        dict: (name, labels tuple) -> counter value or histogram dict.
+    """
+    try:
+        flush()
+    except OSError as e:
+        print(f"⚠️ Could not write metrics: {e}")  # Still report what other processes wrote
+    merged = {}
+    now = time.time()
+    for filename in os.listdir(METRICS_DIR):
+        path = os.path.join(METRICS_DIR, filename)
+        if not filename.endswith(".json"):
+            continue
+        try:
+            if now - os.path.getmtime(path) > RETENTION:
+                os.remove(path)
+                continue
+            with open(path) as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            continue  # Removed or being replaced by its process
+        for entry in entries:
+            key = _key(entry["name"], entry["labels"])
+            value = entry["value"]
+            if not isinstance(value, dict):
+                merged[key] = merged.get(key, 0) + value
+                continue
+            total = merged.setdefault(key, {"buckets": [0] * len(value["buckets"]), "sum": 0.0, "count": 0})
+            total["buckets"] = [a + b for a, b in zip(total["buckets"], value["buckets"])]
+            total["sum"] += value["sum"]
+            total["count"] += value["count"]
+    return merged
+
+
+# --- Reporting ---
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def render_prometheus(series=None):
+    """
+    Metrics in the Prometheus text exposition format.
+
+    Args:
+        series (dict): Output of `collect()`; defaults to all processes.
+
+    Returns:
+        str: Exposition text.
+    """
+    series = collect() if series is None else series
+    lines = []
+    for name, (kind, help_text) in METRICS.items():
+        entries = sorted((labels, value) for (metric, labels), value in series.items() if metric == name)
+        if not entries:
+            continue
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+        for labels, value in entries:
+            if kind == "counter":
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+                continue
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), value["buckets"]):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels(labels, [('le', str(bound))])} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {value['sum']}")
+            lines.append(f"{name}_count{_format_labels(labels)} {value['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def quantile(histogram, q):
+    """Estimate a quantile (seconds) from histogram buckets by linear interpolation."""
+    if not histogram["count"]:
+        return None
+    target = q * histogram["count"]
+    cumulative, lower = 0, 0.0
+    for bound, count in zip(LATENCY_BUCKETS + (None,), histogram["buckets"]):
+        if count and cumulative + count >= target:
+            if bound is None:
+                return lower  # Beyond the last bucket: report its lower edge
+            return lower + (bound - lower) * (target - cumulative) / count
+        cumulative += count
+        lower = bound if bound is not None else lower
+    return lower
+
+
+def latency_table(histogram_name, errors_name, series=None):
+    """
+    One row per label set of a latency histogram, for display.
+
+    Returns:
+        list: Dicts of the labels plus calls, errors, avg_ms, p50_ms, p95_ms and total_s.
+    """
+    series = collect() if series is None else series
+    rows = []
+    for (name, labels), value in series.items():
+        if name != histogram_name:
+            continue
+        rows.append({
+            **dict(labels),
+            "calls": value["count"],
+            "errors": series.get((errors_name, labels), 0),
+            "avg_ms": value["sum"] / value["count"] * 1000 if value["count"] else None,
+            "p50_ms": (quantile(value, 0.5) or 0) * 1000,
+            "p95_ms": (quantile(value, 0.95) or 0) * 1000,
+            "total_s": value["sum"],
+        })
+    return sorted(rows, key=lambda row: row["total_s"], reverse=True)
+
+
+def cache_table(series=None):
+    """
+    Hit ratio per cache, for display.
+
+    Returns:
+        list: Dicts of cache, hits, misses and hit_ratio.
+    """
+    series = collect() if series is None else series
+    caches = {}
+    for (name, labels), value in series.items():
+        if name == "stockbot_cache_requests_total":
+            labels = dict(labels)
+            caches.setdefault(labels["cache"], {"hit": 0, "miss": 0})[labels["result"]] += value
+    return [{"cache": cache, "hits": counts["hit"], "misses": counts["miss"],
+             "hit_ratio": counts["hit"] / (counts["hit"] + counts["miss"])}
+            for cache, counts in sorted(caches.items())]
@@ -0,0 +1,308 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import zlib
+from datetime import datetime, timedelta
+
+import numpy as np
+from openai import OpenAI
+
+import config
+import providers
+
+INDEX_FILE = config.cache_path("news_index", "news.sqlite")
+# Files written by earlier versions; imported into INDEX_FILE on first use
+LEGACY_EMBEDDINGS_FILE = config.cache_path("news_index", "embeddings.npy")
+LEGACY_METADATA_FILE = config.cache_path("news_index", "metadata.jsonl")
+
+# "hashing" embeds locally with no API calls; any other value is an OpenAI embedding model
+EMBEDDING_MODEL = os.getenv("NEWS_EMBEDDING_MODEL", "hashing")
+HASHING_DIMENSIONS = 1024
+MIN_SCORE = 0.1  # Hits below this cosine similarity are not worth putting in the prompt
+REEMBED_BATCH = 200  # Stored articles re-embedded per add_articles call after a model change
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_TICKER_RE = re.compile(r"\b[A-Z]{1,5}\b")
+
+_lock = threading.Lock()
+_conn = None
+_embeddings = None
+_metadata = None
+_dates = None
+_urls = None
+_last_id = 0  # Highest embedding row already loaded into memory
+
+
+def hashing_embed(texts):
+    """
+    Embed texts locally by hashing unigrams and bigrams into a fixed-size signed vector.
+
+    Returns:
+        np.ndarray: L2-normalized float32 embeddings, one row per text.
+    """
+    vectors = np.zeros((len(texts), HASHING_DIMENSIONS), dtype=np.float32)
+    for row, text in enumerate(texts):
+        tokens = _TOKEN_RE.findall(text.lower())
+        for feature in tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]:
+            h = zlib.crc32(feature.encode())
+            vectors[row, h % HASHING_DIMENSIONS] += 1.0 if h & 0x80000000 else -1.0
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def embed(texts):
+    """Embed texts with the configured model."""
+    if EMBEDDING_MODEL == "hashing":
+        return hashing_embed(texts)
+    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    vectors = np.array(providers.openai_embeddings(client, model=EMBEDDING_MODEL, input=texts), dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _connect():
+    """
+    Open the shared article store (SQLite, WAL mode), so every Streamlit worker appends
+    to and reads from the same rows; embeddings and metadata are written in one transaction.
+
+    Embeddings are kept per model, so changing NEWS_EMBEDDING_MODEL never mixes vectors
+    of different models (or dimensions) in one search.
+    """
+    global _conn
+    if _conn is None:
+        conn = sqlite3.connect(INDEX_FILE, timeout=30, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS articles (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, url TEXT UNIQUE, title TEXT, summary TEXT,
+                source TEXT, date TEXT, tickers TEXT
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, article_id INTEGER, model TEXT,
+                dimensions INTEGER, vector BLOB, UNIQUE (article_id, model)
+            )
+        """)
+        _migrate_embedding_column(conn)
+        _import_legacy(conn)
+        _conn = conn
+    return _conn
+
+
+def _transaction(conn, work):
+    """Run `work(conn)` in a write transaction and return its result."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        result = work(conn)
+        conn.execute("COMMIT")
+        return result
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def _legacy_model(dimensions):
+    """Best guess of the model that wrote an unlabelled vector (None: re-embed it)."""
+    if dimensions == HASHING_DIMENSIONS:
+        return "hashing"
+    return EMBEDDING_MODEL if EMBEDDING_MODEL != "hashing" else None
+
+
+def _store_embeddings(conn, article_ids, vectors, model):
+    conn.executemany(
+        "INSERT OR IGNORE INTO embeddings (article_id, model, dimensions, vector) VALUES (?, ?, ?, ?)",
+        [(article_id, model, len(vector), np.asarray(vector, dtype=np.float32).tobytes())
+         for article_id, vector in zip(article_ids, vectors)]
+    )
+
+
+def _insert(conn, metadata, vectors, model=None):
+    """Insert articles with their embeddings, skipping URLs another process already added."""
+    def work(conn):
+        added = 0
+        for m, vector in zip(metadata, vectors):
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO articles (url, title, summary, source, date, tickers) VALUES (?, ?, ?, ?, ?, ?)",
+                (m["url"], m["title"], m["summary"], m["source"], m["date"], json.dumps(m["tickers"]))
+            )
+            if not cursor.rowcount:
+                continue
+            added += 1
+            vector_model = model or _legacy_model(len(vector))
+            if vector_model is not None:
+                _store_embeddings(conn, [cursor.lastrowid], [vector], vector_model)
+        return added
+
+    return _transaction(conn, work)
+
+
+def _migrate_embedding_column(conn):
+    """Move vectors stored inline by an earlier version of the articles table into `embeddings`."""
+    if "embedding" not in [row[1] for row in conn.execute("PRAGMA table_info(articles)")]:
+        return
+
+    def work(conn):
+        if "embedding" not in [row[1] for row in conn.execute("PRAGMA table_info(articles)")]:
+            return  # Another process migrated first
+        for article_id, blob in conn.execute("SELECT id, embedding FROM articles ORDER BY id").fetchall():
+            vector = np.frombuffer(blob, dtype=np.float32)
+            model = _legacy_model(len(vector))
+            if model is not None:
+                _store_embeddings(conn, [article_id], [vector], model)
+        conn.execute("ALTER TABLE articles DROP COLUMN embedding")
+
+    _transaction(conn, work)
+
+
+def _import_legacy(conn):
+    """Move an index written as embeddings.npy + metadata.jsonl into the article store."""
+    if not (os.path.exists(LEGACY_METADATA_FILE) and os.path.exists(LEGACY_EMBEDDINGS_FILE)):
+        return
+    with open(LEGACY_METADATA_FILE) as f:
+        metadata = [json.loads(line) for line in f if line.strip()]
+    vectors = np.load(LEGACY_EMBEDDINGS_FILE)
+    count = min(len(metadata), len(vectors))  # Rows past a torn write cannot be matched up
+    _insert(conn, metadata[:count], vectors[:count])
+    for path in (LEGACY_EMBEDDINGS_FILE, LEGACY_METADATA_FILE):
+        os.replace(path, f"{path}.imported")
+
+
+def _load():
+    """Load embeddings of the configured model that were stored since the last call."""
+    global _embeddings, _metadata, _dates, _urls, _last_id
+    if _metadata is None:
+        _embeddings = np.zeros((0, 0), dtype=np.float32)
+        _metadata, _dates, _urls = [], np.array([], dtype="datetime64[D]"), set()
+    rows = _connect().execute(
+        "SELECT e.id, a.url, a.title, a.summary, a.source, a.date, a.tickers, e.vector "
+        "FROM embeddings e JOIN articles a ON a.id = e.article_id WHERE e.model = ? AND e.id > ? ORDER BY e.id",
+        (EMBEDDING_MODEL, _last_id)
+    ).fetchall()
+    if not rows:
+        return
+    _last_id = rows[-1][0]
+    dimensions = _embeddings.shape[1] if _embeddings.size else len(rows[0][-1]) // 4
+    rows = [row for row in rows if len(row[-1]) == dimensions * 4]  # e.g., a model's dimensions changed
+    if not rows:
+        return
+    metadata = [{"url": url, "title": title, "summary": summary, "source": source, "date": date,
+                 "tickers": json.loads(tickers)}
+                for _, url, title, summary, source, date, tickers, _ in rows]
+    vectors = np.stack([np.frombuffer(row[-1], dtype=np.float32) for row in rows])
+    _embeddings = vectors if _embeddings.size == 0 else np.vstack([_embeddings, vectors])
+    _metadata = _metadata + metadata  # New list: searches in flight keep their snapshot
+    _dates = np.concatenate([_dates, np.array([m["date"] for m in metadata], dtype="datetime64[D]")])
+    _urls.update(m["url"] for m in metadata)
+
+
+def _reembed_stored(conn, limit=REEMBED_BATCH):
+    """Embed up to `limit` stored articles that have no vector from the configured model yet."""
+    rows = conn.execute(
+        "SELECT id, title, summary FROM articles WHERE id NOT IN "
+        "(SELECT article_id FROM embeddings WHERE model = ?) ORDER BY id DESC LIMIT ?",
+        (EMBEDDING_MODEL, limit)
+    ).fetchall()
+    if not rows:
+        return 0
+    vectors = embed([f"{title}. {summary}" for _, title, summary in rows])
+    _transaction(conn, lambda conn: _store_embeddings(conn, [row[0] for row in rows], vectors, EMBEDDING_MODEL))
+    return len(rows)
+
+
+def add_articles(feed):
+    """
+    Embed new Alpha Vantage articles and append them to the index.
+
+    Articles stored under a different embedding model are re-embedded a batch at a time
+    along the way, newest first.
+
+    Args:
+        feed (list): Raw Alpha Vantage NEWS_SENTIMENT articles.
+
+    Returns:
+        int: Number of articles added (already indexed URLs are skipped).
+    """
+    with _lock:
+        _load()
+        conn = _connect()
+        _reembed_stored(conn)
+        new_articles = [a for a in feed if a.get("url") and a.get("time_published") and a["url"] not in _urls]
+        added = 0
+        if new_articles:
+            vectors = embed([f"{a.get('title', '')}. {a.get('summary', '')}" for a in new_articles])
+            metadata = [{
+                "url": a["url"],
+                "title": a.get("title", ""),
+                "summary": a.get("summary", ""),
+                "source": a.get("source", ""),
+                "date": datetime.strptime(a["time_published"][:8], "%Y%m%d").date().isoformat(),
+                "tickers": [ts["ticker"] for ts in a.get("ticker_sentiment", [])],
+            } for a in new_articles]
+            added = _insert(conn, metadata, vectors, EMBEDDING_MODEL)
+        _load()
+        return added
+
+
+def search(query, k=5, ticker=None, days=None):
+    """
+    Brute-force cosine search over indexed articles with metadata filters.
+
+    Args:
+        query (str): Natural-language question.
+        k (int): Number of results.
+        ticker (str or list): Only articles tagged with this ticker (or any of these tickers).
+        days (int): Only articles published in the last `days` days.
+
+    Returns:
+        list: Up to k metadata dicts with a `score`, best match first.
+    """
+    with _lock:
+        _load()
+        embeddings, metadata, dates = _embeddings, _metadata, _dates
+    if not metadata:
+        return []
+
+    mask = np.ones(len(metadata), dtype=bool)
+    if days is not None:
+        mask &= dates >= np.datetime64(datetime.now().date() - timedelta(days=int(days)), "D")
+    if ticker:
+        wanted = {ticker.upper()} if isinstance(ticker, str) else {t.upper() for t in ticker}
+        mask &= np.array([not wanted.isdisjoint(m["tickers"]) for m in metadata])
+    candidates = np.nonzero(mask)[0]
+    if candidates.size == 0:
+        return []
+
+    scores = embeddings[candidates] @ embed([query])[0]
+    top = np.argpartition(-scores, min(k, scores.size) - 1)[:k]
+    top = top[np.argsort(-scores[top])]
+    return [dict(metadata[candidates[i]], score=float(scores[i])) for i in top]
+
+
+def known_tickers():
+    """Set of tickers tagged on any indexed article."""
+    with _lock:
+        _load()
+        return {t for m in _metadata for t in m["tickers"]}
+
+
+def retrieve_context(query, k=5, days=30):
+    """
+    Build a prompt snippet of the news most relevant to a chat message.
+
+    Upper-case words in the message that match indexed tickers narrow the search.
+
+    Returns:
+        str: Numbered article summaries, or an empty string if nothing relevant is indexed.
+    """
+    tickers = set(_TICKER_RE.findall(query)) & known_tickers()
+    hits = [hit for hit in search(query, k, ticker=tickers or None, days=days) if hit["score"] >= MIN_SCORE]
+    if not hits:
+        return ""
+    lines = [
+        f"{i}. [{hit['date']}] {hit['title']} ({hit['source']}): {hit['summary']}"
+        for i, hit in enumerate(hits, 1)
+    ]
+    return "Recent news retrieved from the local news index:\n" + "\n".join(lines)
@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+from datetime import date
+
+CONTRACT_TYPES = ["call", "put"]
+
+
+class ChainStore:
+    """
+    Compact columnar options chain for one underlying.
+
+    Contracts are sorted by (expiration, strike) and kept as NumPy arrays, with the
+    contract type stored as small integer codes. Each expiration owns a contiguous
+    block whose strikes are sorted, so expiration and strike ranges resolve with
+    binary searches instead of scanning the whole chain.
+    """
+
+    def __init__(self, underlying, contracts):
+        """
+        Args:
+            underlying (str): Underlying stock symbol (e.g., "SPY").
+            contracts (pd.DataFrame): Raw Polygon contracts with ticker, contract_type,
+                expiration_date and strike_price columns.
+        """
+        self.underlying = underlying
+        if contracts.empty:
+            contracts = pd.DataFrame(columns=["ticker", "contract_type", "expiration_date", "strike_price"])
+
+        expirations = pd.to_datetime(contracts["expiration_date"]).values.astype("datetime64[D]")
+        strikes = contracts["strike_price"].to_numpy(dtype=np.float64)
+        order = np.lexsort((strikes, expirations))
+
+        self.expiration = expirations[order]
+        self.strike = strikes[order]
+        self.type_code = pd.Categorical(
+            contracts["contract_type"].to_numpy()[order], categories=CONTRACT_TYPES
+        ).codes.astype(np.int8)
+        self.ticker = contracts["ticker"].to_numpy()[order]
+
+        # Block boundaries: contracts for self.expiries[i] live in [offsets[i], offsets[i + 1])
+        self.expiries, starts = np.unique(self.expiration, return_index=True)
+        self.offsets = np.append(starts, len(self.expiration))
+
+    def __len__(self):
+        return len(self.ticker)
+
+    def query_indices(self, contract_type=None, min_days=0, max_days=None, strike_min=None, strike_max=None, today=None):
+        """
+        Return positions of contracts matching the filters.
+
+        Args:
+            contract_type (str): "call", "put" or None for both.
+            min_days (int): Minimum days to expiration.
+            max_days (int): Maximum days to expiration, or None for no limit.
+            strike_min (float): Lowest strike to include, or None.
+            strike_max (float): Highest strike to include, or None.
+            today (date): Reference date for days to expiration (defaults to today).
+
+        Returns:
+            np.ndarray: Positions into the store's arrays.
+        """
+        today = np.datetime64(today or date.today(), "D")
+        first = np.searchsorted(self.expiries, today + np.timedelta64(min_days, "D"), side="left")
+        last = len(self.expiries) if max_days is None else np.searchsorted(
+            self.expiries, today + np.timedelta64(max_days, "D"), side="right"
+        )
+        low = -np.inf if strike_min is None else strike_min
+        high = np.inf if strike_max is None else strike_max
+
+        blocks = []
+        for i in range(first, last):
+            start, end = self.offsets[i], self.offsets[i + 1]
+            block = self.strike[start:end]
+            lo = start + np.searchsorted(block, low, side="left")
+            hi = start + np.searchsorted(block, high, side="right")
+            if hi > lo:
+                blocks.append(np.arange(lo, hi))
+        indices = np.concatenate(blocks) if blocks else np.empty(0, dtype=np.int64)
+
+        if contract_type:
+            indices = indices[self.type_code[indices] == CONTRACT_TYPES.index(contract_type)]
+        return indices
+
+    def query(self, contract_type=None, min_days=0, max_days=None, strike_min=None, strike_max=None, spot=None, strike_pct=None, today=None):
+        """
+        Filter the chain, optionally by a strike band around the spot price.
+
+        Args:
+            contract_type (str): "call", "put" or None for both.
+            min_days (int): Minimum days to expiration.
+            max_days (int): Maximum days to expiration, or None for no limit.
+            strike_min (float): Lowest strike to include, or None.
+            strike_max (float): Highest strike to include, or None.
+            spot (float): Underlying price used with `strike_pct`.
+            strike_pct (float): Keep strikes within ±strike_pct of spot (e.g., 0.10).
+            today (date): Reference date for days to expiration.
+
+        Returns:
+            pd.DataFrame: Matching contracts with ticker, type, expiration, strike and days to expiration.
+        """
+        if spot is not None and strike_pct is not None:
+            strike_min = spot * (1 - strike_pct)
+            strike_max = spot * (1 + strike_pct)
+        indices = self.query_indices(contract_type, min_days, max_days, strike_min, strike_max, today)
+        return self.to_frame(indices, today)
+
+    def to_frame(self, indices=None, today=None):
+        """Materialize the selected contracts (all by default) as a DataFrame."""
+        if indices is None:
+            indices = np.arange(len(self))
+        today = np.datetime64(today or date.today(), "D")
+        expiration = self.expiration[indices]
+        return pd.DataFrame({
+            "ticker": self.ticker[indices],
+            "contract_type": pd.Categorical.from_codes(self.type_code[indices], CONTRACT_TYPES),
+            "expiration_date": expiration,
+            "strike_price": self.strike[indices],
+            "days_to_expiration": (expiration - today).astype(np.int64),
+        })
@@ -1,7 +1,14 @@
 import alpaca_trade_api as tradeapi
 import os
+import pandas as pd
 from dotenv import load_dotenv
-from datetime import datetime, timedelta
+from datetime import datetime
+import assets
+import market_calendar
+import metrics
+import providers
+import resample
+import tracing
 
 # Load API Keys
 load_dotenv()
@@ -29,9 +36,40 @@ def normalize_timeframe(timeframe):
     return timeframe_map.get(timeframe, "1D")  # Default to "1D" if invalid
 
 
+# Intraday bars are aggregated locally from 5-minute bars, so they land in the same
+# session-anchored buckets as backtests (`resample`) and the calendar's bar closes
+BASE_TIMEFRAME = {"1D": "1D", "1H": "5Min", "15Min": "5Min", "5Min": "5Min"}
+
+
+def fetch_bars(symbols, timeframe, start, end):
+    """
+    Regular-session bars for a timeframe, aggregated from base bars in one request.
+
+    Args:
+        symbols (str or list): One symbol or several (the frame then has a `symbol` column).
+        timeframe (str): Streamlit timeframe ("1Day", "1Hour", "15Min", "5Min").
+        start (str): ISO start date or time.
+        end (str): ISO end time; intraday bars starting at or after it are excluded.
+
+    Returns:
+        pd.DataFrame: Alpaca bar columns indexed by bar open time (empty if there are none).
+    """
+    normalized = normalize_timeframe(timeframe)
+    bars = providers.alpaca_bars(api, symbols, BASE_TIMEFRAME[normalized], start=start, end=end, limit=None)
+    if bars.empty or not resample.is_intraday(normalized):
+        return bars
+    bars = bars[bars.index < pd.Timestamp(end)]
+    if "symbol" not in bars.columns:
+        return resample.resample_ohlcv(bars, normalized)
+    return pd.concat([
+        resample.resample_ohlcv(group.drop(columns="symbol"), normalized).assign(symbol=symbol)
+        for symbol, group in bars.groupby("symbol")
+    ])
+
+
 def validate_symbol(symbol):
     """
-    Validate if the symbol is supported by Alpaca.
+    Validate if the symbol is supported by Alpaca using the local asset index.
 
     Args:
         symbol (str): Stock symbol (e.g., "NVDA").
@@ -40,12 +78,24 @@ def validate_symbol(symbol):
         bool: True if the symbol is valid, False otherwise.
     """
     try:
-        asset = api.get_asset(symbol)
-        return asset.tradable and asset.status == "active"
+        asset = assets.lookup_asset(symbol)
+        return bool(asset) and asset["tradable"] and asset["active"]
     except Exception:
         return False
 
 
+def submit_order(**order):
+    """Submit an order to Alpaca, timing it as an external call and a trace span."""
+    with tracing.span("alpaca.submit_order"), metrics.external_call("alpaca", "submit_order"):
+        return api.submit_order(**order)
+
+
+def list_positions():
+    """List open Alpaca positions, timing it as an external call and a trace span."""
+    with tracing.span("alpaca.list_positions"), metrics.external_call("alpaca", "list_positions"):
+        return api.list_positions()
+
+
 def round_price(price):
     """
     Rounds the price to the correct decimal places:
@@ -83,21 +133,19 @@ def execute_paper_trade(symbol, timeframe, strategy_type, params, strategy_logic
         # ✅ Normalize timeframe
         normalized_timeframe = normalize_timeframe(timeframe)
 
-        # ✅ Define a date range (last 30 days to yesterday) to ensure data availability
-        end_date = datetime.now() - timedelta(days=1)  # Yesterday
-        start_date = end_date - timedelta(days=30)  # 30 days ago
-        start_date_str = start_date.strftime("%Y-%m-%d")
-        end_date_str = end_date.strftime("%Y-%m-%d")
-
-        # ✅ Fetch recent bars for strategy calculation
+        # ✅ Define the shortest range of sessions, ending with the last completed one, that holds enough bars
         limit = params.get("rsi_period", 14) + 1
-        bars = api.get_bars(
-            symbol=symbol,
-            timeframe=normalized_timeframe,
-            start=start_date_str,
-            end=end_date_str,
-            limit=limit
-        ).df
+        end_session = market_calendar.previous_session(datetime.now())
+        start_session = market_calendar.window_start(end_session, limit, normalized_timeframe)
+
+        # ✅ Fetch the most recent bars for strategy calculation
+        bars = fetch_bars(
+            symbol,
+            timeframe,
+            start=start_session.strftime("%Y-%m-%d"),
+            end=market_calendar.session_close(end_session).isoformat()
+        )
+        bars = bars.iloc[-limit:]
 
         if bars.empty:
             return False, "No data available for strategy calculation. The market might be closed, or the symbol/timeframe might not have recent data."
@@ -111,14 +159,14 @@ def execute_paper_trade(symbol, timeframe, strategy_type, params, strategy_logic
 
         # ✅ Check if there is already an open position
         position = None
-        for pos in api.list_positions():
+        for pos in list_positions():
             if pos.symbol == symbol:
                 position = pos
                 break
 
         # ✅ Execute Buy Order (If No Open Position)
         if action == "buy" and not position:
-            order = api.submit_order(
+            order = submit_order(
                 symbol=symbol,
                 qty=params.get("qty", 100),
                 side="buy",
@@ -129,7 +177,7 @@ def execute_paper_trade(symbol, timeframe, strategy_type, params, strategy_logic
 
             # ✅ Set Stop Loss & Profit Target Orders
             if params.get("stop_loss"):
-                stop_order = api.submit_order(
+                stop_order = submit_order(
                     symbol=symbol,
                     qty=params.get("qty", 100),
                     side="sell",
@@ -140,7 +188,7 @@ def execute_paper_trade(symbol, timeframe, strategy_type, params, strategy_logic
                 message += f"\n🚨 Stop Loss set at: ${stop_price:.2f}"
 
             if params.get("profit_target"):
-                target_order = api.submit_order(
+                target_order = submit_order(
                     symbol=symbol,
                     qty=params.get("qty", 100),
                     side="sell",
@@ -154,7 +202,7 @@ def execute_paper_trade(symbol, timeframe, strategy_type, params, strategy_logic
 
         # ✅ Execute Sell Order (If Position Exists)
         elif action == "sell" and position:
-            order = api.submit_order(
+            order = submit_order(
                 symbol=symbol,
                 qty=params.get("qty", 100),
                 side="sell",
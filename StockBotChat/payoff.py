@@ -0,0 +1,168 @@
+import numpy as np
+
+import greeks
+
+CONTRACT_MULTIPLIER = 100
+
+# Default strikes per strategy as fractions of spot, in the order each template expects
+STRATEGY_TEMPLATES = {
+    "Covered Call": [1.05],
+    "Vertical Call Spread": [1.00, 1.05],
+    "Vertical Put Spread": [1.00, 0.95],
+    "Iron Condor": [0.90, 0.95, 1.05, 1.10],
+    "Straddle": [1.00],
+}
+
+
+def option_leg(kind, qty, strike, days):
+    """Build an option leg; qty > 0 is long and qty < 0 is short, in contracts."""
+    return {"kind": kind, "qty": qty, "strike": float(strike), "days": int(days)}
+
+
+def build_strategy(name, spot, strikes=None, days=30, sigma=0.3, rate=greeks.RISK_FREE_RATE):
+    """
+    Build and price the legs of a named multi-leg position.
+
+    Args:
+        name (str): One of STRATEGY_TEMPLATES.
+        spot (float): Underlying price.
+        strikes (list): Strikes in template order; defaults to the template's offsets from spot.
+        days (int): Days to expiration for every option leg.
+        sigma (float): Volatility used to price the entry premiums.
+        rate (float): Risk-free rate.
+
+    Returns:
+        list: Legs with an entry `premium` per share (stock legs use `spot`).
+    """
+    strikes = strikes or [round(spot * pct, 2) for pct in STRATEGY_TEMPLATES[name]]
+    if name == "Covered Call":
+        legs = [{"kind": "stock", "qty": 1, "strike": 0.0, "days": days}, option_leg("call", -1, strikes[0], days)]
+    elif name == "Vertical Call Spread":
+        legs = [option_leg("call", 1, strikes[0], days), option_leg("call", -1, strikes[1], days)]
+    elif name == "Vertical Put Spread":
+        legs = [option_leg("put", 1, strikes[0], days), option_leg("put", -1, strikes[1], days)]
+    elif name == "Iron Condor":
+        legs = [
+            option_leg("put", 1, strikes[0], days), option_leg("put", -1, strikes[1], days),
+            option_leg("call", -1, strikes[2], days), option_leg("call", 1, strikes[3], days),
+        ]
+    elif name == "Straddle":
+        legs = [option_leg("call", 1, strikes[0], days), option_leg("put", 1, strikes[0], days)]
+    else:
+        raise ValueError(f"Unsupported strategy: {name}")
+
+    for leg in legs:
+        if leg["kind"] == "stock":
+            leg["premium"] = float(spot)
+        else:
+            leg["premium"] = float(greeks.black_scholes(
+                spot, leg["strike"], max(leg["days"], 0.5) / 365, sigma, leg["kind"] == "call", rate
+            )["price"])
+    return legs
+
+
+def leg_values(legs, prices, days_elapsed, sigma, rate=greeks.RISK_FREE_RATE):
+    """
+    Value every leg at every (date, price) grid point in one broadcasted pass.
+
+    Returns:
+        np.ndarray: Per-share leg values shaped (dates, prices, legs).
+    """
+    kind = np.array([leg["kind"] for leg in legs])
+    strike = np.array([leg["strike"] for leg in legs])[None, None, :]
+    days = np.array([leg["days"] for leg in legs], dtype=np.float64)[None, None, :]
+    spot = prices[None, :, None]
+    years = np.maximum(days - days_elapsed[:, None, None], 0) / 365
+
+    is_call = (kind == "call")[None, None, :]
+    intrinsic = np.where(is_call, np.maximum(spot - strike, 0), np.maximum(strike - spot, 0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        model = greeks.black_scholes(spot, strike, np.maximum(years, 1e-9), sigma, is_call, rate)["price"]
+    values = np.where(years > 0, model, intrinsic)
+    return np.where((kind == "stock")[None, None, :], np.broadcast_to(spot, values.shape), values)
+
+
+def find_breakevens(prices, pnl):
+    """Prices where a P&L curve crosses zero, by linear interpolation between grid points."""
+    sign = np.sign(pnl)
+    crossings = np.nonzero(sign[:-1] * sign[1:] < 0)[0]
+    x0, x1 = prices[crossings], prices[crossings + 1]
+    y0, y1 = pnl[crossings], pnl[crossings + 1]
+    return x0 - y0 * (x1 - x0) / (y1 - y0)
+
+
+def probability_of_profit(prices, pnl, spot, years, sigma, rate=greeks.RISK_FREE_RATE):
+    """
+    Probability that the expiry P&L is positive under a lognormal price distribution.
+
+    Each grid cell is weighted by the probability mass between its endpoints; the tails
+    beyond the grid take the P&L sign of the nearest edge.
+    """
+    vol = sigma * np.sqrt(years)
+    cdf = greeks.norm_cdf((np.log(prices / spot) - (rate - 0.5 * sigma ** 2) * years) / vol)
+    profitable = (pnl[:-1] > 0) & (pnl[1:] > 0)
+    prob = np.sum(np.diff(cdf)[profitable])
+    prob += cdf[0] if pnl[0] > 0 else 0
+    prob += 1 - cdf[-1] if pnl[-1] > 0 else 0
+    return float(prob)
+
+
+def analyze_position(legs, spot, sigma, rate=greeks.RISK_FREE_RATE, price_range=0.5, num_prices=401, num_dates=6):
+    """
+    Compute P&L across a grid of underlying prices and dates for a multi-leg position.
+
+    Args:
+        legs (list): Legs from `build_strategy` (kind, qty, strike, days, premium).
+        spot (float): Current underlying price.
+        sigma (float): Volatility used to value legs before expiration and for probability of profit.
+        rate (float): Risk-free rate.
+        price_range (float): Grid spans spot × (1 ± price_range).
+        num_prices (int): Number of underlying prices in the grid.
+        num_dates (int): Number of dates from today to the first expiration.
+
+    Returns:
+        dict: prices, days_elapsed and pnl grid (dates × prices, in dollars), plus expiry
+            breakevens, max_profit, max_loss (None when unbounded) and probability_of_profit.
+    """
+    expiry = min(leg["days"] for leg in legs if leg["kind"] != "stock")
+    prices = np.linspace(spot * (1 - price_range), spot * (1 + price_range), num_prices)
+    days_elapsed = np.linspace(0, expiry, num_dates)
+
+    qty = np.array([leg["qty"] for leg in legs], dtype=np.float64)
+    premium = np.array([leg["premium"] for leg in legs])
+    values = leg_values(legs, prices, days_elapsed, sigma, rate)
+    pnl = ((values - premium) * qty).sum(axis=2) * CONTRACT_MULTIPLIER
+
+    at_expiry = pnl[-1]
+    # Below the grid the payoff is bounded by the underlying going to zero; above it, a
+    # remaining slope at the top edge means profit or loss keeps growing without limit.
+    zero_values = leg_values(legs, np.array([1e-9]), np.array([expiry]), sigma, rate)[0, 0]
+    at_zero = ((zero_values - premium) * qty).sum() * CONTRACT_MULTIPLIER
+    slope_high = at_expiry[-1] - at_expiry[-2]
+
+    return {
+        "prices": prices,
+        "days_elapsed": days_elapsed,
+        "pnl": pnl,
+        "breakevens": find_breakevens(prices, at_expiry),
+        "max_profit": None if slope_high > 1e-9 else float(max(at_expiry.max(), at_zero)),
+        "max_loss": None if slope_high < -1e-9 else float(min(at_expiry.min(), at_zero)),
+        "net_premium": float(-(premium * qty).sum() * CONTRACT_MULTIPLIER),
+        "probability_of_profit": probability_of_profit(prices, at_expiry, spot, expiry / 365, sigma, rate),
+    }
+
+
+def describe_analysis(name, ticker, spot, legs, analysis):
+    """Format an analysis as plain text for the chatbot and the Options tab."""
+    leg_text = ", ".join(
+        f"{'long' if leg['qty'] > 0 else 'short'} "
+        + ("100 shares" if leg["kind"] == "stock" else f"{leg['strike']:.2f} {leg['kind']}")
+        + f" @ ${leg['premium']:.2f}"
+        for leg in legs
+    )
+    breakevens = ", ".join(f"${b:.2f}" for b in analysis["breakevens"]) or "none in range"
+    max_profit = "unlimited" if analysis["max_profit"] is None else f"${analysis['max_profit']:,.2f}"
+    max_loss = "unlimited" if analysis["max_loss"] is None else f"${analysis['max_loss']:,.2f}"
+    return (f"{name} on {ticker} (spot ${spot:.2f}): {leg_text}. "
+            f"Breakevens at expiry: {breakevens}. Max profit: {max_profit}. Max loss: {max_loss}. "
+            f"Probability of profit: {analysis['probability_of_profit']:.1%}.")
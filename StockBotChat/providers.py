@@ -0,0 +1,249 @@
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+import yfinance as yf
+from alpaca_trade_api.rest import APIError
+
+import config
+import http_client
+import metrics
+import tracing
+
+# "live" calls services directly, "record" also archives every response, and "replay"
+# serves archived responses only, so benchmarks and load tests can run with no network.
+MODES = ("live", "record", "replay")
+MODE = os.getenv("STOCKBOT_PROVIDER_MODE", "live")
+ARCHIVE_DIR = os.getenv("STOCKBOT_ARCHIVE_DIR", os.path.join(config.CACHE_DIR, "archive"))
+
+# Replay latency in milliseconds, either one number ("50") or per service ("yfinance=120,polygon=40,*=20")
+REPLAY_LATENCY_MS = os.getenv("STOCKBOT_REPLAY_LATENCY_MS", "0")
+
+# Request fields that hold credentials; they never become part of an archive key
+SECRET_FIELDS = ("apikey", "api_key", "key", "token", "secret")
+
+_lock = threading.Lock()
+_replay_fallback = None
+
+
+class ReplayMissError(LookupError):
+    """Raised in replay mode when a request was never recorded."""
+
+
+def parse_latency(spec):
+    """
+    Parse a latency spec into per-service seconds.
+
+    Returns:
+        dict: Service -> seconds, with "*" as the default for unlisted services.
+    """
+    latency = {"*": 0.0}
+    for part in str(spec).split(","):
+        part = part.strip()
+        if not part:
+            continue
+        service, _, value = part.rpartition("=")
+        latency[service.strip() or "*"] = float(value) / 1000
+    return latency
+
+
+_latency = parse_latency(REPLAY_LATENCY_MS)
+
+
+def configure(mode=None, archive_dir=None, latency=None, fallback=None):
+    """
+    Switch provider mode at runtime (benchmarks and scripts call this instead of setting env vars).
+
+    Args:
+        mode (str): "live", "record" or "replay".
+        archive_dir (str): Directory holding recorded responses.
+        latency (str or float): Replay latency spec in milliseconds (see REPLAY_LATENCY_MS).
+        fallback (callable): In replay mode, `fallback(service, operation, request)` answers
+            requests missing from the archive (e.g., synthetic fixtures); it may raise ReplayMissError.
+    """
+    global MODE, ARCHIVE_DIR, _latency, _replay_fallback
+    if mode is not None:
+        if mode not in MODES:
+            raise ValueError(f"Unsupported provider mode: {mode}")
+        MODE = mode
+    if archive_dir is not None:
+        ARCHIVE_DIR = archive_dir
+    if latency is not None:
+        _latency = parse_latency(latency)
+    if fallback is not None:
+        _replay_fallback = fallback
+
+
+def _is_secret(name):
+    return str(name).lower() in SECRET_FIELDS
+
+
+def request_key(service, operation, request):
+    """Stable archive key for a request description."""
+    payload = json.dumps([service, operation, request], sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def _archive_file(service, operation, key):
+    return os.path.join(ARCHIVE_DIR, service, operation, f"{key}.pkl")
+
+
+def call(service, operation, fetch, request):
+    """
+    Run a provider request according to the current mode.
+
+    Args:
+        service (str): Upstream service name (e.g., "yfinance", "alpaca", "polygon").
+        operation (str): Operation within the service (e.g., "history", "bars").
+        fetch (callable): Zero-argument function that performs the live request and
+            returns a picklable result.
+        request (dict): JSON-able description of the request, without credentials;
+            identical descriptions replay the same response.
+
+    Returns:
+        The live, recorded or replayed result.
+    """
+    with tracing.span(f"{service}.{operation}", mode=MODE), metrics.external_call(service, operation):
+        return _call(service, operation, fetch, request)
+
+
+def _call(service, operation, fetch, request):
+    if MODE == "live":
+        return fetch()
+
+    path = _archive_file(service, operation, request_key(service, operation, request))
+    if MODE == "replay":
+        try:
+            with open(path, "rb") as f:
+                result = pickle.load(f)["result"]
+        except FileNotFoundError:
+            if _replay_fallback is None:
+                raise ReplayMissError(f"No recorded {service}.{operation} response for {request}") from None
+            result = _replay_fallback(service, operation, request)
+        delay = _latency.get(service, _latency["*"])
+        if delay:
+            time.sleep(delay)
+        return result
+
+    result = fetch()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump({"request": request, "recorded_at": time.time(), "result": result}, f)
+    with _lock:
+        os.replace(tmp_path, path)
+    return result
+
+
+# --- yfinance ---
+def yf_history(ticker, **kwargs):
+    """`yf.Ticker(ticker).history(**kwargs)` through the provider layer."""
+    return call("yfinance", "history", lambda: yf.Ticker(ticker).history(**kwargs),
+                {"ticker": ticker, **kwargs})
+
+
+def yf_download(tickers, **kwargs):
+    """`yf.download(tickers, **kwargs)` through the provider layer."""
+    return call("yfinance", "download", lambda: yf.download(tickers, **kwargs),
+                {"tickers": tickers, **kwargs})
+
+
+# --- Alpaca ---
+def alpaca_bars(api, symbol, timeframe, **kwargs):
+    """
+    Alpaca bars as a DataFrame (`api.get_bars(...).df`) through the provider layer.
+
+    Args:
+        api (tradeapi.REST): Alpaca client.
+        symbol (str or list): One symbol or several (the frame then has a `symbol` column).
+        timeframe (str): Alpaca timeframe (e.g., "1D").
+        **kwargs: start, end, limit and other get_bars arguments.
+    """
+    return call("alpaca", "bars", lambda: api.get_bars(symbol, timeframe, **kwargs).df,
+                {"symbol": symbol, "timeframe": str(timeframe), **kwargs})
+
+
+def alpaca_assets(api, **kwargs):
+    """Alpaca asset listing as plain dicts (symbol, tradable, status) through the provider layer."""
+    def fetch():
+        return [
+            {"symbol": asset.symbol, "tradable": bool(asset.tradable), "status": asset.status}
+            for asset in api.list_assets(**kwargs)
+        ]
+    return call("alpaca", "assets", fetch, kwargs)
+
+
+def alpaca_asset(api, symbol):
+    """One Alpaca asset as a plain dict (symbol, tradable, status), or None if it does not exist."""
+    def fetch():
+        try:
+            asset = api.get_asset(symbol)
+        except APIError as e:
+            if e.status_code == 404:
+                return None
+            raise
+        return {"symbol": asset.symbol, "tradable": bool(asset.tradable), "status": asset.status}
+    return call("alpaca", "asset", fetch, {"symbol": symbol})
+
+
+# --- HTTP APIs (Polygon, Alpha Vantage, RapidAPI) ---
+def _strip_secrets(url, params):
+    """Drop credential query parameters from a URL and params before keying a request."""
+    parts = urlsplit(url)
+    query = [(k, v) for k, v in parse_qsl(parts.query) if not _is_secret(k)]
+    url = urlunsplit(parts._replace(query=urlencode(query)))
+    return url, {k: v for k, v in (params or {}).items() if not _is_secret(k)}
+
+
+def _to_response(record):
+    """Rebuild a requests.Response from a recorded status, headers and body."""
+    response = requests.Response()
+    response.status_code = record["status_code"]
+    response.headers.update(record["headers"])
+    response._content = record["content"]
+    response.encoding = record["encoding"]
+    response.url = record["url"]
+    return response
+
+
+def http_get(service, url, params=None, headers=None, timeout=http_client.DEFAULT_TIMEOUT):
+    """
+    GET an HTTP API through the provider layer and the shared connection pools.
+
+    Headers and credential parameters are sent but are not part of the archive key.
+
+    Returns:
+        requests.Response: The live response or an equivalent rebuilt from the archive.
+    """
+    def fetch():
+        response = http_client.get(url, params=params, headers=headers, timeout=timeout)
+        if MODE == "live":
+            return response
+        return {
+            "status_code": response.status_code,
+            "headers": dict(response.headers),
+            "content": response.content,
+            "encoding": response.encoding,
+            "url": _strip_secrets(response.url, None)[0],
+        }
+
+    key_url, key_params = _strip_secrets(url, params)
+    result = call(service, "get", fetch, {"url": key_url, "params": key_params})
+    return result if MODE == "live" else _to_response(result)
+
+
+# --- OpenAI ---
+def openai_chat(client, **kwargs):
+    """`client.chat.completions.create(**kwargs)` through the provider layer."""
+    return call("openai", "chat", lambda: client.chat.completions.create(**kwargs), kwargs)
+
+
+def openai_embeddings(client, **kwargs):
+    """Embedding vectors from `client.embeddings.create(**kwargs)` through the provider layer."""
+    return call("openai", "embeddings",
+                lambda: [item.embedding for item in client.embeddings.create(**kwargs).data], kwargs)
@@ -0,0 +1,129 @@
+"""
+Derive coarser OHLCV bars locally from finer base bars.
+
+Bars are bucketed on the America/New_York clock: intraday buckets are anchored at the
+09:30 session open (09:30, 10:30, ... for hourly bars, like yfinance; the calendar's bar
+closes and the streaming aggregator use the same buckets), daily bars are
+labelled with the session date at midnight, weekly bars with the Monday of the week and
+monthly bars with the first of the month. When the base is intraday, bars outside the
+regular session (pre-market and after-hours) are dropped.
+"""
+import numpy as np
+import pandas as pd
+
+ny_timezone = "America/New_York"
+SESSION_OPEN_MINUTE = 9 * 60 + 30
+SESSION_CLOSE_MINUTE = 16 * 60
+
+# Canonical timeframe -> bucket length in minutes (0 for calendar buckets)
+TIMEFRAME_MINUTES = {"5Min": 5, "15Min": 15, "30Min": 30, "1H": 60, "1D": 0, "1W": 0, "1M": 0}
+
+# Spellings used by the UI, yfinance and Alpaca -> canonical timeframe
+ALIASES = {
+    "5m": "5Min", "5Min": "5Min",
+    "15m": "15Min", "15Min": "15Min",
+    "30m": "30Min", "30Min": "30Min",
+    "1h": "1H", "1H": "1H", "1Hour": "1H", "1 Hour": "1H",
+    "1d": "1D", "1D": "1D", "1Day": "1D", "1 Day": "1D",
+    "1wk": "1W", "1W": "1W", "1Week": "1W", "1 Week": "1W",
+    "1mo": "1M", "1M": "1M", "1Month": "1M", "1 Month": "1M",
+}
+
+# How each column is aggregated, by lower-case name; other columns are dropped
+AGGREGATIONS = {
+    "open": "first",
+    "high": "max",
+    "low": "min",
+    "close": "last",
+    "volume": "sum",
+    "trade_count": "sum",
+    "dividends": "sum",
+    "stock splits": "max",
+}
+
+
+def canonical_timeframe(timeframe):
+    """
+    Map any known timeframe spelling ("1 Hour", "1h", "1Hour", ...) to its canonical name.
+
+    Raises:
+        ValueError: If the timeframe is unknown.
+    """
+    try:
+        return ALIASES[timeframe]
+    except KeyError:
+        raise ValueError(f"Unsupported timeframe: {timeframe}") from None
+
+
+def is_intraday(timeframe):
+    """True for timeframes shorter than a session."""
+    return TIMEFRAME_MINUTES[canonical_timeframe(timeframe)] > 0
+
+
+def session_bucket_minute(minute_of_day, step):
+    """
+    Start of the session-anchored bucket holding a minute of the day (scalar or array):
+    with 60-minute buckets, 10:45 falls in the 10:30 bucket.
+    """
+    return SESSION_OPEN_MINUTE + (minute_of_day - SESSION_OPEN_MINUTE) // step * step
+
+
+def _bucket_labels(local, timeframe):
+    """Bucket start (naive New York time) for every bar in a naive New York index."""
+    days = local.normalize()
+    if timeframe == "1D":
+        return days
+    if timeframe == "1W":
+        return days - pd.to_timedelta(days.dayofweek, unit="D")
+    if timeframe == "1M":
+        return days - pd.to_timedelta(days.day - 1, unit="D")
+    step = TIMEFRAME_MINUTES[timeframe]
+    minutes = np.asarray(local.hour * 60 + local.minute)
+    bucket = session_bucket_minute(minutes, step)
+    return days + pd.to_timedelta(bucket, unit="min")
+
+
+def resample_ohlcv(bars, timeframe):
+    """
+    Aggregate OHLCV bars into a coarser timeframe.
+
+    Works with yfinance (Open/High/Low/Close/Volume) and Alpaca (open/high/low/close/volume,
+    trade_count, vwap) columns; `vwap` is re-weighted by volume.
+
+    Args:
+        bars (pd.DataFrame): Base bars indexed by bar open time (naive times are taken as
+            New York time).
+        timeframe (str): Target timeframe in any spelling known to `canonical_timeframe`.
+
+    Returns:
+        pd.DataFrame: Aggregated bars with the same columns and index timezone as `bars`.
+    """
+    timeframe = canonical_timeframe(timeframe)
+    if bars.empty:
+        return bars
+    tz = bars.index.tz
+    local = (bars.index.tz_convert(ny_timezone) if tz is not None else bars.index).tz_localize(None)
+
+    minutes = local.hour * 60 + local.minute
+    if (minutes != 0).any():  # Intraday base: keep the regular session only
+        in_session = (minutes >= SESSION_OPEN_MINUTE) & (minutes < SESSION_CLOSE_MINUTE)
+        bars, local = bars[in_session], local[in_session]
+
+    columns = {name.lower(): name for name in bars.columns}
+    agg = {columns[key]: how for key, how in AGGREGATIONS.items() if key in columns}
+    frame = bars[list(agg)]
+    vwap, volume = columns.get("vwap"), columns.get("volume")
+    if vwap and volume:
+        frame = frame.assign(_vwap_value=bars[vwap] * bars[volume])
+        agg["_vwap_value"] = "sum"
+
+    result = frame.groupby(_bucket_labels(local, timeframe)).agg(agg)
+    if vwap and volume:
+        value = result.pop("_vwap_value")
+        result[vwap] = value / result[volume].replace(0, np.nan)
+    result = result[[name for name in bars.columns if name in result.columns]]
+
+    index = pd.DatetimeIndex(result.index).tz_localize(ny_timezone)
+    result.index = index.tz_convert(tz) if tz is not None else index.tz_localize(None)
+    result.index.name = bars.index.name
+    return result
@@ -0,0 +1,341 @@
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pandas as pd
+import pytz
+
+import config
+import market_calendar
+import paper
+
+ny_timezone = pytz.timezone("America/New_York")
+
+# Length of one bar per Streamlit timeframe, used to find bar closes and detect overruns
+BAR_SECONDS = {
+    "1Day": 24 * 60 * 60,
+    "1Hour": 60 * 60,
+    "15Min": 15 * 60,
+    "5Min": 5 * 60
+}
+
+# Seconds to wait after a bar closes so the data feed has published it
+BAR_SETTLE_SECONDS = 5
+
+RUNS_FILE = config.cache_path("scheduler", "runs.jsonl")
+STATE_FILE = config.cache_path("scheduler", "state.json")
+MAX_REMEMBERED_RUNS = 500
+
+_state_lock = threading.Lock()
+
+
+def last_bar_close(now, timeframe):
+    """
+    Return the close time of the most recent completed bar.
+
+    Args:
+        now (datetime): Timezone-aware current time.
+        timeframe (str): Streamlit timeframe ("1Day", "1Hour", "15Min", "5Min").
+
+    Returns:
+        datetime: Close of the last completed bar of a trading session, in America/New_York.
+    """
+    return market_calendar.last_bar_close(now, timeframe)
+
+
+def next_bar_close(now, timeframe):
+    """Return the close time of the bar currently forming (skipping nights, weekends and holidays)."""
+    return market_calendar.next_bar_close(now, timeframe)
+
+
+def fetch_watchlist_closes(symbols, timeframe, bar_close, warmup_bars):
+    """
+    Fetch closing prices for every symbol in a single multi-symbol bar request.
+
+    Args:
+        symbols (list): Stock symbols to fetch.
+        timeframe (str): Streamlit timeframe ("1Day", "1Hour", "15Min", "5Min").
+        bar_close (datetime): Close of the last completed bar; later bars are excluded.
+        warmup_bars (int): Number of bars each symbol needs for the indicator to settle.
+
+    Returns:
+        pd.DataFrame: Close prices with one row per bar timestamp and one column per symbol.
+    """
+    # First session of the shortest window holding enough regular-session bars
+    start = ny_timezone.localize(market_calendar.window_start(bar_close, warmup_bars, timeframe).to_pydatetime())
+
+    bars = paper.fetch_bars(symbols, timeframe, start=start.isoformat(), end=bar_close.isoformat())
+    if bars.empty:
+        return pd.DataFrame()
+
+    if "symbol" not in bars.columns:
+        bars["symbol"] = symbols[0]
+    closes = bars.pivot_table(index=bars.index, columns="symbol", values="close")
+    return closes.sort_index().ffill()
+
+
+def calculate_rsi_frame(closes, period):
+    """
+    Calculate Wilder's RSI for every column of a price frame at once.
+
+    Args:
+        closes (pd.DataFrame): Close prices, one column per symbol.
+        period (int): RSI lookback period.
+
+    Returns:
+        pd.DataFrame: RSI values aligned with `closes`.
+    """
+    delta = closes.diff()
+    avg_gain = delta.clip(lower=0).ewm(alpha=1 / period, adjust=False).mean()
+    avg_loss = (-delta.clip(upper=0)).ewm(alpha=1 / period, adjust=False).mean()
+    rs = avg_gain / avg_loss.replace(0, 1e-10)
+    return 100 - (100 / (1 + rs))
+
+
+def evaluate_rsi_signals(closes, params):
+    """
+    Evaluate the Strategy Lab RSI rules for the whole watchlist in one vectorized pass.
+
+    Buys when RSI crosses over the buy threshold and sells when RSI is above the sell
+    threshold, mirroring `backtest.RSIStrategy`.
+
+    Args:
+        closes (pd.DataFrame): Close prices, one column per symbol.
+        params (dict): Strategy parameters (rsi_period, stop_loss, profit_target, thresholds).
+
+    Returns:
+        pd.DataFrame: One row per symbol with action, close, rsi, stop_price and target_price.
+    """
+    rsi = calculate_rsi_frame(closes, params.get("rsi_period", 14))
+    if len(rsi) < 2:
+        return pd.DataFrame(columns=["action", "close", "rsi", "stop_price", "target_price"])
+
+    buy_threshold = params.get("rsi_buy_threshold", 40)
+    sell_threshold = params.get("rsi_sell_threshold", 70)
+    current_rsi = rsi.iloc[-1]
+    previous_rsi = rsi.iloc[-2]
+    close = closes.iloc[-1]
+
+    buy = (previous_rsi < buy_threshold) & (current_rsi >= buy_threshold)
+    sell = current_rsi > sell_threshold
+
+    signals = pd.DataFrame({"close": close, "rsi": current_rsi})
+    signals["action"] = "hold"
+    signals.loc[buy, "action"] = "buy"
+    signals.loc[sell, "action"] = "sell"
+    signals["stop_price"] = close * (1 - (params.get("stop_loss") or 0))
+    signals["target_price"] = close * (1 + (params.get("profit_target") or 0))
+    return signals.dropna(subset=["close", "rsi"])
+
+
+# Vectorized strategy evaluators keyed by the Strategy Lab strategy type
+STRATEGIES = {
+    "RSI": evaluate_rsi_signals,
+}
+
+
+def build_orders(symbol, signal, has_position, params, run_tag):
+    """
+    Translate one symbol's signal into Alpaca order requests.
+
+    Every order gets a deterministic client_order_id derived from the run, so resubmitting
+    the same run is rejected by Alpaca instead of placing a duplicate trade.
+
+    Returns:
+        list: Keyword-argument dicts for `paper.submit_order`, in submission order.
+    """
+    qty = params.get("qty", 100)
+    orders = []
+    if signal["action"] == "buy" and not has_position:
+        orders.append({"symbol": symbol, "qty": qty, "side": "buy", "type": "market", "time_in_force": "day"})
+        if params.get("stop_loss"):
+            orders.append({"symbol": symbol, "qty": qty, "side": "sell", "type": "stop",
+                           "stop_price": paper.round_price(signal["stop_price"]), "time_in_force": "day"})
+        if params.get("profit_target"):
+            orders.append({"symbol": symbol, "qty": qty, "side": "sell", "type": "limit",
+                           "limit_price": paper.round_price(signal["target_price"]), "time_in_force": "day"})
+    elif signal["action"] == "sell" and has_position:
+        orders.append({"symbol": symbol, "qty": qty, "side": "sell", "type": "market", "time_in_force": "day"})
+
+    for order in orders:
+        order["client_order_id"] = f"{run_tag}-{symbol}-{order['side'][0]}{order['type'][0]}"[:48]
+    return orders
+
+
+def submit_symbol_orders(orders):
+    """
+    Submit one symbol's orders sequentially (the entry must precede its exits).
+
+    Returns:
+        tuple: (submitted count, list of error strings)
+    """
+    submitted, errors = 0, []
+    for order in orders:
+        try:
+            paper.submit_order(**order)
+            submitted += 1
+        except Exception as e:
+            if "client_order_id must be unique" in str(e):
+                continue  # Already placed by an earlier attempt of this run
+            errors.append(f"{order['symbol']}: {e}")
+            break
+    return submitted, errors
+
+
+def load_state():
+    """Load the set of completed run keys from disk."""
+    if not os.path.exists(STATE_FILE):
+        return {"completed_runs": []}
+    with open(STATE_FILE) as f:
+        return json.load(f)
+
+
+def save_state(state):
+    """Persist the completed run keys, keeping only the most recent ones."""
+    state["completed_runs"] = state["completed_runs"][-MAX_REMEMBERED_RUNS:]
+    tmp_path = STATE_FILE + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, STATE_FILE)
+
+
+def record_run(timing):
+    """Append one run's timing record to the runs log."""
+    with open(RUNS_FILE, "a") as f:
+        f.write(json.dumps(timing) + "\n")
+
+
+def load_run_history(limit=100):
+    """
+    Load the most recent run timing records.
+
+    Returns:
+        pd.DataFrame: One row per run with phase durations and order counts.
+    """
+    if not os.path.exists(RUNS_FILE):
+        return pd.DataFrame()
+    with open(RUNS_FILE) as f:
+        lines = f.readlines()[-limit:]
+    return pd.DataFrame([json.loads(line) for line in lines])
+
+
+def run_cycle(symbols, timeframe, strategy_type, params, bar_close, max_workers=8):
+    """
+    Evaluate the strategy across the watchlist for one bar close and submit orders.
+
+    A run is identified by strategy, timeframe and bar close; a run that already completed
+    is skipped, so retries and overlapping schedulers never double-trade.
+
+    Args:
+        symbols (list): Watchlist symbols.
+        timeframe (str): Streamlit timeframe ("1Day", "1Hour", "15Min", "5Min").
+        strategy_type (str): Key into STRATEGIES (e.g., "RSI").
+        params (dict): Strategy parameters (rsi_period, qty, stop_loss, profit_target).
+        bar_close (datetime): Close of the bar being evaluated.
+        max_workers (int): Maximum number of symbols submitting orders concurrently.
+
+    Returns:
+        dict: Timing record for the run, or None if the run had already completed.
+    """
+    run_key = f"{strategy_type}:{timeframe}:{bar_close.isoformat()}"
+    with _state_lock:
+        state = load_state()
+        if run_key in state["completed_runs"]:
+            return None
+
+    timing = {"run_key": run_key, "started": datetime.now(ny_timezone).isoformat(), "symbols": len(symbols)}
+    started = time.perf_counter()
+
+    warmup_bars = params.get("rsi_period", 14) * 5
+    closes = fetch_watchlist_closes(symbols, timeframe, bar_close, warmup_bars)
+    timing["fetch_s"] = round(time.perf_counter() - started, 4)
+
+    phase = time.perf_counter()
+    signals = STRATEGIES[strategy_type](closes, params) if not closes.empty else pd.DataFrame()
+    actionable = signals[signals["action"] != "hold"] if not signals.empty else signals
+    timing["evaluate_s"] = round(time.perf_counter() - phase, 4)
+
+    phase = time.perf_counter()
+    held = {pos.symbol for pos in paper.list_positions()} if not actionable.empty else set()
+    run_tag = f"sched-{strategy_type}-{bar_close.astimezone(ny_timezone):%y%m%d%H%M}"
+    submitted, errors = 0, []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(submit_symbol_orders, build_orders(symbol, signal, symbol in held, params, run_tag))
+            for symbol, signal in actionable.iterrows()
+        ]
+        for future in futures:
+            count, symbol_errors = future.result()
+            submitted += count
+            errors.extend(symbol_errors)
+    timing["orders_s"] = round(time.perf_counter() - phase, 4)
+
+    timing["total_s"] = round(time.perf_counter() - started, 4)
+    timing["signals"] = int(len(actionable))
+    timing["orders"] = submitted
+    timing["errors"] = errors
+    timing["overran"] = timing["total_s"] > BAR_SECONDS[timeframe]
+    record_run(timing)
+
+    if not errors:
+        with _state_lock:
+            state = load_state()
+            state["completed_runs"].append(run_key)
+            save_state(state)
+    return timing
+
+
+def run_forever(symbols, timeframe, strategy_type, params, max_workers=8, stop_event=None):
+    """
+    Run the strategy on every bar close until `stop_event` is set.
+
+    Args:
+        symbols (list): Watchlist symbols.
+        timeframe (str): Streamlit timeframe ("1Day", "1Hour", "15Min", "5Min").
+        strategy_type (str): Key into STRATEGIES (e.g., "RSI").
+        params (dict): Strategy parameters.
+        max_workers (int): Maximum number of symbols submitting orders concurrently.
+        stop_event (threading.Event): Optional event used to stop the loop.
+    """
+    stop_event = stop_event or threading.Event()
+    while not stop_event.is_set():
+        now = datetime.now(ny_timezone)
+        close = next_bar_close(now, timeframe)
+        if stop_event.wait((close - now).total_seconds() + BAR_SETTLE_SECONDS):
+            break
+        try:
+            timing = run_cycle(symbols, timeframe, strategy_type, params, close, max_workers)
+            if timing:
+                print(f"{timing['run_key']}: {timing['signals']} signals, {timing['orders']} orders in {timing['total_s']:.2f}s")
+        except Exception as e:
+            print(f"❌ Scheduler run failed for {close.isoformat()}: {e}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Paper-trade a strategy across a watchlist on every bar close.")
+    parser.add_argument("--symbols", required=True, help="Comma-separated watchlist, e.g. AAPL,MSFT,NVDA")
+    parser.add_argument("--timeframe", default="5Min", choices=list(BAR_SECONDS))
+    parser.add_argument("--strategy", default="RSI", choices=list(STRATEGIES))
+    parser.add_argument("--rsi-period", type=int, default=14)
+    parser.add_argument("--qty", type=int, default=100)
+    parser.add_argument("--stop-loss", type=float, default=0.10)
+    parser.add_argument("--profit-target", type=float, default=0.30)
+    parser.add_argument("--max-workers", type=int, default=8)
+    args = parser.parse_args()
+
+    run_forever(
+        [s.strip().upper() for s in args.symbols.split(",") if s.strip()],
+        args.timeframe,
+        args.strategy,
+        {
+            "rsi_period": args.rsi_period,
+            "qty": args.qty,
+            "stop_loss": args.stop_loss,
+            "profit_target": args.profit_target
+        },
+        args.max_workers
+    )
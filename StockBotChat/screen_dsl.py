@@ -0,0 +1,378 @@
+"""
+A small condition language for the stock screener.
+
+    close crosses_above sma(8) and rsi(14) > 30 and volume > 2 * avg_volume(20)
+
+Expressions parse into a tree of hashable tuples. Evaluating a tree over a panel (bars ×
+symbols) computes each distinct subtree once, so `sma(8)` used in several places is only
+rolled once, and every operation runs on the whole universe at the same time.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+FIELDS = {"open": "Open", "high": "High", "low": "Low", "close": "Close", "volume": "Volume"}
+COMPARISONS = {">", "<", ">=", "<=", "==", "!=", "crosses_above", "crosses_below"}
+CONDITIONS = ("compare", "and", "or", "not")  # Node kinds that evaluate to booleans
+
+# Function name -> (number of window arguments, default series)
+FUNCTIONS = {
+    "sma": (1, "close"),
+    "ema": (1, "close"),
+    "rsi": (1, "close"),
+    "avg_volume": (1, "volume"),
+    "highest": (1, "high"),
+    "lowest": (1, "low"),
+    "roc": (1, "close"),  # Percent change over n bars
+    "prev": (0, None),  # prev(series) or prev(series, n): value n bars ago
+}
+
+_TOKEN_RE = re.compile(r"\s*(?:(\d+\.?\d*|\.\d+)|([A-Za-z_][A-Za-z_0-9]*)|(>=|<=|==|!=|[-+*/(),<>]))")
+
+
+class ScreenSyntaxError(ValueError):
+    """Raised when a screening expression cannot be parsed."""
+
+
+def tokenize(text):
+    """Split an expression into (kind, value) tokens."""
+    tokens, pos = [], 0
+    text = text.strip()
+    while pos < len(text):
+        match = _TOKEN_RE.match(text, pos)
+        if not match or match.end() == pos:
+            raise ScreenSyntaxError(f"Unexpected character at position {pos}: {text[pos:pos + 10]!r}")
+        number, name, symbol = match.groups()
+        if number is not None:
+            tokens.append(("num", float(number)))
+        elif name is not None:
+            tokens.append(("name", name.lower()))
+        else:
+            tokens.append(("op", symbol))
+        pos = match.end()
+    return tokens
+
+
+class _Parser:
+    """Recursive-descent parser: or > and > not > comparison > sum > product > unary > atom."""
+
+    def __init__(self, text):
+        self.tokens = tokenize(text)
+        self.pos = 0
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def take(self, value=None):
+        kind, token = self.peek()
+        if kind is None or (value is not None and token != value):
+            raise ScreenSyntaxError(f"Expected {value or 'a value'} but found {token or 'end of expression'}")
+        self.pos += 1
+        return kind, token
+
+    def parse(self):
+        node = self.parse_or()
+        if self.pos != len(self.tokens):
+            raise ScreenSyntaxError(f"Unexpected {self.peek()[1]!r}")
+        return node
+
+    @staticmethod
+    def condition(node, op):
+        """Check that an operand of and/or/not is a condition."""
+        if node[0] not in CONDITIONS:
+            raise ScreenSyntaxError(f"Operands of '{op}' must be conditions (e.g., close > sma(20)), not values.")
+        return node
+
+    @staticmethod
+    def value(node, op):
+        """Check that an operand of arithmetic, a comparison or a function is a value."""
+        if node[0] in CONDITIONS:
+            raise ScreenSyntaxError(f"Operands of '{op}' must be values, not conditions; combine conditions with and/or.")
+        return node
+
+    def parse_or(self):
+        node = self.parse_and()
+        while self.peek()[1] == "or":
+            self.take()
+            node = ("or", self.condition(node, "or"), self.condition(self.parse_and(), "or"))
+        return node
+
+    def parse_and(self):
+        node = self.parse_not()
+        while self.peek()[1] == "and":
+            self.take()
+            node = ("and", self.condition(node, "and"), self.condition(self.parse_not(), "and"))
+        return node
+
+    def parse_not(self):
+        if self.peek()[1] == "not":
+            self.take()
+            return ("not", self.condition(self.parse_not(), "not"))
+        return self.parse_comparison()
+
+    def parse_comparison(self):
+        node = self.parse_sum()
+        if self.peek()[1] in COMPARISONS:
+            _, op = self.take()
+            node = ("compare", op, self.value(node, op), self.value(self.parse_sum(), op))
+        return node
+
+    def parse_sum(self):
+        node = self.parse_product()
+        while self.peek()[1] in ("+", "-"):
+            _, op = self.take()
+            node = ("arith", op, self.value(node, op), self.value(self.parse_product(), op))
+        return node
+
+    def parse_product(self):
+        node = self.parse_unary()
+        while self.peek()[1] in ("*", "/"):
+            _, op = self.take()
+            node = ("arith", op, self.value(node, op), self.value(self.parse_unary(), op))
+        return node
+
+    def parse_unary(self):
+        if self.peek()[1] == "-":
+            self.take()
+            return ("arith", "*", ("num", -1.0), self.value(self.parse_unary(), "-"))
+        return self.parse_atom()
+
+    def parse_atom(self):
+        kind, token = self.take()
+        if kind == "num":
+            return ("num", token)
+        if token == "(":
+            node = self.parse_or()
+            self.take(")")
+            return node
+        if kind != "name":
+            raise ScreenSyntaxError(f"Unexpected {token!r}")
+        if token in FIELDS:
+            return ("field", token)
+        if token not in FUNCTIONS:
+            raise ScreenSyntaxError(f"Unknown name {token!r}; fields are {', '.join(FIELDS)} "
+                                    f"and functions are {', '.join(FUNCTIONS)}")
+        self.take("(")
+        args = [self.value(self.parse_sum(), token)]
+        while self.peek()[1] == ",":
+            self.take()
+            args.append(self.value(self.parse_sum(), token))
+        self.take(")")
+        return self.build_call(token, args)
+
+    @staticmethod
+    def window(arg, usage):
+        """A window or bar-count argument as an int; it must be a positive integer literal."""
+        if arg[0] != "num" or arg[1] < 1 or arg[1] != int(arg[1]):
+            raise ScreenSyntaxError(f"Bar counts must be positive whole numbers: {usage}")
+        return int(arg[1])
+
+    @staticmethod
+    def series(arg, usage):
+        """A function's series argument; it must depend on price or volume data."""
+        if not _uses_data(arg):
+            raise ScreenSyntaxError(f"The series must be a field or indicator, not a constant: {usage}")
+        return arg
+
+    @classmethod
+    def build_call(cls, name, args):
+        """Normalize a call to (call, name, window, series) so equal calls share one node."""
+        windows, default = FUNCTIONS[name]
+        if name == "prev":
+            usage = "prev(close, 1)"
+            if len(args) not in (1, 2):
+                raise ScreenSyntaxError(f"prev takes a series and an optional bar count: {usage}")
+            return ("call", "prev", cls.window(args[1], usage) if len(args) == 2 else 1, cls.series(args[0], usage))
+        usage = f"{name}(14)"
+        if len(args) > windows + 1:
+            raise ScreenSyntaxError(f"{name} takes a window length and an optional series: {usage}")
+        series = cls.series(args[1], usage) if len(args) > 1 else ("field", default)
+        return ("call", name, cls.window(args[0], usage), series)
+
+
+def _uses_data(node):
+    """Whether a tree reads any field (otherwise it is the same constant for every bar and symbol)."""
+    if node[0] == "field":
+        return True
+    return any(_uses_data(child) for child in node[1:] if isinstance(child, tuple))
+
+
+def parse(text):
+    """
+    Parse a screening expression into a tree of tuples.
+
+    Raises:
+        ScreenSyntaxError: If the expression is malformed.
+    """
+    if not text or not text.strip():
+        raise ScreenSyntaxError("Expression is empty.")
+    node = _Parser(text).parse()
+    if node[0] not in CONDITIONS:
+        raise ScreenSyntaxError("Expression must be a condition (use a comparison such as rsi(14) < 30).")
+    if not _uses_data(node):
+        raise ScreenSyntaxError("Expression must refer to price or volume (e.g., close > 10), not only constants.")
+    return node
+
+
+def lookback_bars(node):
+    """Bars of history an expression needs before its first valid value."""
+    if node[0] == "call":
+        return node[2] + lookback_bars(node[3])
+    if node[0] == "compare" and node[1] in ("crosses_above", "crosses_below"):
+        return 1 + max(lookback_bars(node[2]), lookback_bars(node[3]))
+    return max([lookback_bars(child) for child in node[1:] if isinstance(child, tuple)], default=0)
+
+
+def _rsi(close, period):
+    """Simple-average RSI, matching the screener's reversal breakout."""
+    delta = close.diff()
+    gain = delta.where(delta > 0, 0).rolling(window=period).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
+    return 100 - 100 / (1 + gain / loss.replace(0, 1e-10))
+
+
+def _call(name, window, series):
+    if name in ("sma", "avg_volume"):
+        return series.rolling(window=window).mean()
+    if name == "ema":
+        return series.ewm(span=window, adjust=False).mean()
+    if name == "rsi":
+        return _rsi(series, window)
+    if name == "highest":
+        return series.rolling(window=window).max()
+    if name == "lowest":
+        return series.rolling(window=window).min()
+    if name == "roc":
+        return series.pct_change(window) * 100
+    return series.shift(window)  # prev
+
+
+def _mask_undefined(result, operands):
+    """
+    Turn a comparison into 1.0 (true), 0.0 (false) or NaN (unknown) per bar and symbol; it
+    is unknown wherever an operand is NaN, e.g. while an indicator warms up.
+
+    A plain NaN comparison is False (and `!=` True), which `not` would turn into a match;
+    and/or/not instead follow three-valued logic (`_logic`), and unknown never matches.
+    """
+    if not isinstance(result, pd.DataFrame):
+        return float(result)
+    undefined = np.zeros(result.shape, dtype=bool)
+    for operand in operands:
+        if isinstance(operand, pd.DataFrame):
+            undefined |= operand.isna().to_numpy()
+    return pd.DataFrame(np.where(undefined, np.nan, result.to_numpy(dtype=np.float64)),
+                        index=result.index, columns=result.columns)
+
+
+def _logic(op, left, right=None):
+    """Three-valued and/or/not over 1.0/0.0/NaN conditions (NumPy arrays, not per-column booleans)."""
+    frame = next((x for x in (left, right) if isinstance(x, pd.DataFrame)), None)
+    a = np.asarray(left, dtype=np.float64)
+    if op == "not":
+        values = 1.0 - a
+    else:
+        b = np.asarray(right, dtype=np.float64)
+        decided = 0.0 if op == "and" else 1.0  # Either side alone decides the result
+        unknown = np.isnan(a) | np.isnan(b)
+        values = np.where((a == decided) | (b == decided), decided, np.where(unknown, np.nan, 1.0 - decided))
+    if frame is None:
+        return float(values)
+    return pd.DataFrame(np.broadcast_to(values, frame.shape), index=frame.index, columns=frame.columns)
+
+
+def evaluate(node, panel, memo=None):
+    """
+    Evaluate an expression tree over a panel of bars for many symbols at once.
+
+    Args:
+        node (tuple): Tree from `parse`.
+        panel (dict): Field name ("Close", "Volume", ...) -> DataFrame (bars × symbols).
+        memo (dict): Results by subtree; identical subtrees are evaluated once.
+
+    Returns:
+        pd.DataFrame or float: Values per bar and symbol; conditions are 1.0 (true), 0.0
+            (false) or NaN (unknown, e.g. during indicator warmup).
+    """
+    memo = {} if memo is None else memo
+    if node in memo:
+        return memo[node]
+
+    kind = node[0]
+    if kind == "num":
+        result = node[1]
+    elif kind == "field":
+        result = panel[FIELDS[node[1]]]
+    elif kind == "call":
+        result = _call(node[1], node[2], evaluate(node[3], panel, memo))
+    elif kind == "arith":
+        left, right = evaluate(node[2], panel, memo), evaluate(node[3], panel, memo)
+        op = node[1]
+        result = left + right if op == "+" else left - right if op == "-" else left * right if op == "*" else left / right
+    elif kind == "compare":
+        left, right = evaluate(node[2], panel, memo), evaluate(node[3], panel, memo)
+        op = node[1]
+        operands = [left, right]
+        if op in ("crosses_above", "crosses_below"):
+            prev_left = left.shift(1) if isinstance(left, pd.DataFrame) else left
+            prev_right = right.shift(1) if isinstance(right, pd.DataFrame) else right
+            operands += [prev_left, prev_right]
+            if op == "crosses_above":
+                result = (left > right) & (prev_left <= prev_right)
+            else:
+                result = (left < right) & (prev_left >= prev_right)
+        else:
+            result = {">": np.greater, "<": np.less, ">=": np.greater_equal, "<=": np.less_equal,
+                      "==": np.equal, "!=": np.not_equal}[op](left, right)
+        result = _mask_undefined(result, operands)
+    elif kind in ("and", "or"):
+        result = _logic(kind, evaluate(node[1], panel, memo), evaluate(node[2], panel, memo))
+    else:  # not
+        result = _logic("not", evaluate(node[1], panel, memo))
+
+    memo[node] = result
+    return result
+
+
+def build_panel(frames):
+    """
+    Align per-symbol OHLCV frames into one DataFrame (bars × symbols) per field.
+
+    Args:
+        frames (dict): Symbol -> OHLCV DataFrame.
+
+    Returns:
+        dict: Field -> DataFrame, indexed by the union of bar timestamps.
+    """
+    return {field: pd.DataFrame({symbol: df[field] for symbol, df in frames.items()}).sort_index()
+            for field in FIELDS.values()}
+
+
+def first_matches(condition, close, skip_bars=0):
+    """
+    First bar per symbol where a condition holds.
+
+    Args:
+        condition (pd.DataFrame): Condition bars × symbols from `evaluate` (1.0 where it holds).
+        close (pd.DataFrame): Closing prices on the same grid.
+        skip_bars (int): Bars to ignore while indicators warm up, counted per symbol from its
+            first bar (symbols whose history starts later warm up later).
+
+    Returns:
+        list: {"symbol", "trend_found_date", "price_at_trend_found", "current_price"} per matching symbol.
+    """
+    hits = condition.to_numpy() == 1.0  # NaN (unknown) never matches
+    has_bar = close.notna().to_numpy()
+    first_bar = np.where(has_bar.any(axis=0), has_bar.argmax(axis=0), len(close))
+    hits[np.arange(len(close))[:, None] < first_bar + skip_bars] = False
+    rows = hits.argmax(axis=0)
+    matched = hits[rows, np.arange(hits.shape[1])]
+    closes = close.to_numpy()
+    last_closes = close.ffill().iloc[-1]
+    return [{
+        "symbol": symbol,
+        "trend_found_date": close.index[row].date(),
+        "price_at_trend_found": closes[row, col],
+        "current_price": last_closes[symbol],
+    } for col, (symbol, row) in enumerate(zip(close.columns, rows)) if matched[col]]
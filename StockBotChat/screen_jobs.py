@@ -0,0 +1,127 @@
+import itertools
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+JOB_WORKERS = int(os.getenv("STOCKBOT_SCREEN_WORKERS", "2"))  # Screens running at once per process
+CHUNK_SIZE = 20  # Symbols per progress update and cancellation check
+MAX_FINISHED_JOBS = 20  # Finished jobs kept for re-display
+FINISHED_JOB_TTL = 60 * 60  # Seconds a finished job is kept
+
+QUEUED, RUNNING, DONE, CANCELLED, FAILED = "queued", "running", "done", "cancelled", "failed"
+
+_executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="screen-job")
+_lock = threading.Lock()
+_jobs = {}
+_ids = itertools.count(1)
+
+
+class ScreenJob:
+    """A screening run executing in the background, readable from any Streamlit session."""
+
+    def __init__(self, label, params):
+        self.id = f"{int(time.time())}-{next(_ids)}"
+        self.label = label
+        self.params = params
+        self.status = QUEUED
+        self.total = 0
+        self.completed = 0
+        self.results = []
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def active(self):
+        return self.status in (QUEUED, RUNNING)
+
+    @property
+    def progress(self):
+        return self.completed / self.total if self.total else 0.0
+
+    def cancel(self):
+        """Ask the job to stop after the chunk in progress; results so far are kept."""
+        self._cancel.set()
+
+    def snapshot(self):
+        """Consistent copy of the job's progress and partial results."""
+        with self._lock:
+            return {
+                "id": self.id, "label": self.label, "status": self.status, "total": self.total,
+                "completed": self.completed, "results": list(self.results), "error": self.error,
+                "elapsed": (self.finished_at or time.time()) - self.created_at,
+            }
+
+    def _finish(self, status, error=None):
+        # finished_at is set before the status turns terminal, so _prune never sees an
+        # inactive job without it
+        with self._lock:
+            self.error = error
+            self.finished_at = time.time()
+            self.status = status
+
+    def _run(self, prepare, process_chunk, chunk_size):
+        self.status = RUNNING
+        try:
+            items = prepare()
+            self.total = len(items)
+            for start in range(0, len(items), chunk_size):
+                if self._cancel.is_set():
+                    self._finish(CANCELLED)
+                    return
+                chunk = items[start:start + chunk_size]
+                results = process_chunk(chunk)
+                with self._lock:
+                    self.results.extend(results)
+                    self.completed += len(chunk)
+            self._finish(CANCELLED if self._cancel.is_set() and self.completed < self.total else DONE)
+        except Exception as e:
+            traceback.print_exc()
+            self._finish(FAILED, f"{type(e).__name__}: {e}")
+
+
+def _prune():
+    """Forget finished jobs that are too old or beyond the retention count."""
+    now = time.time()
+    finished = sorted((job for job in _jobs.values() if not job.active), key=lambda job: job.finished_at, reverse=True)
+    for i, job in enumerate(finished):
+        if i >= MAX_FINISHED_JOBS or now - job.finished_at > FINISHED_JOB_TTL:
+            del _jobs[job.id]
+
+
+def submit(label, params, prepare, process_chunk, chunk_size=CHUNK_SIZE):
+    """
+    Start a screening job on the worker pool.
+
+    Args:
+        label (str): Short description shown in the UI.
+        params (dict): Parameters the job was started with (for display and re-use).
+        prepare (callable): Returns the list of items (symbols) to process; runs in the worker.
+        process_chunk (callable): Screens a list of items and returns a list of results.
+        chunk_size (int): Items per progress update.
+
+    Returns:
+        ScreenJob: The queued job.
+    """
+    job = ScreenJob(label, params)
+    with _lock:
+        _prune()
+        _jobs[job.id] = job
+    _executor.submit(job._run, prepare, process_chunk, chunk_size)
+    return job
+
+
+def get_job(job_id):
+    """Look up a job by ID (None if unknown or pruned)."""
+    with _lock:
+        return _jobs.get(job_id)
+
+
+def list_jobs():
+    """All retained jobs, newest first."""
+    with _lock:
+        return sorted(_jobs.values(), key=lambda job: job.created_at, reverse=True)
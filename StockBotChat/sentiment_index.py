@@ -0,0 +1,204 @@
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+import config
+
+INDEX_FILE = config.cache_path("sentiment", "sentiment.sqlite")
+# Files written by earlier versions; imported into INDEX_FILE on first use
+LEGACY_ARTICLES_FILE = config.cache_path("sentiment", "articles.jsonl")
+LEGACY_DAILY_FILE = config.cache_path("sentiment", "daily.parquet")
+
+# Alpha Vantage labels scores >= 0.15 as (somewhat) bullish and <= -0.15 as bearish
+BULLISH_THRESHOLD = 0.15
+BEARISH_THRESHOLD = -0.15
+
+DAILY_COLUMNS = ["ticker", "date", "articles", "score_sum", "weighted_sum", "relevance_sum"]
+
+_local = threading.local()
+_init_lock = threading.Lock()
+_initialized = False
+
+
+def _connect():
+    """
+    This thread's connection to the sentiment store (SQLite, WAL mode), shared by every
+    Streamlit worker: articles are deduplicated by URL and daily sums are upserted in the
+    same transaction, so concurrent ingests never drop each other's updates.
+    """
+    global _initialized
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(INDEX_FILE, timeout=30, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        _local.conn = conn
+    if not _initialized:
+        with _init_lock:
+            if not _initialized:
+                conn.execute("CREATE TABLE IF NOT EXISTS articles (url TEXT PRIMARY KEY, article TEXT)")
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS daily (
+                        ticker TEXT, date TEXT, articles INTEGER, score_sum REAL,
+                        weighted_sum REAL, relevance_sum REAL, PRIMARY KEY (ticker, date)
+                    )
+                """)
+                _import_legacy(conn)
+                _initialized = True
+    return conn
+
+
+def _transaction(conn, work):
+    """Run `work(conn)` in a write transaction and return its result."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        result = work(conn)
+        conn.execute("COMMIT")
+        return result
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def _upsert_daily(conn, rows):
+    conn.executemany("""
+        INSERT INTO daily (ticker, date, articles, score_sum, weighted_sum, relevance_sum)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT (ticker, date) DO UPDATE SET
+            articles = articles + excluded.articles,
+            score_sum = score_sum + excluded.score_sum,
+            weighted_sum = weighted_sum + excluded.weighted_sum,
+            relevance_sum = relevance_sum + excluded.relevance_sum
+    """, rows)
+
+
+def _import_legacy(conn):
+    """Move a store written as articles.jsonl + daily.parquet into the SQLite store."""
+    def work(conn):
+        # Checked inside the write transaction so only one process imports the files
+        if os.path.exists(LEGACY_ARTICLES_FILE):
+            with open(LEGACY_ARTICLES_FILE) as f:
+                articles = [json.loads(line) for line in f if line.strip()]
+            conn.executemany("INSERT OR IGNORE INTO articles VALUES (?, ?)",
+                             [(a["url"], json.dumps(a)) for a in articles if a.get("url")])
+            os.replace(LEGACY_ARTICLES_FILE, f"{LEGACY_ARTICLES_FILE}.imported")
+        if os.path.exists(LEGACY_DAILY_FILE):
+            daily = pd.read_parquet(LEGACY_DAILY_FILE)[DAILY_COLUMNS]
+            _upsert_daily(conn, list(daily.itertuples(index=False, name=None)))
+            os.replace(LEGACY_DAILY_FILE, f"{LEGACY_DAILY_FILE}.imported")
+
+    if os.path.exists(LEGACY_ARTICLES_FILE) or os.path.exists(LEGACY_DAILY_FILE):
+        _transaction(conn, work)
+
+
+def ingest(feed):
+    """
+    Store new articles and fold their ticker sentiment into the daily index.
+
+    Articles already ingested (by URL, by any process) are skipped, so feeding overlapping
+    or cached responses is safe, and articles without a publication time are skipped.
+    Aggregates are stored as sums so each ingest is additive.
+
+    Args:
+        feed (list): Raw Alpha Vantage NEWS_SENTIMENT articles.
+
+    Returns:
+        int: Number of new articles ingested.
+    """
+    articles = {a["url"]: a for a in feed if a.get("url")}
+    if not articles:
+        return 0
+
+    def work(conn):
+        rows, added = [], 0
+        for url, article in articles.items():
+            if not article.get("time_published"):
+                continue  # Cannot be placed on a day
+            if not conn.execute("INSERT OR IGNORE INTO articles VALUES (?, ?)", (url, json.dumps(article))).rowcount:
+                continue  # Already ingested
+            added += 1
+            day = datetime.strptime(article["time_published"][:8], "%Y%m%d").date().isoformat()
+            for ts in article.get("ticker_sentiment", []):
+                score = float(ts.get("ticker_sentiment_score", 0))
+                relevance = float(ts.get("relevance_score", 0))
+                rows.append((ts["ticker"], day, 1, score, score * relevance, relevance))
+        _upsert_daily(conn, rows)
+        return added
+
+    return _transaction(_connect(), work)
+
+
+def _daily_rows(ticker, start, end):
+    """Daily sums for a ticker with start <= date <= end (ISO dates), indexed by date."""
+    rows = _connect().execute(
+        "SELECT date, articles, score_sum, weighted_sum, relevance_sum FROM daily "
+        "WHERE ticker = ? AND date >= ? AND date <= ? ORDER BY date",
+        (ticker, start, end)
+    ).fetchall()
+    return pd.DataFrame(rows, columns=DAILY_COLUMNS[1:]).set_index("date")
+
+
+def sentiment_trend(ticker, days=90, end=None):
+    """
+    Daily sentiment for a ticker over a trailing window.
+
+    Args:
+        ticker (str): Stock symbol (e.g., "NVDA").
+        days (int): Number of calendar days to include.
+        end (date): Last day of the window (defaults to today).
+
+    Returns:
+        pd.DataFrame: Indexed by date with articles, avg_score and weighted_score
+            (relevance-weighted) columns; days without articles are omitted.
+    """
+    end = end or datetime.now().date()
+    rows = _daily_rows(ticker.upper(), (end - timedelta(days=days)).isoformat(), end.isoformat())
+    if rows.empty:
+        return pd.DataFrame(columns=["articles", "avg_score", "weighted_score"])
+    trend = pd.DataFrame({
+        "articles": rows["articles"].astype(int),
+        "avg_score": rows["score_sum"] / rows["articles"],
+        "weighted_score": rows["weighted_sum"] / rows["relevance_sum"].where(rows["relevance_sum"] > 0),
+    })
+    trend.index = pd.to_datetime(trend.index)
+    return trend
+
+
+def window_sentiment(ticker, days=7, end=None):
+    """Relevance-weighted sentiment over a trailing window, or None if there is no coverage."""
+    end = end or datetime.now().date()
+    rows = _daily_rows(ticker.upper(), (end - timedelta(days=days)).isoformat(), end.isoformat())
+    if rows.empty or rows["relevance_sum"].sum() == 0:
+        return None
+    return float(rows["weighted_sum"].sum() / rows["relevance_sum"].sum())
+
+
+def get_sentiment_trend(ticker, days=90):
+    """
+    Chatbot tool: summarize a ticker's news sentiment trend from the local index.
+
+    Args:
+        ticker (str): Stock symbol.
+        days (int): Trailing window in days.
+
+    Returns:
+        str: Summary of coverage, average sentiment and direction of the trend.
+    """
+    days = int(days)
+    trend = sentiment_trend(ticker, days)
+    if trend.empty:
+        return f"No news sentiment has been collected for {ticker.upper()} in the last {days} days."
+
+    weekly = trend["weighted_score"].resample("W").mean().dropna()
+    overall = (trend["weighted_score"] * trend["articles"]).sum() / trend["articles"].sum()
+    label = "bullish" if overall >= BULLISH_THRESHOLD else "bearish" if overall <= BEARISH_THRESHOLD else "neutral"
+    direction = ""
+    if len(weekly) >= 2:
+        change = weekly.iloc[-1] - weekly.iloc[0]
+        direction = f" Weekly sentiment moved from {weekly.iloc[0]:.3f} to {weekly.iloc[-1]:.3f} ({'improving' if change > 0 else 'deteriorating'})."
+    return (f"{ticker.upper()} news sentiment over the last {days} days: {int(trend['articles'].sum())} articles on "
+            f"{len(trend)} days, average score {overall:.3f} ({label}).{direction}")
@@ -0,0 +1,254 @@
+import functools
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+import pyarrow as pa
+
+import config
+import metrics
+import tracing
+
+# "sqlite" shares entries between every Streamlit worker on the host; "memory" keeps them
+# per process (like st.cache_data); "none" disables caching.
+BACKEND = os.getenv("STOCKBOT_SHARED_CACHE", "sqlite")
+CACHE_FILE = os.getenv("STOCKBOT_SHARED_CACHE_FILE", config.cache_path("shared", "cache.sqlite"))
+MAX_BYTES = int(float(os.getenv("STOCKBOT_SHARED_CACHE_MB", "512")) * 2 ** 20)
+TOUCH_INTERVAL = 60  # Seconds between LRU timestamp updates for a frequently read key
+
+
+# --- Serialization ---
+def serialize(value):
+    """
+    Encode a value for storage: DataFrames and Series as Arrow IPC, plain data as JSON,
+    anything else as pickle.
+
+    Returns:
+        tuple: (format, bytes)
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        is_series = isinstance(value, pd.Series)
+        frame = value.to_frame("__series__") if is_series else value
+        table = pa.Table.from_pandas(frame, preserve_index=True)
+        if is_series:
+            table = table.replace_schema_metadata({
+                **table.schema.metadata, b"series_name": json.dumps(value.name, default=str).encode()
+            })
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return ("arrow-series" if is_series else "arrow"), sink.getvalue().to_pybytes()
+    try:
+        data = json.dumps(value)
+        if json.loads(data) == value:  # Tuples and non-string keys do not survive JSON
+            return "json", data.encode()
+    except (TypeError, ValueError):
+        pass
+    return "pickle", pickle.dumps(value)
+
+
+def deserialize(fmt, data):
+    """Decode a value written by `serialize`."""
+    if fmt in ("arrow", "arrow-series"):
+        table = pa.ipc.open_stream(data).read_all()
+        frame = table.to_pandas()
+        if fmt == "arrow":
+            return frame
+        series = frame["__series__"]
+        series.name = json.loads(table.schema.metadata[b"series_name"])
+        return series
+    if fmt == "json":
+        return json.loads(data)
+    return pickle.loads(data)
+
+
+# --- Backends ---
+class SQLiteCache:
+    """
+    Host-wide cache in a single SQLite file (WAL mode), safe for concurrent processes.
+
+    Entries expire after their TTL; when the stored bytes exceed `max_bytes`, the least
+    recently used entries are evicted.
+    """
+
+    def __init__(self, path, max_bytes=MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.local = threading.local()
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY, format TEXT, value BLOB, size INTEGER,
+                    expires_at REAL, accessed_at REAL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)")
+
+    def _connect(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    def get(self, key):
+        """Return (True, value) for a live entry, else (False, None)."""
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT format, value, expires_at, accessed_at FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return False, None
+        fmt, data, expires_at, accessed_at = row
+        now = time.time()
+        if expires_at < now:
+            conn.execute("DELETE FROM entries WHERE key = ? AND expires_at < ?", (key, now))
+            return False, None
+        if now - accessed_at > TOUCH_INTERVAL:
+            conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+        return True, deserialize(fmt, data)
+
+    def set(self, key, value, ttl):
+        fmt, data = serialize(value)
+        now = time.time()
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+            (key, fmt, data, len(data), now + ttl, now)
+        )
+        self.evict()
+
+    def evict(self):
+        """Drop expired entries, then least recently used ones until under the size limit."""
+        conn = self._connect()
+        conn.execute("DELETE FROM entries WHERE expires_at < ?", (time.time(),))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - int(self.max_bytes * 0.9)  # Leave headroom so every set does not evict
+        freed = 0
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY accessed_at").fetchall():
+            if freed >= excess:
+                break
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            freed += size
+
+    def clear(self, prefix=""):
+        self._connect().execute("DELETE FROM entries WHERE substr(key, 1, ?) = ?", (len(prefix), prefix))
+
+    def stats(self):
+        count, size = self._connect().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return {"backend": "sqlite", "entries": count, "bytes": size, "max_bytes": self.max_bytes}
+
+
+class MemoryCache:
+    """Per-process cache with the same interface, for single-worker deployments."""
+
+    def __init__(self, max_bytes=MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry["expires_at"] < time.time():
+                self.entries.pop(key, None)
+                return False, None
+            entry["accessed_at"] = time.time()
+            fmt, data = entry["format"], entry["data"]
+        # Stored serialized so callers that mutate a result never corrupt the cached copy
+        return True, deserialize(fmt, data)
+
+    def set(self, key, value, ttl):
+        fmt, data = serialize(value)
+        with self.lock:
+            self.entries[key] = {"format": fmt, "data": data, "size": len(data),
+                                 "expires_at": time.time() + ttl, "accessed_at": time.time()}
+            total = sum(entry["size"] for entry in self.entries.values())
+            for old_key in sorted(self.entries, key=lambda k: self.entries[k]["accessed_at"]):
+                if total <= self.max_bytes:
+                    break
+                total -= self.entries.pop(old_key)["size"]
+
+    def clear(self, prefix=""):
+        with self.lock:
+            for key in [key for key in self.entries if key.startswith(prefix)]:
+                del self.entries[key]
+
+    def stats(self):
+        with self.lock:
+            return {"backend": "memory", "entries": len(self.entries),
+                    "bytes": sum(entry["size"] for entry in self.entries.values()), "max_bytes": self.max_bytes}
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    """The configured backend for this process (None when caching is disabled)."""
+    global _backend
+    if _backend is None and BACKEND != "none":
+        with _backend_lock:
+            if _backend is None:
+                _backend = SQLiteCache(CACHE_FILE) if BACKEND == "sqlite" else MemoryCache()
+    return _backend
+
+
+def _is_empty(value):
+    if value is None:
+        return True
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.empty
+    return hasattr(value, "__len__") and len(value) == 0
+
+
+def cached(ttl, namespace=None):
+    """
+    Cache a function's results in the shared backend, keyed by its arguments.
+
+    Empty results (None, empty frames or lists) are not stored, so a transient failure
+    in one worker is not served to the others. The wrapper has a `clear()` method like
+    st.cache_data functions.
+
+    Args:
+        ttl (float): Seconds an entry stays valid.
+        namespace (str): Key prefix; defaults to the function's module and name.
+    """
+    def decorator(func):
+        prefix = f"{namespace or func.__module__ + '.' + func.__qualname__}:"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            backend = get_backend()
+            if backend is None:
+                return func(*args, **kwargs)
+            key = prefix + hashlib.sha1(json.dumps([args, kwargs], sort_keys=True, default=str).encode()).hexdigest()
+            with tracing.span(f"cache {prefix[:-1]}") as span:
+                found, value = backend.get(key)
+                metrics.cache_lookup(prefix[:-1], found)
+                if span is not None:
+                    span["attributes"]["hit"] = found
+                if found:
+                    return value
+                value = func(*args, **kwargs)
+                if not _is_empty(value):
+                    backend.set(key, value, ttl)
+                return value
+
+        def clear():
+            backend = get_backend()
+            if backend is not None:
+                backend.clear(prefix)
+
+        wrapper.clear = clear
+        return wrapper
+    return decorator
@@ -0,0 +1,242 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import metrics
+import providers
+
+
+@st.cache_data(ttl=60 * 60, show_spinner=False)
+def download_closes(tickers, start, end=None):
+    """
+    Download daily closes for many tickers in one yfinance request.
+
+    Closes are dividend- and split-adjusted (yfinance's `auto_adjust=True`), so ROI
+    includes reinvested dividends.
+
+    Args:
+        tickers (tuple): Stock symbols (a tuple so the result can be cached).
+        start (str): First date (YYYY-MM-DD).
+        end (str): Last date (YYYY-MM-DD), or None for today.
+
+    Returns:
+        pd.DataFrame: Daily closes, one column per ticker.
+    """
+    data = providers.yf_download(list(tickers), start=start, end=end, auto_adjust=True, progress=False)
+    closes = data["Close"]
+    if isinstance(closes, pd.Series):
+        closes = closes.to_frame(tickers[0])
+    return closes.apply(pd.to_numeric, errors="coerce").reindex(columns=list(tickers))
+
+
+def monthly_first_closes(closes):
+    """Close on the first trading day of each month, one column per ticker."""
+    return closes.resample("MS").first()
+
+
+def simulate_sip(closes, scenarios):
+    """
+    Simulate many monthly SIP scenarios at once with cumulative sums over arrays.
+
+    Each scenario buys `amount` dollars of its ticker at the first trading day's close of
+    every month from `start` through `end`. All scenarios are laid out as columns of one
+    (months × scenarios) matrix, so there is no per-month Python loop.
+
+    Args:
+        closes (pd.DataFrame): Daily closes, one column per ticker.
+        scenarios (pd.DataFrame): Columns ticker, amount, start and optionally end.
+
+    Returns:
+        pd.DataFrame: Tidy panel with one row per (scenario, month) from the first
+            investment on: scenario, ticker, date, price, active (an installment was bought
+            that month), invested, shares, value and roi (percent).
+    """
+    scenarios = scenarios.reset_index(drop=True)
+    monthly = monthly_first_closes(closes)
+    months = monthly.index.values
+
+    prices = monthly[scenarios["ticker"]].to_numpy(dtype=np.float64)
+    starts = pd.to_datetime(scenarios["start"]).dt.to_period("M").dt.to_timestamp().values
+    ends = pd.to_datetime(scenarios.get("end", pd.Series([months[-1]] * len(scenarios)))).values
+    amounts = scenarios["amount"].to_numpy(dtype=np.float64)
+
+    active = (months[:, None] >= starts[None, :]) & (months[:, None] <= ends[None, :]) & ~np.isnan(prices)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        bought = np.where(active, amounts / prices, 0.0)
+    shares = np.cumsum(bought, axis=0)
+    invested = np.cumsum(np.where(active, amounts, 0.0), axis=0)
+    value = shares * pd.DataFrame(prices).ffill().to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        roi = np.where(invested > 0, (value - invested) / invested * 100, np.nan)
+
+    n_months, n_scenarios = prices.shape
+    panel = pd.DataFrame({
+        "scenario": np.tile(np.arange(n_scenarios), n_months),
+        "ticker": np.tile(scenarios["ticker"].to_numpy(), n_months),
+        "date": np.repeat(months, n_scenarios),
+        "price": prices.ravel(),
+        "active": active.ravel(),
+        "invested": invested.ravel(),
+        "shares": shares.ravel(),
+        "value": value.ravel(),
+        "roi": roi.ravel(),
+    })
+    return panel[panel["invested"] > 0].reset_index(drop=True)
+
+
+def summarize_sip(panel, closes, scenarios):
+    """
+    One row per scenario, valued at the latest available daily close.
+
+    Returns:
+        pd.DataFrame: ticker, amount, start, months, invested, final_value, roi,
+            last_investment_price and last_close.
+    """
+    last = panel.groupby("scenario").tail(1).set_index("scenario")
+    last_close = closes.ffill().iloc[-1]
+    summary = scenarios.reset_index(drop=True).loc[last.index, ["ticker", "amount", "start"]].copy()
+    # Months after a scenario's end stay in the panel to value the holdings; count installments only
+    summary["months"] = panel.groupby("scenario")["active"].sum()
+    summary["invested"] = last["invested"]
+    summary["last_investment_price"] = panel[panel["active"]].groupby("scenario")["price"].last()
+    summary["last_close"] = summary["ticker"].map(last_close)
+    summary["final_value"] = last["shares"] * summary["last_close"]
+    summary["roi"] = (summary["final_value"] - summary["invested"]) / summary["invested"] * 100
+    return summary
+
+
+@metrics.instrumented
+def compare_sip(tickers, amounts, start_dates, end=None):
+    """
+    Run SIP scenarios for many tickers, amounts and start dates in one call.
+
+    Scalars broadcast: compare_sip(["SPY", "QQQ"], 1000, "2015-01-01") runs two scenarios.
+
+    Args:
+        tickers (list): Stock symbols.
+        amounts (float or list): Monthly investment per scenario.
+        start_dates (str or list): First investment month per scenario (YYYY-MM-DD).
+        end (str): Last investment date (YYYY-MM-DD), or None for today.
+
+    Returns:
+        tuple: (summary DataFrame, panel DataFrame)
+    """
+    scenarios = pd.DataFrame({"ticker": tickers, "amount": amounts, "start": start_dates})
+    scenarios["ticker"] = scenarios["ticker"].str.upper()
+    if end:
+        scenarios["end"] = end
+    # Download through today so holdings are valued at the latest close
+    closes = download_closes(tuple(sorted(set(scenarios["ticker"]))), min(scenarios["start"]), None)
+    panel = simulate_sip(closes, scenarios)
+    return summarize_sip(panel, closes, scenarios), panel
+
+
+def buy_day_prices(closes, months, days_of_month):
+    """
+    Close on the first trading day on or after each (month, day-of-month) pair.
+
+    Args:
+        closes (pd.DataFrame): Daily closes, one column per ticker.
+        months (pd.DatetimeIndex): Month starts.
+        days_of_month (list): Target calendar days (1-28).
+
+    Returns:
+        np.ndarray: Prices shaped (months, days, tickers); NaN where no trading day follows
+            or the day is before the ticker's first close.
+    """
+    dates = closes.index.values.astype("datetime64[D]")
+    offsets = np.asarray(days_of_month, dtype="timedelta64[D]") - np.timedelta64(1, "D")
+    targets = months.values.astype("datetime64[D]")[:, None] + offsets[None, :]
+    rows = np.searchsorted(dates, targets)
+    values = np.vstack([closes.ffill().to_numpy(dtype=np.float64), np.full((1, closes.shape[1]), np.nan)])
+    prices = values[rows]
+    # The first close would otherwise stand in for days before the ticker traded
+    listed = dates[closes.notna().to_numpy().argmax(axis=0)]
+    prices[targets[:, :, None] < listed[None, None, :]] = np.nan
+    return prices
+
+
+@metrics.instrumented
+def explore_dca(closes, horizon_months, start=None, end=None, days_of_month=range(1, 29), amount=1000):
+    """
+    Evaluate SIP and lump-sum outcomes for every start month and day-of-month at once.
+
+    A SIP scenario invests `amount` on the chosen day of each of `horizon_months` months;
+    the matching lump-sum scenario invests the same total on the first of those days. Both
+    are valued on that day of the month after the last installment. Shares come from
+    cumulative sums of 1 / price, so every window is a difference of two prefix sums;
+    windows with a missing price (e.g., before the ticker listed) are dropped.
+
+    Args:
+        closes (pd.DataFrame): Daily closes, one column per ticker.
+        horizon_months (int): Months from the first investment to valuation.
+        start (str): Earliest start month (YYYY-MM-DD), defaults to the first close.
+        end (str): Latest valuation date (YYYY-MM-DD), defaults to the last close.
+        days_of_month (list): Buy-day variants (1-28).
+        amount (float): Monthly installment.
+
+    Returns:
+        pd.DataFrame: One row per (ticker, start, day, strategy) with invested,
+            final_value, total_return and cagr (both percent).
+    """
+    horizon_months = int(horizon_months)
+    days_of_month = list(days_of_month)
+    window = closes.loc[:end] if end else closes
+    months = pd.date_range(pd.Timestamp(start or window.index[0]).to_period("M").to_timestamp(),
+                           window.index[-1], freq="MS")
+    prices = buy_day_prices(window, months, days_of_month)  # (months, days, tickers)
+    # Buy days past the end of the window cannot be valued
+    dates = window.index.values.astype("datetime64[D]")
+    offsets = np.asarray(days_of_month, dtype="timedelta64[D]") - np.timedelta64(1, "D")
+    prices[months.values.astype("datetime64[D]")[:, None] + offsets[None, :] > dates[-1]] = np.nan
+
+    n_starts = len(months) - horizon_months
+    if n_starts <= 0:
+        return pd.DataFrame(columns=["ticker", "start", "day", "strategy", "invested", "final_value",
+                                     "total_return", "cagr"])
+
+    zeros = np.zeros((1,) + prices.shape[1:])
+    inverse = np.vstack([zeros, np.nancumsum(1 / prices, axis=0)])
+    missing = np.vstack([zeros, np.cumsum(np.isnan(prices), axis=0)])
+    sip_shares = (inverse[horizon_months:horizon_months + n_starts] - inverse[:n_starts]) * amount
+    sip_shares[missing[horizon_months:horizon_months + n_starts] > missing[:n_starts]] = np.nan
+    invested = amount * horizon_months
+    lump_shares = invested / prices[:n_starts]
+    exit_prices = prices[horizon_months:horizon_months + n_starts]
+
+    values = np.stack([sip_shares * exit_prices, lump_shares * exit_prices])  # (strategy, start, day, ticker)
+    with np.errstate(invalid="ignore"):
+        cagr = ((values / invested) ** (12 / horizon_months) - 1) * 100
+
+    strategies, starts, days, tickers = np.meshgrid(
+        ["SIP", "Lump Sum"], months[:n_starts], days_of_month, closes.columns, indexing="ij"
+    )
+    results = pd.DataFrame({
+        "ticker": tickers.ravel(),
+        "start": starts.ravel(),
+        "day": days.ravel(),
+        "strategy": strategies.ravel(),
+        "invested": float(invested),
+        "final_value": values.ravel(),
+        "total_return": (values.ravel() / invested - 1) * 100,
+        "cagr": cagr.ravel(),
+    })
+    return results.dropna(subset=["final_value"]).reset_index(drop=True)
+
+
+def summarize_dca(results, by=("ticker", "strategy")):
+    """
+    CAGR distribution per group of explored scenarios.
+
+    Returns:
+        pd.DataFrame: scenarios, median, worst and best CAGR, and the share of scenarios
+            with a positive return.
+    """
+    grouped = results.groupby(list(by))["cagr"]
+    return pd.DataFrame({
+        "scenarios": grouped.size(),
+        "median_cagr": grouped.median(),
+        "worst_cagr": grouped.min(),
+        "best_cagr": grouped.max(),
+        "win_rate": grouped.apply(lambda cagr: (cagr > 0).mean() * 100),
+    }).reset_index()
@@ -0,0 +1,420 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from collections import deque
+
+import pandas as pd
+import websockets
+from dotenv import load_dotenv
+
+import market_calendar
+import resample
+import scheduler
+
+load_dotenv()
+ALPACA_API_KEY = os.getenv("ALPACA_API_KEY")
+ALPACA_SECRET_KEY = os.getenv("ALPACA_SECRET_KEY")
+ALPACA_STREAM_URL = os.getenv("ALPACA_STREAM_URL", "wss://stream.data.alpaca.markets/v2/iex")
+
+# Bars kept in memory per symbol
+WINDOW_SIZE = 500
+# Seconds after a bucket's end to wait for its last 1-minute bar before closing it without one
+FLUSH_GRACE = 15
+# Reconnect attempt n waits a random time up to min(RECONNECT_MAX, RECONNECT_BASE * 2**n) seconds
+RECONNECT_BASE = 1.0
+RECONNECT_MAX = 60.0
+
+
+class IncrementalRSI:
+    """
+    Wilder's RSI updated one close at a time.
+
+    Seeds the average gain/loss with a simple mean of the first `period` moves and then
+    applies Wilder smoothing, matching `backtrader.indicators.RSI`. Each update is O(1).
+    """
+
+    def __init__(self, period=14):
+        self.period = period
+        self.prev_close = None
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+        self.count = 0
+        self.value = None
+
+    def update(self, close):
+        """
+        Feed one close and return the new RSI, or None while warming up.
+
+        Args:
+            close (float): Close price of the newest bar.
+
+        Returns:
+            float: Updated RSI value, or None until `period` moves have been seen.
+        """
+        if self.prev_close is None:
+            self.prev_close = close
+            return None
+
+        change = close - self.prev_close
+        self.prev_close = close
+        gain, loss = max(change, 0.0), max(-change, 0.0)
+        self.count += 1
+
+        if self.count <= self.period:
+            self.avg_gain += gain / self.period
+            self.avg_loss += loss / self.period
+            if self.count < self.period:
+                return None
+        else:
+            self.avg_gain = (self.avg_gain * (self.period - 1) + gain) / self.period
+            self.avg_loss = (self.avg_loss * (self.period - 1) + loss) / self.period
+
+        rs = self.avg_gain / (self.avg_loss or 1e-10)
+        self.value = 100 - (100 / (1 + rs))
+        return self.value
+
+
+class SymbolWindow:
+    """Rolling bar window and incremental RSI signal state for one symbol."""
+
+    def __init__(self, symbol, params, window_size=WINDOW_SIZE):
+        self.symbol = symbol
+        self.params = params
+        self.bars = deque(maxlen=window_size)
+        self.rsi = IncrementalRSI(params.get("rsi_period", 14))
+        self.prev_rsi = None
+
+    def on_bar(self, bar):
+        """
+        Append a completed bar and evaluate the RSI rules of `backtest.RSIStrategy`.
+
+        Args:
+            bar (dict): Bar with keys t, o, h, l, c, v.
+
+        Returns:
+            str: "buy", "sell" or "hold".
+        """
+        self.bars.append(bar)
+        prev_rsi = self.prev_rsi
+        current_rsi = self.rsi.update(bar["c"])
+        self.prev_rsi = current_rsi
+        if current_rsi is None or prev_rsi is None:
+            return "hold"
+        if prev_rsi < self.params.get("rsi_buy_threshold", 40) <= current_rsi:
+            return "buy"
+        if current_rsi > self.params.get("rsi_sell_threshold", 70):
+            return "sell"
+        return "hold"
+
+    def to_frame(self):
+        """Return the rolling window as an OHLCV DataFrame indexed by bar time."""
+        df = pd.DataFrame(list(self.bars)).rename(
+            columns={"t": "datetime", "o": "open", "h": "high", "l": "low", "c": "close", "v": "volume"}
+        )
+        if df.empty:
+            return df
+        df["datetime"] = pd.to_datetime(df["datetime"])
+        return df.set_index("datetime")
+
+
+class BarAggregator:
+    """
+    Rolls 1-minute stream bars up into N-minute bars anchored at the 09:30 session open,
+    like backtest bars (`resample`) and the calendar's bar closes; the last bar of a
+    session ends at the close.
+
+    Minutes without trades have no bar (common on IEX), so a bucket is closed by its last
+    minute's bar, by any bar from a later minute (the stream delivers minutes in order), or
+    by `expire` once the wall clock has moved past it.
+    """
+
+    def __init__(self, minutes):
+        self.minutes = minutes
+        self.pending = {}
+
+    def _bucket(self, start):
+        """(start, end) of the bucket holding a minute bar starting at `start` (tz-aware)."""
+        local = start.tz_convert(market_calendar.ny_timezone)
+        midnight = local.normalize()
+        minute = resample.session_bucket_minute(local.hour * 60 + local.minute, self.minutes)
+        bucket = midnight + pd.Timedelta(minutes=minute)
+        end = bucket + pd.Timedelta(minutes=self.minutes)
+        if market_calendar.is_session(local):
+            end = min(end, pd.Timestamp(market_calendar.session_close(local)))
+        return bucket.tz_convert(start.tz), end
+
+    def _bucket_end(self, current):
+        return self._bucket(pd.Timestamp(current["t"]))[1]
+
+    def _close_before(self, cutoff):
+        """Pop and return pending bars whose bucket ends at or before `cutoff`."""
+        closed = [symbol for symbol, current in self.pending.items() if self._bucket_end(current) <= cutoff]
+        return [self.pending.pop(symbol) for symbol in closed]
+
+    def add(self, bar):
+        """
+        Add a 1-minute bar and return the N-minute bars it completes.
+
+        Returns:
+            list: Aggregated bars stamped with their bucket start, oldest first (may be empty).
+        """
+        if self.minutes == 1:
+            return [bar]
+        start = pd.Timestamp(bar["t"])
+        bucket, end = self._bucket(start)
+        completed = self._close_before(start)
+        current = self.pending.get(bar["S"])
+        if current is None:
+            current = {"S": bar["S"], "t": bucket.isoformat(), "o": bar["o"], "h": bar["h"],
+                       "l": bar["l"], "c": bar["c"], "v": 0}
+            self.pending[bar["S"]] = current
+        current["h"] = max(current["h"], bar["h"])
+        current["l"] = min(current["l"], bar["l"])
+        current["c"] = bar["c"]
+        current["v"] += bar["v"]
+        if start + pd.Timedelta(minutes=1) >= end:
+            completed.append(self.pending.pop(bar["S"]))
+        return completed
+
+    def expire(self, now, grace=0.0):
+        """
+        Close buckets the clock has moved past, for symbols whose last minute had no trades.
+
+        Args:
+            now (datetime): Current tz-aware time.
+            grace (float): Seconds to keep waiting for a late final bar after the bucket end.
+
+        Returns:
+            list: Aggregated bars that are now complete.
+        """
+        return self._close_before(pd.Timestamp(now) - pd.Timedelta(seconds=grace))
+
+
+def seed_windows(windows, timeframe):
+    """
+    Warm every symbol's RSI from history with one multi-symbol REST request at startup.
+
+    Args:
+        windows (dict): Symbol -> SymbolWindow.
+        timeframe (str): Streamlit timeframe ("1Day", "1Hour", "15Min", "5Min").
+    """
+    params = next(iter(windows.values())).params
+    now = pd.Timestamp.now(tz=scheduler.ny_timezone).to_pydatetime()
+    closes = scheduler.fetch_watchlist_closes(
+        list(windows), timeframe, scheduler.last_bar_close(now, timeframe), params.get("rsi_period", 14) * 5
+    )
+    for symbol in closes.columns:
+        for ts, close in closes[symbol].dropna().items():
+            windows[symbol].on_bar({"t": ts.isoformat(), "o": close, "h": close, "l": close, "c": close, "v": 0})
+
+
+def reseed_windows(windows, timeframe):
+    """
+    Rebuild every symbol's window from history, e.g. after a reconnect missed some bars.
+
+    Windows are replaced in place, so holders of the `windows` dict see the new state.
+    """
+    for symbol, window in list(windows.items()):
+        windows[symbol] = SymbolWindow(symbol, window.params, window.bars.maxlen)
+    seed_windows(windows, timeframe)
+
+
+def submit_signal(symbol, action, bar, window):
+    """Default signal handler: place paper orders through the scheduler's idempotent order path."""
+    held = {pos.symbol for pos in scheduler.paper.list_positions()}
+    close = bar["c"]
+    signal = {
+        "action": action,
+        "stop_price": close * (1 - (window.params.get("stop_loss") or 0)),
+        "target_price": close * (1 + (window.params.get("profit_target") or 0)),
+    }
+    run_tag = f"stream-{pd.Timestamp(bar['t']).tz_convert(scheduler.ny_timezone):%y%m%d%H%M}"
+    orders = scheduler.build_orders(symbol, signal, symbol in held, window.params, run_tag)
+    submitted, errors = scheduler.submit_symbol_orders(orders)
+    for error in errors:
+        print(f"❌ {error}")
+    return submitted
+
+
+async def stream_bars(symbols, params, bar_minutes=1, url=ALPACA_STREAM_URL, on_signal=None, windows=None,
+                      max_bars=None, flush_after=None, reconnect=False, on_reconnect=None):
+    """
+    Subscribe to real-time bars and evaluate the RSI strategy as each bar closes.
+
+    Args:
+        symbols (list): Symbols to subscribe to.
+        params (dict): Strategy parameters (rsi_period, qty, stop_loss, profit_target).
+        bar_minutes (int): Strategy bar size; 1-minute stream bars are aggregated to it.
+        url (str): Market-data WebSocket URL (Alpaca or a local replay server).
+        on_signal (callable): Called as on_signal(symbol, action, bar, window) for buy/sell signals,
+            on a worker thread so blocking order calls do not stall the stream.
+        windows (dict): Optional pre-seeded Symbol -> SymbolWindow mapping.
+        max_bars (int): Stop after this many aggregated bars (used by replays).
+        flush_after (float): For live feeds, seconds after a bucket's end at which it is closed
+            even if its last minute had no bar; None closes buckets only from stream data (replays).
+        reconnect (bool): Reconnect with jittered exponential backoff when the connection
+            drops or closes, instead of returning (a closed replay ends the stream).
+        on_reconnect (callable): Called as on_reconnect(windows) on a worker thread after a
+            reconnect, to re-seed the windows with the bars missed while disconnected.
+
+    Returns:
+        dict: Symbol -> SymbolWindow with the final rolling state.
+    """
+    windows = windows or {symbol: SymbolWindow(symbol, params) for symbol in symbols}
+    aggregator = BarAggregator(bar_minutes)
+    loop = asyncio.get_running_loop()
+    processed = 0
+
+    async def evaluate(bar, received):
+        window = windows[bar["S"]]
+        action = window.on_bar(bar)
+        latency_ms = (time.perf_counter() - received) * 1000
+        if action != "hold":
+            print(f"📈 {bar['S']} {action} at {bar['c']:.2f} (RSI {window.rsi.value:.2f}, evaluated in {latency_ms:.2f} ms)")
+            if on_signal:
+                await loop.run_in_executor(None, on_signal, bar["S"], action, bar, window)
+
+    async def consume(ws):
+        """Process messages until the stream stops; True once `max_bars` bars were evaluated."""
+        nonlocal processed, attempt
+        while True:
+            try:
+                raw = await (ws.recv() if flush_after is None else asyncio.wait_for(ws.recv(), timeout=flush_after))
+            except asyncio.TimeoutError:
+                raw = "[]"  # Quiet stream: only check the clock below
+            received = time.perf_counter()
+            completed = []
+            for message in json.loads(raw):
+                if message.get("T") == "error":
+                    raise RuntimeError(f"Stream error {message.get('code')}: {message.get('msg')}")
+                if message.get("T") == "subscription":
+                    attempt = 0  # Only a connection that got as far as subscribing resets the backoff
+                if message.get("T") == "b" and message.get("S") in windows:
+                    completed += aggregator.add(message)
+            if flush_after is not None:
+                completed += aggregator.expire(pd.Timestamp.now(tz="UTC"), grace=flush_after)
+
+            for bar in completed:
+                await evaluate(bar, received)
+                processed += 1
+                if max_bars and processed >= max_bars:
+                    return True
+
+    attempt = 0
+    while True:
+        try:
+            async with websockets.connect(url) as ws:
+                await ws.send(json.dumps({"action": "auth", "key": ALPACA_API_KEY, "secret": ALPACA_SECRET_KEY}))
+                await ws.send(json.dumps({"action": "subscribe", "bars": symbols}))
+                if attempt and on_reconnect:
+                    await loop.run_in_executor(None, on_reconnect, windows)
+                    aggregator.expire(pd.Timestamp.now(tz="UTC"))  # Buckets that closed are in the history now
+                if await consume(ws):
+                    return windows
+        except websockets.ConnectionClosedOK:
+            if not reconnect:
+                return windows
+            error = "closed by the server"
+        except (websockets.ConnectionClosed, websockets.InvalidHandshake, OSError) as e:
+            if not reconnect:
+                raise
+            error = e
+        delay = random.uniform(0, min(RECONNECT_MAX, RECONNECT_BASE * 2 ** attempt))
+        attempt += 1
+        print(f"⚠️ Stream disconnected ({error}); reconnecting in {delay:.1f}s (attempt {attempt})")
+        await asyncio.sleep(delay)
+
+
+async def serve_replay(bars, host="localhost", port=8765, interval=0.0):
+    """
+    Serve recorded bars over WebSocket using the Alpaca market-data protocol.
+
+    Stands in for the live feed in tests and demos: clients authenticate and subscribe
+    exactly as they would against Alpaca, then receive the recorded bars in time order.
+
+    Args:
+        bars (pd.DataFrame): Bars with a DatetimeIndex and symbol, open, high, low, close, volume columns.
+        host (str): Interface to bind.
+        port (int): Port to listen on.
+        interval (float): Seconds to wait between bar timestamps.
+    """
+    bars = bars.sort_index()
+
+    async def handler(ws):
+        await ws.send(json.dumps([{"T": "success", "msg": "connected"}]))
+        subscribed = set()
+        async for raw in ws:
+            request = json.loads(raw)
+            if request.get("action") == "auth":
+                await ws.send(json.dumps([{"T": "success", "msg": "authenticated"}]))
+            elif request.get("action") == "subscribe":
+                subscribed.update(request.get("bars", []))
+                await ws.send(json.dumps([{"T": "subscription", "bars": sorted(subscribed)}]))
+                break
+
+        for ts, group in bars[bars["symbol"].isin(subscribed)].groupby(level=0, sort=True):
+            await ws.send(json.dumps([
+                {"T": "b", "S": row.symbol, "t": pd.Timestamp(ts).isoformat(), "o": row.open,
+                 "h": row.high, "l": row.low, "c": row.close, "v": row.volume}
+                for row in group.itertuples()
+            ]))
+            if interval:
+                await asyncio.sleep(interval)
+
+    async with websockets.serve(handler, host, port):
+        await asyncio.Future()
+
+
+def load_replay_bars(path):
+    """Load bars for the replay server from a CSV with timestamp, symbol and OHLCV columns."""
+    df = pd.read_csv(path, parse_dates=["timestamp"])
+    return df.set_index("timestamp")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stream bars and evaluate the RSI strategy incrementally.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    live = subparsers.add_parser("live", help="Subscribe to bars and paper-trade signals")
+    live.add_argument("--symbols", required=True, help="Comma-separated symbols, e.g. AAPL,MSFT")
+    live.add_argument("--timeframe", default="5Min", choices=["1Hour", "15Min", "5Min"])
+    live.add_argument("--url", default=ALPACA_STREAM_URL, help="Market-data WebSocket URL")
+    live.add_argument("--rsi-period", type=int, default=14)
+    live.add_argument("--qty", type=int, default=100)
+    live.add_argument("--stop-loss", type=float, default=0.10)
+    live.add_argument("--profit-target", type=float, default=0.30)
+    live.add_argument("--no-seed", action="store_true", help="Skip the REST history warm-up")
+    live.add_argument("--dry-run", action="store_true", help="Print signals without placing orders")
+
+    replay = subparsers.add_parser("replay", help="Serve recorded bars as a local stand-in for the live feed")
+    replay.add_argument("--csv", required=True, help="CSV with timestamp, symbol, open, high, low, close, volume")
+    replay.add_argument("--port", type=int, default=8765)
+    replay.add_argument("--interval", type=float, default=0.0)
+
+    args = parser.parse_args()
+    if args.command == "replay":
+        asyncio.run(serve_replay(load_replay_bars(args.csv), port=args.port, interval=args.interval))
+    else:
+        symbols = [s.strip().upper() for s in args.symbols.split(",") if s.strip()]
+        params = {
+            "rsi_period": args.rsi_period,
+            "qty": args.qty,
+            "stop_loss": args.stop_loss,
+            "profit_target": args.profit_target
+        }
+        windows = {symbol: SymbolWindow(symbol, params) for symbol in symbols}
+        if not args.no_seed:
+            seed_windows(windows, args.timeframe)
+        asyncio.run(stream_bars(
+            symbols, params,
+            bar_minutes=scheduler.BAR_SECONDS[args.timeframe] // 60,
+            url=args.url,
+            on_signal=None if args.dry_run else submit_signal,
+            windows=windows,
+            flush_after=FLUSH_GRACE,
+            reconnect=True,
+            on_reconnect=None if args.no_seed else lambda windows: reseed_windows(windows, args.timeframe)
+        ))
@@ -0,0 +1,9 @@
+import os
+import sys
+import tempfile
+
+# Modules import flat from StockBotChat/ and create Alpaca clients at import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("ALPACA_API_KEY", "test-key")
+os.environ.setdefault("ALPACA_SECRET_KEY", "test-secret")
+os.environ.setdefault("STOCKBOT_CACHE_DIR", tempfile.mkdtemp(prefix="stockbot-tests-"))
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import screen_dsl
+
+
+def _bars(closes, start="2025-01-01"):
+    index = pd.date_range(start, periods=len(closes), freq="D")
+    return pd.DataFrame({"Open": closes, "High": closes, "Low": closes, "Close": closes, "Volume": 1.0}, index=index)
+
+
+def _matches(expression, frames, skip_bars=None):
+    tree = screen_dsl.parse(expression)
+    panel = screen_dsl.build_panel(frames)
+    skip = screen_dsl.lookback_bars(tree) if skip_bars is None else skip_bars
+    return {m["symbol"]: str(m["trend_found_date"]) for m in
+            screen_dsl.first_matches(screen_dsl.evaluate(tree, panel), panel["Close"], skip)}
+
+
+@pytest.mark.parametrize("expression", ["not close > sma(20)", "close != sma(20)"])
+def test_undefined_indicators_never_match(expression):
+    # LATE starts 15 bars after EARLY; its SMA(20) is undefined until its own 20th bar
+    early = _bars(np.linspace(100, 50, 60))
+    late = early.iloc[15:]
+    assert _matches(expression, {"EARLY": early, "LATE": late}, skip_bars=0) == {
+        "EARLY": "2025-01-20", "LATE": "2025-02-04",
+    }
+
+
+def test_warmup_is_counted_from_each_symbols_first_bar():
+    early = _bars(np.linspace(100, 50, 60))
+    late = early.iloc[15:]
+    # ema(10) is defined from the first bar, so only the per-symbol skip holds it back
+    assert _matches("not close > ema(10)", {"EARLY": early, "LATE": late}) == {
+        "EARLY": "2025-01-11", "LATE": "2025-01-26",
+    }
+
+
+def test_or_with_a_true_side_does_not_wait_for_warmup():
+    bars = _bars(np.linspace(100, 50, 60))
+    assert _matches("close > 0 or sma(20) > 0", {"A": bars}, skip_bars=0) == {"A": "2025-01-01"}
+
+
+@pytest.mark.parametrize("expression", [
+    "(close > 1) and 3", "not close", "close or volume > 1", "(close > 1) + 1", "close > (close > 1)",
+])
+def test_non_boolean_operands_are_rejected(expression):
+    with pytest.raises(screen_dsl.ScreenSyntaxError):
+        screen_dsl.parse(expression)
+
+
+@pytest.mark.parametrize("expression", [
+    "1 > 0", "not 2 > 3", "sma(0) > 1", "sma(-3) > 1", "sma(2.5) > 1", "prev(close, 0) > 1", "sma(20, 5) > 1",
+])
+def test_constant_conditions_and_bad_windows_are_rejected(expression):
+    with pytest.raises(screen_dsl.ScreenSyntaxError):
+        screen_dsl.parse(expression)
+
+
+def test_constant_side_of_or_broadcasts():
+    bars = _bars(np.linspace(100, 50, 60))
+    assert _matches("close < 0 or 1 > 0", {"A": bars}, skip_bars=0) == {"A": "2025-01-01"}
@@ -0,0 +1,26 @@
+import numpy as np
+import pandas as pd
+
+import sip
+
+
+def _closes():
+    index = pd.bdate_range("2015-01-01", "2020-12-31")
+    early = pd.Series(np.linspace(10, 50, len(index)), index)
+    late = early.where(early.index >= "2017-03-15")  # Listed two years into the range
+    return pd.DataFrame({"EARLY": early, "LATE": late})
+
+
+def test_buy_days_before_listing_have_no_price():
+    closes = _closes()[["LATE"]].dropna()  # History starts on 2017-03-15
+    prices = sip.buy_day_prices(closes, pd.date_range("2017-03-01", periods=2, freq="MS"), [1, 15])
+    assert np.isnan(prices[0, 0, 0])
+    assert prices[0, 1, 0] == closes.loc["2017-03-15", "LATE"]
+    assert prices[1, 0, 0] == closes.loc["2017-04-03", "LATE"]
+
+
+def test_late_listing_keeps_windows_after_listing():
+    results = sip.explore_dca(_closes(), 12, days_of_month=[1, 15])
+    counts = results.groupby(["ticker", "strategy"]).size()
+    assert counts["LATE", "SIP"] == counts["LATE", "Lump Sum"] > 0
+    assert results.loc[results["ticker"] == "LATE", "start"].min() == pd.Timestamp("2017-03-01")
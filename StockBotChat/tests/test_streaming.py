@@ -0,0 +1,123 @@
+import asyncio
+import socket
+import threading
+
+import pandas as pd
+
+import market_calendar
+import resample
+import streaming
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("localhost", 0))
+        return sock.getsockname()[1]
+
+
+def _minute_bars(symbol, times, start_price=100.0):
+    rows = [
+        {"timestamp": pd.Timestamp(t, tz="America/New_York").tz_convert("UTC"), "symbol": symbol,
+         "open": start_price + i, "high": start_price + i + 0.5, "low": start_price + i - 0.5,
+         "close": start_price + i + 0.25, "volume": 100}
+        for i, t in enumerate(times)
+    ]
+    return pd.DataFrame(rows).set_index("timestamp")
+
+
+async def _stream_replay(bars, symbols, bar_minutes, max_bars, on_signal=None, params=None, **kwargs):
+    port = _free_port()
+    server = asyncio.create_task(streaming.serve_replay(bars, port=port))
+    await asyncio.sleep(0.2)  # Let the server bind
+    try:
+        return await asyncio.wait_for(streaming.stream_bars(
+            symbols, params or {}, bar_minutes=bar_minutes, url=f"ws://localhost:{port}",
+            on_signal=on_signal, max_bars=max_bars, **kwargs
+        ), timeout=10)
+    finally:
+        server.cancel()
+
+
+def test_bucket_missing_its_last_minute_is_emitted():
+    # No bar at 15:34: the 15:30 bucket must close when the 15:35 bar arrives, not be overwritten
+    times = ["2025-03-03 15:30", "2025-03-03 15:31", "2025-03-03 15:32", "2025-03-03 15:33",
+             "2025-03-03 15:35", "2025-03-03 15:36", "2025-03-03 15:37", "2025-03-03 15:38", "2025-03-03 15:39"]
+    bars = _minute_bars("AAPL", times)
+
+    windows = asyncio.run(_stream_replay(bars, ["AAPL"], bar_minutes=5, max_bars=2))
+
+    aggregated = list(windows["AAPL"].bars)
+    assert [pd.Timestamp(bar["t"]).tz_convert("America/New_York").strftime("%H:%M") for bar in aggregated] == ["15:30", "15:35"]
+    first, second = aggregated
+    assert (first["o"], first["c"], first["v"]) == (100.0, 103.25, 400)
+    assert (first["h"], first["l"]) == (103.5, 99.5)
+    assert (second["o"], second["c"], second["v"]) == (104.0, 108.25, 500)
+
+
+def test_quiet_symbol_bucket_is_closed_by_other_symbols():
+    times = ["2025-03-03 10:00", "2025-03-03 10:01", "2025-03-03 10:05"]
+    bars = pd.concat([_minute_bars("AAPL", times[:1]), _minute_bars("MSFT", times)])
+
+    windows = asyncio.run(_stream_replay(bars, ["AAPL", "MSFT"], bar_minutes=5, max_bars=2))
+
+    assert [bar["t"] for bar in windows["AAPL"].bars] == [pd.Timestamp("2025-03-03 15:00", tz="UTC").isoformat()]
+    assert len(windows["MSFT"].bars) == 1
+
+
+def test_expire_closes_buckets_after_grace():
+    aggregator = streaming.BarAggregator(5)
+    bar = {"S": "AAPL", "t": "2025-03-03T15:00:00+00:00", "o": 1.0, "h": 1.0, "l": 1.0, "c": 1.0, "v": 10}
+    assert aggregator.add(bar) == []
+    assert aggregator.expire(pd.Timestamp("2025-03-03 15:05:10", tz="UTC"), grace=15) == []
+    assert [b["t"] for b in aggregator.expire(pd.Timestamp("2025-03-03 15:05:20", tz="UTC"), grace=15)] == [bar["t"]]
+
+
+def test_hourly_buckets_match_backtest_and_calendar():
+    # Day after Thanksgiving closes at 13:00, so the last hourly bar is 12:30-13:00
+    minutes = pd.date_range("2025-11-28 09:30", "2025-11-28 12:59", freq="1min", tz="America/New_York")
+    aggregator = streaming.BarAggregator(60)
+    streamed = []
+    for t in minutes:
+        streamed += aggregator.add({"S": "AAPL", "t": t.tz_convert("UTC").isoformat(),
+                                    "o": 1.0, "h": 1.0, "l": 1.0, "c": 1.0, "v": 1})
+    starts = [pd.Timestamp(bar["t"]) for bar in streamed]
+    backtest = resample.resample_ohlcv(pd.DataFrame({"close": 1.0}, index=minutes), "1H")
+    assert starts == list(backtest.index)
+    closes = market_calendar.bar_closes("2025-11-28", "1H")
+    assert [start + pd.Timedelta(hours=1) for start in starts[:-1]] == [pd.Timestamp(c) for c in closes[:-1]]
+    assert closes[-1].strftime("%H:%M") == "13:00"
+
+
+def test_signals_are_handled_off_the_event_loop():
+    # Falling then rising closes produce a buy signal once the RSI crosses back above 40
+    closes = [100 - i for i in range(16)] + [85 + 3 * i for i in range(10)]
+    times = pd.date_range("2025-03-03 10:00", periods=len(closes), freq="1min")
+    bars = _minute_bars("AAPL", times)
+    bars["close"] = closes
+    threads = []
+
+    def on_signal(symbol, action, bar, window):
+        threads.append(threading.current_thread())
+
+    asyncio.run(_stream_replay(bars, ["AAPL"], bar_minutes=1, max_bars=len(closes), on_signal=on_signal,
+                               params={"rsi_period": 14, "rsi_buy_threshold": 40}))
+
+    assert threads
+    assert all(thread is not threading.main_thread() for thread in threads)
+
+
+def test_reconnects_and_reseeds_after_the_stream_closes(monkeypatch):
+    monkeypatch.setattr(streaming, "RECONNECT_BASE", 0.01)
+    bars = _minute_bars("AAPL", pd.date_range("2025-03-03 10:00", periods=3, freq="1min"))
+    reseeds = []
+
+    def on_reconnect(windows):
+        reseeds.append(threading.current_thread())
+        windows["AAPL"] = streaming.SymbolWindow("AAPL", {})
+
+    # The replay server closes after its 3 bars; the client reconnects and is served them again
+    windows = asyncio.run(_stream_replay(bars, ["AAPL"], bar_minutes=1, max_bars=5,
+                                         reconnect=True, on_reconnect=on_reconnect))
+
+    assert len(reseeds) == 1 and reseeds[0] is not threading.main_thread()
+    assert len(windows["AAPL"].bars) == 2  # Bars after the re-seed only
@@ -0,0 +1,219 @@
+"""
+Span tracing that follows one chat message through the LLM call, tool functions and
+data fetches.
+
+A trace is started per message (`start_trace`) and everything below it opens `span`s,
+which nest through context variables. Finished traces are sampled (every slow or failed
+trace, a fraction of the rest), kept in a per-process ring buffer and written to the
+cache directory so the diagnostics tab can show traces from every process as a waterfall.
+"""
+import collections
+import contextvars
+import functools
+import itertools
+import json
+import os
+import random
+import socket
+import threading
+import time
+from contextlib import contextmanager
+
+import config
+import metrics
+
+TRACES_DIR = os.path.join(config.CACHE_DIR, "traces")
+BUFFER_SIZE = int(os.getenv("STOCKBOT_TRACE_BUFFER", "200"))  # Traces kept per process
+SLOW_TRACE_SECONDS = float(os.getenv("STOCKBOT_SLOW_TRACE_SECONDS", "2"))  # Always kept at or above this
+SAMPLE_RATE = float(os.getenv("STOCKBOT_TRACE_SAMPLE_RATE", "0.1"))  # Share of fast, successful traces kept
+MAX_SPANS = 500  # Spans recorded per trace; later ones are counted but dropped
+RETENTION = 24 * 60 * 60  # Seconds a stopped process's traces are still shown
+
+os.makedirs(TRACES_DIR, exist_ok=True)
+
+_lock = threading.Lock()
+_buffer = collections.deque(maxlen=BUFFER_SIZE)
+_ids = itertools.count(1)
+_process_file = os.path.join(TRACES_DIR, f"{socket.gethostname()}-{os.getpid()}.json")
+_current = contextvars.ContextVar("stockbot_span", default=None)  # (Trace, open span dict)
+
+
+class Trace:
+    """One traced request: its spans, timings relative to the start, and outcome."""
+
+    def __init__(self, name, attributes):
+        self.id = f"{os.getpid()}-{int(time.time())}-{next(_ids)}"
+        self.name = name
+        self.attributes = attributes
+        self.started_at = time.time()
+        self.root = None
+        self.spans = []
+        self.dropped = 0
+        self._span_ids = itertools.count(1)
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def next_span_id(self):
+        return next(self._span_ids)
+
+    def offset(self):
+        """Seconds since the trace started."""
+        return time.perf_counter() - self._origin
+
+    def add(self, span):
+        with self._lock:
+            if len(self.spans) >= MAX_SPANS and span is not self.root:
+                self.dropped += 1
+                return
+            self.spans.append(span)
+
+    def to_dict(self):
+        root = self.root
+        return {
+            "id": self.id, "name": self.name, "attributes": self.attributes, "started_at": self.started_at,
+            "duration": root["duration"], "error": root["error"], "dropped": self.dropped,
+            "spans": sorted(self.spans, key=lambda span: span["start"]),
+        }
+
+
+def _format_attributes(attributes):
+    return {key: value if isinstance(value, (int, float, bool)) or value is None else str(value)[:200]
+            for key, value in attributes.items()}
+
+
+@contextmanager
+def _record(trace, name, attributes):
+    parent = _current.get()
+    span = {"id": trace.next_span_id(), "parent": parent[1]["id"] if parent else None,
+            "name": name, "attributes": _format_attributes(attributes), "thread": threading.current_thread().name,
+            "start": trace.offset(), "duration": None, "error": None}
+    token = _current.set((trace, span))
+    try:
+        yield span
+    except BaseException as e:
+        span["error"] = f"{type(e).__name__}: {e}"[:300]
+        raise
+    finally:
+        span["duration"] = trace.offset() - span["start"]
+        _current.reset(token)
+        trace.add(span)
+
+
+@contextmanager
+def start_trace(name, **attributes):
+    """
+    Trace one request (e.g., a chat message); the block is the root span.
+
+    Nested calls join the enclosing trace as a span instead of starting a new one.
+    """
+    if _current.get() is not None:
+        with span(name, **attributes) as current:
+            yield current
+        return
+    trace = Trace(name, _format_attributes(attributes))
+    try:
+        with _record(trace, name, attributes) as trace.root:
+            yield trace.root
+    finally:
+        _finish(trace)
+
+
+@contextmanager
+def span(name, **attributes):
+    """Time a block as a child of the current span; a no-op outside a trace."""
+    current = _current.get()
+    if current is None:
+        yield None
+        return
+    with _record(current[0], name, attributes) as child:
+        yield child
+
+
+def mark_error(error):
+    """Record a handled exception on the current span, so its trace is kept as failed."""
+    current = _current.get()
+    if current is None:
+        return
+    current[1]["error"] = f"{type(error).__name__}: {error}"[:300]
+
+
+def traced(name=None):
+    """Decorator recording each call of a function as a span (named `module.function` by default)."""
+    def decorator(func):
+        label = name or f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def propagate(func):
+    """
+    Wrap a function so calls on worker threads join the caller's trace.
+
+    Context variables do not cross into executor threads; each call runs in its own copy
+    of the context current when `propagate` was called.
+    """
+    context = contextvars.copy_context()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return context.copy().run(func, *args, **kwargs)
+    return wrapper
+
+
+def _sampled(trace):
+    root = trace.root
+    return root["duration"] >= SLOW_TRACE_SECONDS or root["error"] is not None or random.random() < SAMPLE_RATE
+
+
+def _finish(trace):
+    """Keep a finished trace if sampled and write this process's ring buffer."""
+    if trace.root is None or trace.root["duration"] is None or not _sampled(trace):
+        return
+    with _lock:
+        _buffer.append(trace.to_dict())
+        try:
+            # Written under the lock so a slower writer never replaces a newer buffer
+            metrics.write_atomic_json(_process_file, list(_buffer))
+        except OSError as e:
+            print(f"⚠️ Could not write traces: {e}")
+
+
+def recent_traces(limit=100):
+    """
+    Sampled traces from every live (or recently stopped) process, newest first.
+
+    Returns:
+        list: Trace dicts (id, name, attributes, started_at, duration, error, dropped, spans).
+    """
+    traces = []
+    now = time.time()
+    for filename in os.listdir(TRACES_DIR):
+        path = os.path.join(TRACES_DIR, filename)
+        if not filename.endswith(".json"):
+            continue
+        try:
+            if now - os.path.getmtime(path) > RETENTION:
+                os.remove(path)
+                continue
+            with open(path) as f:
+                traces += json.load(f)
+        except (OSError, ValueError):
+            continue  # Removed or being replaced by its process
+    return sorted(traces, key=lambda trace: trace["started_at"], reverse=True)[:limit]
+
+
+def span_depths(trace):
+    """Nesting depth of every span in a trace (root = 0), by span ID."""
+    parents = {span["id"]: span["parent"] for span in trace["spans"]}
+    depths = {}
+    for span_id in parents:
+        depth, parent = 0, parents[span_id]
+        while parent is not None and depth < len(parents):
+            depth, parent = depth + 1, parents.get(parent)
+        depths[span_id] = depth
+    return depths